@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+
+# Synthetic scans and endpoint timings, so regressions show up as numbers:
+#   ./bench.py run --hosts 5000             (both layouts, cold and warm)
+#   ./bench.py generate /tmp/scans/20240101 --hosts 500 --layout single
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "cgi-bin"))
+
+from nmapdash.bench import main
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,7 @@
 #!/usr/bin/env python3
 
-import os
-import json
+from nmapdash.endpoints import get_scan_dates
+from nmapdash.web import run_cgi
 
-SCAN_ROOT = "/var/log/nmap/scans"
-
-def get_scan_dates():
-    try:
-        return sorted(
-            [d for d in os.listdir(SCAN_ROOT)
-             if os.path.isdir(os.path.join(SCAN_ROOT, d)) and d.isdigit()],
-            reverse=True
-        )
-    except Exception:
-        return []
-
-print("Content-Type: application/json\n")
-print(json.dumps(get_scan_dates()))
+if __name__ == "__main__":
+    run_cgi(get_scan_dates)
@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+
+from nmapdash.endpoints import get_tls_certs
+from nmapdash.web import run_cgi
+
+if __name__ == "__main__":
+    run_cgi(get_tls_certs)
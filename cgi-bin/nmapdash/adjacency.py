@@ -0,0 +1,199 @@
+import zlib
+
+# Port -> host bitmaps for one date, stored in the scan index next to
+# host_order. Every live IP gets a bit, numbered in ip_key order so a CIDR
+# block is a contiguous run of bits; a bitmap is a Python int (bit i set =
+# host i), kept zlib-compressed on disk. "any" bitmaps hold every host with
+# the port in any state, as port_host_links() does; "open" ones only hosts
+# where it is open.
+#
+# first_link is the ports rowid of a port's or host's first (port, host)
+# pair. Hosts are inserted one at a time with their ports, so rowids grow in
+# port_host_links() order and top-k ties break the way a Counter built from
+# those links would.
+
+
+def _pack(bitmap):
+    return zlib.compress(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little"), 1)
+
+
+def _unpack(blob):
+    return int.from_bytes(zlib.decompress(blob), "little")
+
+
+def members(bitmap):
+    # Set bit positions, lowest first.
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for i, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield i * 8 + low.bit_length() - 1
+            byte ^= low
+
+
+def span(start, stop):
+    # Bitmap of bits start..stop-1.
+    return ((1 << (stop - start)) - 1) << start
+
+
+def rebuild(conn):
+    conn.execute("DELETE FROM port_bitmaps")
+    conn.execute("DELETE FROM bitmap_hosts")
+
+    ips = [ip for (ip,) in conn.execute(
+        "SELECT ip FROM hosts WHERE state = 'up' AND ip IS NOT NULL GROUP BY ip ORDER BY MIN(ip_key), ip")]
+    bit = {ip: i for i, ip in enumerate(ips)}
+    size = (len(ips) + 7) // 8
+
+    any_maps, open_maps, port_first, host_first = {}, {}, {}, {}
+    for portid, ip, state, n in conn.execute(
+            "SELECT ports.portid, hosts.ip, ports.state, ports.rowid FROM ports JOIN hosts ON hosts.id = ports.host_id "
+            "WHERE hosts.state = 'up' AND hosts.ip IS NOT NULL ORDER BY hosts.id, ports.rowid"):
+        b = bit[ip]
+        bits = any_maps.get(portid)
+        if bits is None:
+            bits = any_maps[portid] = bytearray(size)
+            open_maps[portid] = bytearray(size)
+            port_first[portid] = n
+        bits[b >> 3] |= 1 << (b & 7)
+        if state == "open":
+            open_maps[portid][b >> 3] |= 1 << (b & 7)
+        host_first.setdefault(ip, n)
+
+    rows = []
+    for portid, bits in any_maps.items():
+        any_bits = int.from_bytes(bits, "little")
+        open_bits = int.from_bytes(open_maps[portid], "little")
+        rows.append((portid, any_bits.bit_count(), open_bits.bit_count(), port_first[portid],
+                     _pack(any_bits), _pack(open_bits)))
+    conn.executemany("INSERT INTO port_bitmaps VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    counts = {ip: (n, n_open) for ip, n, n_open in conn.execute(
+        "SELECT hosts.ip, COUNT(DISTINCT ports.portid), "
+        "COUNT(DISTINCT CASE WHEN ports.state = 'open' THEN ports.portid END) "
+        "FROM ports JOIN hosts ON hosts.id = ports.host_id "
+        "WHERE hosts.state = 'up' AND hosts.ip IS NOT NULL GROUP BY hosts.ip")}
+    conn.executemany("INSERT INTO bitmap_hosts VALUES (?, ?, ?, ?, ?)",
+                     [(b, ip, *counts.get(ip, (0, 0)), host_first.get(ip)) for ip, b in bit.items()])
+
+
+def update(conn, ports):
+    # rebuild() for a refresh that only touched the IPs in the touched table
+    # (see scan_index.refresh) and, through them, the given port ids: just
+    # their bits are redone. An IP that went live or dark renumbers every
+    # bit after it, so that case falls back to rebuild().
+    bit = {ip: b for b, ip in conn.execute(
+        "SELECT bit, ip FROM bitmap_hosts WHERE ip IN (SELECT ip FROM touched)")}
+    live = {ip for (ip,) in conn.execute(
+        "SELECT DISTINCT ip FROM hosts WHERE state = 'up' AND ip IN (SELECT ip FROM touched)")}
+    if live != bit.keys():
+        rebuild(conn)
+        return
+    if not bit:
+        return
+
+    touched = 0
+    for b in bit.values():
+        touched |= 1 << b
+    any_maps, open_maps = {}, {}
+    for portid, ip, state in conn.execute(
+            "SELECT ports.portid, hosts.ip, ports.state FROM hosts JOIN ports ON ports.host_id = hosts.id "
+            "WHERE hosts.state = 'up' AND hosts.ip IN (SELECT ip FROM touched)"):
+        any_maps[portid] = any_maps.get(portid, 0) | 1 << bit[ip]
+        if state == "open":
+            open_maps[portid] = open_maps.get(portid, 0) | 1 << bit[ip]
+
+    rows, gone = [], []
+    for portid in sorted(ports):
+        row = conn.execute("SELECT any_bits, open_bits FROM port_bitmaps WHERE portid = ?", (portid,)).fetchone()
+        any_bits, open_bits = (_unpack(row[0]), _unpack(row[1])) if row else (0, 0)
+        any_bits = any_bits & ~touched | any_maps.get(portid, 0)
+        open_bits = open_bits & ~touched | open_maps.get(portid, 0)
+        if not any_bits:
+            gone.append((portid,))
+            continue
+        first = conn.execute(
+            "SELECT MIN(ports.rowid) FROM ports JOIN hosts ON hosts.id = ports.host_id "
+            "WHERE ports.portid = ? AND hosts.state = 'up' AND hosts.ip IS NOT NULL", (portid,)).fetchone()[0]
+        rows.append((portid, any_bits.bit_count(), open_bits.bit_count(), first,
+                     _pack(any_bits), _pack(open_bits)))
+    conn.executemany("DELETE FROM port_bitmaps WHERE portid = ?", gone)
+    conn.executemany("INSERT OR REPLACE INTO port_bitmaps VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    counts = {ip: (n, n_open, first) for ip, n, n_open, first in conn.execute(
+        "SELECT hosts.ip, COUNT(DISTINCT ports.portid), "
+        "COUNT(DISTINCT CASE WHEN ports.state = 'open' THEN ports.portid END), MIN(ports.rowid) "
+        "FROM hosts JOIN ports ON ports.host_id = hosts.id "
+        "WHERE hosts.state = 'up' AND hosts.ip IN (SELECT ip FROM touched) GROUP BY hosts.ip")}
+    conn.executemany("UPDATE bitmap_hosts SET ports = ?, open_ports = ?, first_link = ? WHERE bit = ?",
+                     [(*counts.get(ip, (0, 0, None)), b) for ip, b in bit.items()])
+
+
+class Adjacency:
+    # Read side. Bitmaps are loaded per port on first use.
+    def __init__(self, conn):
+        self.conn = conn
+        self.ips = [ip for (ip,) in conn.execute("SELECT ip FROM bitmap_hosts ORDER BY bit")]
+        self.all = span(0, len(self.ips))
+        self._maps = {}
+
+    def ports(self):
+        # Port ids by hosts DESC, then first appearance.
+        return [portid for (portid,) in self.conn.execute(
+            "SELECT portid FROM port_bitmaps ORDER BY hosts DESC, first_link")]
+
+    def bitmap(self, portid, open_only=False):
+        key = (portid, open_only)
+        if key not in self._maps:
+            row = self.conn.execute(
+                f"SELECT {'open_bits' if open_only else 'any_bits'} FROM port_bitmaps WHERE portid = ?",
+                (portid,)).fetchone()
+            self._maps[key] = _unpack(row[0]) if row else 0
+        return self._maps[key]
+
+    def select(self, all_of=(), none_of=(), any_of=(), open_only=True):
+        # Hosts with every port in all_of, none in none_of and, if given, at
+        # least one in any_of.
+        result = self.all
+        for portid in all_of:
+            result &= self.bitmap(portid, open_only)
+        if any_of:
+            either = 0
+            for portid in any_of:
+                either |= self.bitmap(portid, open_only)
+            result &= either
+        for portid in none_of:
+            result &= ~self.bitmap(portid, open_only)
+        return result
+
+    def top_ports(self, k, within=None, open_only=False):
+        # [(portid, hosts)] among the hosts in `within` (default: all).
+        if within is None or within == self.all:
+            column = "open_hosts" if open_only else "hosts"
+            return [row for row in self.conn.execute(
+                f"SELECT portid, {column} FROM port_bitmaps WHERE {column} > 0 "
+                f"ORDER BY {column} DESC, first_link LIMIT ?", (k,))]
+        counts = []
+        for portid, first in self.conn.execute("SELECT portid, first_link FROM port_bitmaps"):
+            n = (self.bitmap(portid, open_only) & within).bit_count()
+            if n:
+                counts.append((-n, first, portid))
+        return [(portid, -n) for n, _, portid in sorted(counts)[:k]]
+
+    def top_hosts(self, k, within=None, open_only=False):
+        # [(ip, ports)] by distinct port count, among the hosts in `within`.
+        column = "open_ports" if open_only else "ports"
+        rows = self.conn.execute(
+            f"SELECT bit, ip, {column} FROM bitmap_hosts WHERE {column} > 0 ORDER BY {column} DESC, first_link")
+        if within is None:
+            return [(ip, n) for _, ip, n in rows.fetchmany(k)]
+        top = []
+        for b, ip, n in rows:
+            if within >> b & 1:
+                top.append((ip, n))
+                if len(top) == k:
+                    break
+        return top
+
+    def hosts(self, bitmap):
+        return [self.ips[b] for b in members(bitmap)]
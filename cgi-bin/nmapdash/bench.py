@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from . import synthetic
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+
+# (name, query) per measurement; {old} and {new} are the two generated
+# dates. "parse" and "index" time the parser and a cold scan index build
+# on their own; everything else is a cgi-bin route, run as the shim would.
+CASES = [
+    ("parse", ""),
+    ("index", ""),
+    ("get-scan-data.py", "date={new}"),
+    ("get-dashboard.py", "date={new}"),
+    ("get-scan-summary.py", "date={new}"),
+    ("get-port-distribution.py", "date={new}"),
+    ("get-port-host-links.py", "date={new}"),
+    ("get-hosts.py", "date={new}&sort=open_ports&order=desc&limit=50"),
+    ("get-scan-dates.py", ""),
+    ("get-history.py", "from={old}&to={new}"),
+    ("get-trends.py", "metric=port&key=443"),
+    ("port-bubbles.py", "date={new}"),
+    ("port-distribution-chart.py", "date={new}"),
+    ("port-host-graph.py", "date={new}"),
+    ("port-host-sankey.py", "date={new}"),
+    ("search-hosts.py", "q=product:nginx"),
+    ("get-subnets.py", "date={new}&prefix=24"),
+    ("get-tls-certs.py", "date={new}"),
+    ("get-port-sets.py", "date={new}&all=22,443&none=3389"),
+    ("get-metrics.py", ""),
+]
+
+# Untimed setup for cases that only read what other work leaves behind:
+# "built" builds every date first (search-hosts.py searches only what the
+# builds indexed), "log" fills an empty metrics log with METRICS_LOG_LINES
+# requests spread over the other routes.
+SETUP = {"search-hosts.py": "built", "get-metrics.py": "log"}
+METRICS_LOG_LINES = 10000
+
+
+def _setup(name):
+    if SETUP.get(name) == "built":
+        from . import history, scan_data
+        from .config import SCAN_ROOT
+        for date in history.scan_dates():
+            if not scan_data.is_current(SCAN_ROOT / date, date):
+                scan_data.rebuild(SCAN_ROOT / date, date)
+    elif SETUP.get(name) == "log":
+        from . import metrics
+        if metrics.METRICS_LOG and not metrics.METRICS_LOG.exists():
+            routes = [case for case, _ in CASES if case.endswith(".py")]
+            for i in range(METRICS_LOG_LINES):
+                metrics.begin(routes[i % len(routes)])
+                metrics.finish("200 OK", "application/json")
+
+
+def _measure(name, query, date):
+    # Runs in a fresh interpreter (see _child) so peak RSS and import costs
+    # are those of one CGI request.
+    _setup(name)
+    started = time.perf_counter()
+    hosts = size = 0
+    if name == "parse":
+        from .config import SCAN_ROOT
+        from .parser import iter_hosts
+        for entry in sorted(os.scandir(SCAN_ROOT / date), key=lambda e: e.name):
+            size += entry.stat().st_size
+            try:
+                for _ in iter_hosts(entry.path):
+                    hosts += 1
+            except Exception:
+                pass
+    elif name == "index":
+        from contextlib import closing
+        from .config import SCAN_ROOT
+        from . import scan_index
+        with closing(scan_index.open_index(SCAN_ROOT / date)) as conn:
+            hosts = conn.execute("SELECT COUNT(*) FROM hosts").fetchone()[0]
+    else:
+        from .endpoints import get_endpoint
+        from .web import Form
+        response = get_endpoint(name).handle(Form(query))
+        body = response.body
+        size = len(body) if isinstance(body, bytes) else sum(len(chunk) for chunk in body)
+    return {
+        "seconds": time.perf_counter() - started,
+        "hosts": hosts,
+        "bytes": size,
+        "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def _child(root, cache, name, query, date):
+    env = dict(os.environ, NMAP_SCAN_ROOT=str(root), NMAP_CACHE_DIR=str(cache),
+               PYTHONPATH=str(PACKAGE_ROOT), PYTHONWARNINGS="ignore")
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-m", "nmapdash.bench", "measure", name, query, date],
+                         env=env, capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["wall"] = time.perf_counter() - started
+    return result
+
+
+def run_suite(hosts=2000, layout="per-host", ports_per_host=6, script_density=0.5, malformed=3,
+              repeat=3, workdir=None):
+    # -> one row per case: cold (empty scan-cache/) and warm (median of
+    # `repeat` runs against the caches the cold run left) timings.
+    base = Path(workdir or tempfile.mkdtemp(prefix="nmapdash-bench-"))
+    root, cache = base / "scans", base / "cache"
+    old, new = "20240101", "20240102"
+    for seed, date in enumerate((old, new)):
+        if not (root / date).exists():
+            synthetic.generate(root / date, hosts, layout, ports_per_host, script_density,
+                               malformed, seed=seed)
+    input_bytes = sum(e.stat().st_size for e in os.scandir(root / new))
+
+    rows = []
+    for name, query in CASES:
+        query = query.format(old=old, new=new)
+        shutil.rmtree(cache, ignore_errors=True)
+        cold = _child(root, cache, name, query, new)
+        warm = [_child(root, cache, name, query, new) for _ in range(repeat)]
+        rows.append({
+            "case": name,
+            "layout": layout,
+            "hosts": hosts,
+            "cold_s": round(cold["seconds"], 4),
+            "warm_s": round(statistics.median(r["seconds"] for r in warm), 4),
+            "cold_wall_s": round(cold["wall"], 4),
+            "hosts_per_s": round(hosts / cold["seconds"]) if cold["seconds"] else None,
+            "input_mb_per_s": round(input_bytes / cold["seconds"] / 2 ** 20, 2) if cold["seconds"] else None,
+            "peak_rss_mb": round(max(r["rss_kb"] for r in [cold] + warm) / 1024, 1),
+            "output_bytes": cold["bytes"],
+        })
+    if workdir is None:
+        shutil.rmtree(base, ignore_errors=True)
+    return rows
+
+
+COLUMNS = ("case", "layout", "cold_s", "warm_s", "cold_wall_s", "hosts_per_s", "input_mb_per_s",
+           "peak_rss_mb", "output_bytes")
+
+
+def _print_table(rows):
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in COLUMNS}
+    print("  ".join(c.ljust(widths[c]) for c in COLUMNS))
+    for row in rows:
+        print("  ".join(str(row[c]).ljust(widths[c]) for c in COLUMNS))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic nmap XML and endpoint benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="write one synthetic scan date")
+    gen.add_argument("scan_dir")
+    run = commands.add_parser("run", help="time every endpoint cold and warm")
+    run.add_argument("--layout", choices=("per-host", "single", "both"), default="both")
+    run.add_argument("--repeat", type=int, default=3, help="warm runs per case (median is reported)")
+    run.add_argument("--workdir", help="keep generated scans and caches here (reused when present)")
+    run.add_argument("--json", help="also write the rows to this file")
+    for sub in (gen, run):
+        sub.add_argument("--hosts", type=int, default=2000)
+        sub.add_argument("--ports-per-host", type=int, default=6)
+        sub.add_argument("--script-density", type=float, default=0.5)
+        sub.add_argument("--malformed", type=int, default=3)
+    gen.add_argument("--layout", choices=("per-host", "single"), default="per-host")
+    gen.add_argument("--seed", type=int, default=0)
+
+    measure = commands.add_parser("measure")
+    measure.add_argument("name")
+    measure.add_argument("query")
+    measure.add_argument("date")
+
+    args = parser.parse_args(argv)
+    if args.command == "measure":
+        print(json.dumps(_measure(args.name, args.query, args.date)))
+    elif args.command == "generate":
+        files = synthetic.generate(args.scan_dir, args.hosts, args.layout, args.ports_per_host,
+                                   args.script_density, args.malformed, seed=args.seed)
+        print(f"wrote {files} files to {args.scan_dir}", file=sys.stderr)
+    else:
+        rows = []
+        for layout in (("per-host", "single") if args.layout == "both" else (args.layout,)):
+            workdir = os.path.join(args.workdir, layout) if args.workdir else None
+            rows += run_suite(args.hosts, layout, args.ports_per_host, args.script_density,
+                              args.malformed, args.repeat, workdir)
+        _print_table(rows)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
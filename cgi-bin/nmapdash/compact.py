@@ -0,0 +1,134 @@
+import argparse
+import gzip
+import os
+import shutil
+import sys
+import tarfile
+from datetime import date as Date, datetime, timedelta
+
+from . import history, ingest, scan_files, scan_index
+from .config import SCAN_ROOT
+from .scan_files import zstandard
+
+# Packs a date that is done changing into SCAN_ROOT/<date>.tar.zst (or
+# .tar.gz / .tar), members in name order, and removes its directory; every
+# reader then streams the archive instead (see scan_files.py). The archive
+# only appears under its real name once it is complete and read back, and
+# the directory is renamed out of the way before it is deleted, so readers
+# see either the whole directory or the whole archive.
+
+FORMATS = {"zst": ".tar.zst", "gz": ".tar.gz", "tar": ".tar"}
+DEFAULT_FORMAT = "zst" if zstandard is not None else "gz"
+ZSTD_LEVEL = 12
+GZIP_LEVEL = 6
+
+
+def _writer(f, fmt):
+    if fmt == "zst":
+        if zstandard is None:
+            raise RuntimeError("writing .tar.zst archives needs the zstandard module")
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(f, closefd=False)
+    if fmt == "gz":
+        return gzip.GzipFile(fileobj=f, mode="wb", compresslevel=GZIP_LEVEL)
+    return f
+
+
+def _members(path, name):
+    with scan_files.open_file(path, name) as f, tarfile.open(fileobj=f, mode="r|") as tar:
+        return [(member.name, member.size) for member in tar]
+
+
+def _write(path, scan_dir, files, fmt):
+    with open(path, "wb") as f:
+        stream = _writer(f, fmt)
+        with tarfile.open(fileobj=stream, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            for name in sorted(files):
+                tar.add(os.path.join(scan_dir, name), arcname=name, recursive=False)
+        if stream is not f:
+            stream.close()
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def compact(date, fmt=DEFAULT_FORMAT):
+    # -> (files, bytes before, bytes after). Raises, leaving the directory
+    # untouched, if the date is already archived or a file changes meanwhile.
+    scan_dir = SCAN_ROOT / date
+    if not scan_dir.is_dir():
+        raise FileNotFoundError(f"Scan directory not found: {scan_dir}")
+    if scan_files.archive_path(scan_dir) is not None:
+        raise FileExistsError(f"{date} already has an archive")
+
+    files = scan_index.stat_files(scan_dir)
+    archive = SCAN_ROOT / f"{date}{FORMATS[fmt]}"
+    tmp = SCAN_ROOT / f".{archive.name}.{os.getpid()}.tmp"
+    try:
+        _write(tmp, scan_dir, files, fmt)
+        if scan_index.stat_files(scan_dir) != files:
+            raise RuntimeError(f"{date} changed while it was being compacted")
+        if _members(tmp, archive.name) != [(name, files[name][1]) for name in sorted(files)]:
+            raise RuntimeError(f"{date}: archive does not read back as written")
+        os.replace(tmp, archive)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+    retired = SCAN_ROOT / f".{date}.{os.getpid()}.compacted"
+    os.rename(scan_dir, retired)
+    shutil.rmtree(retired)
+    return len(files), sum(sig[1] for sig in files.values()), archive.stat().st_size
+
+
+def candidates(older_than, today=None):
+    # Dates still kept as directories whose scan day is at least older_than
+    # days back; the newest date is never one of them.
+    cutoff = (today or Date.today()) - timedelta(days=older_than)
+    dates = history.scan_dates()
+    found = []
+    for date in dates[:-1]:
+        try:
+            day = datetime.strptime(date, "%Y%m%d").date()
+        except ValueError:
+            continue
+        if day <= cutoff and (SCAN_ROOT / date).is_dir():
+            found.append(date)
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Archive old scan dates into one compressed tar each; the dashboard reads them in place.")
+    parser.add_argument("dates", nargs="*", help="dates to compact (default: every date older than --older-than)")
+    parser.add_argument("--older-than", type=int, default=90, metavar="DAYS",
+                        help="compact dates at least this many days old (default 90)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default=DEFAULT_FORMAT,
+                        help=f"archive compression (default {DEFAULT_FORMAT})")
+    parser.add_argument("--no-warm", action="store_true",
+                        help="do not rebuild each date's caches from its archive afterwards")
+    parser.add_argument("--dry-run", action="store_true", help="only list the dates that would be compacted")
+    args = parser.parse_args(argv)
+
+    dates = args.dates or candidates(args.older_than)
+    failed = False
+    for date in dates:
+        if args.dry_run:
+            print(date)
+            continue
+        try:
+            files, before, after = compact(date, args.format)
+        except Exception as e:
+            print(f"compact: {date} failed: {e}", file=sys.stderr)
+            failed = True
+            continue
+        print(f"compact: {date} -> {date}{FORMATS[args.format]}: {files} files, "
+              f"{before / 2 ** 20:.1f} MB -> {after / 2 ** 20:.1f} MB", file=sys.stderr)
+        if not args.no_warm:
+            try:
+                ingest.warm(date)
+            except Exception as e:
+                print(f"compact: {date} warm failed: {e}", file=sys.stderr)
+                failed = True
+    return 1 if failed else 0
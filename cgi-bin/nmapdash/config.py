@@ -0,0 +1,25 @@
+import os
+from pathlib import Path
+
+SCAN_ROOT = Path(os.environ.get("NMAP_SCAN_ROOT", "/var/log/nmap/scans"))
+CACHE_DIR = Path(os.environ.get("NMAP_CACHE_DIR", "scan-cache"))
+
+# One JSON line per request (see metrics.py); an empty NMAP_METRICS_LOG disables it.
+_metrics_log = os.environ.get("NMAP_METRICS_LOG")
+METRICS_LOG = CACHE_DIR / "metrics.log" if _metrics_log is None else Path(_metrics_log) if _metrics_log else None
+
+# Worker processes for cold or heavily churned index builds. Refreshes that
+# touch fewer than INGEST_PARALLEL_MIN files stay in-process.
+INGEST_WORKERS = int(os.environ.get("NMAP_INGEST_WORKERS", os.cpu_count() or 1))
+INGEST_PARALLEL_MIN = int(os.environ.get("NMAP_INGEST_PARALLEL_MIN", 256))
+INGEST_CHUNK = int(os.environ.get("NMAP_INGEST_CHUNK", 64))
+
+# ingest.py: a date directory is built once its files have stopped changing
+# for INGEST_SETTLE seconds; without inotify it is polled every INGEST_POLL.
+INGEST_SETTLE = float(os.environ.get("NMAP_INGEST_SETTLE", 30))
+INGEST_POLL = float(os.environ.get("NMAP_INGEST_POLL", 10))
+
+# A get-scan-data request that finds its date being rebuilt waits up to
+# BUILD_WAIT seconds for that build, then is served the previous caches if
+# there are any.
+BUILD_WAIT = float(os.environ.get("NMAP_BUILD_WAIT", 30))
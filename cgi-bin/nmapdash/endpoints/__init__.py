@@ -0,0 +1,33 @@
+import importlib
+
+# Script name under /cgi-bin/ -> endpoint module. Each module exposes
+# handle(form) returning a web.Response, and optionally version(form) for
+# conditional GETs (see web.respond); modules load on first use so a CGI
+# shim only pays for the endpoint it serves.
+ROUTES = {
+    "get-dashboard.py": "get_dashboard",
+    "get-history.py": "get_history",
+    "get-hosts.py": "get_hosts",
+    "get-metrics.py": "get_metrics",
+    "get-port-distribution.py": "get_port_distribution",
+    "get-port-host-links.py": "get_port_host_links",
+    "get-port-sets.py": "get_port_sets",
+    "get-scan-data.py": "get_scan_data",
+    "get-scan-dates.py": "get_scan_dates",
+    "get-scan-summary.py": "get_scan_summary",
+    "get-subnets.py": "get_subnets",
+    "get-tls-certs.py": "get_tls_certs",
+    "get-trends.py": "get_trends",
+    "port-bubbles.py": "port_bubbles",
+    "port-distribution-chart.py": "port_distribution_chart",
+    "port-host-graph.py": "port_host_graph",
+    "port-host-sankey.py": "port_host_sankey",
+    "search-hosts.py": "search_hosts",
+}
+
+
+def get_endpoint(script):
+    module = ROUTES.get(script)
+    if module is None:
+        return None
+    return importlib.import_module(f"{__name__}.{module}")
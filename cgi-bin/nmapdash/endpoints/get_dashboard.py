@@ -0,0 +1,109 @@
+import ipaddress
+import os
+from contextlib import closing
+
+from .. import metrics, scan_data, scan_files, scan_index, store, subnets, tls
+from ..config import SCAN_ROOT
+from ..versions import date_version
+from ..web import Form, json_response, render
+from . import port_bubbles, port_host_sankey
+
+# Panel name -> what it needs: "head" panels come from the header of the
+# packed get-scan-data cache (the same numbers get-scan-data.py returns),
+# the rest are read off the one scan index connection the request opens
+# (the SVG charts by way of their scripts' render cache).
+PANELS = {
+    "summary": "index",
+    "ports": "head",
+    "os": "head",
+    "tls": "head",
+    "services": "index",
+    "subnets": "index",
+    "bubbles": "index",
+    "sankey": "index",
+}
+
+CHARTS = {"bubbles": port_bubbles, "sankey": port_host_sankey}
+
+
+def _services(conn):
+    return [{"service": service, "product": product, "hosts": n}
+            for service, product, n in scan_index.service_counts(conn)]
+
+
+def _subnets(conn):
+    index = subnets.Subnets(conn)
+    by_24 = index.rollup(24)
+    by_16 = index.rollup(16)
+    hosts, open_ports = index.count(ipaddress.ip_network("0.0.0.0/0"))
+
+    def top(rows, n):
+        return [{"network": network, "hosts": count, "open_ports": n_open}
+                for network, count, n_open in sorted(rows, key=lambda row: -row[1])[:n]]
+
+    return {"hosts": hosts, "open_ports": open_ports, "networks_16": len(by_16),
+            "by_24": top(by_24, 10), "by_16": top(by_16, 9)}
+
+
+def _panel(name, date, conn, head):
+    if name == "summary":
+        return scan_index.summary(conn)
+    if name == "ports":
+        return head["port_distribution"]
+    if name == "os":
+        return head["os_distribution"]
+    if name == "tls":
+        return {"tls_info": head["tls_info"], **tls.summary(conn)}
+    if name == "services":
+        return _services(conn)
+    if name == "subnets":
+        return _subnets(conn)
+    if name in CHARTS:
+        # Through the render cache, under the same key as a plain
+        # ?date= request to the chart's own script; a miss is drawn off
+        # this request's connection.
+        endpoint = CHARTS[name]
+        form = Form(f"date={date}")
+        return render(endpoint, form, endpoint.version(form), lambda: endpoint.chart(conn)).body.decode()
+
+
+version = date_version
+
+def handle(form):
+    # Everything the dashboard shows for a date in one request:
+    # ?date=...&panels=summary,ports,os (default: all of PANELS). The date
+    # is parsed at most once and every panel reads the same snapshot; SVG
+    # panels come back as strings.
+    date = form.getfirst("date")
+
+    if not date or not date.isdigit():
+        return json_response({"error": "Missing or invalid date parameter"})
+
+    scan_dir = os.path.join(SCAN_ROOT, date)
+    if not scan_files.exists(scan_dir):
+        return json_response({"error": f"Scan directory not found: {scan_dir}"})
+
+    names = [p.strip() for p in form.getfirst("panels", ",".join(PANELS)).split(",") if p.strip()]
+    for name in names:
+        if name not in PANELS:
+            return json_response({"error": f"Invalid panel: {name}"})
+
+    head = None
+    if any(PANELS[name] == "head" for name in names):
+        # Builds (and so parses) only when the caches are behind the files.
+        with metrics.phase("aggregate"):
+            current = scan_data.is_current(scan_dir, date)
+        with scan_data.open_packed(scan_dir, date, force=not current) as scan:
+            head = scan.header
+
+    panels = {}
+    with closing(scan_index.open_index(scan_dir)) as conn, store.transaction(conn, "DEFERRED"):
+        for name in names:
+            with metrics.phase("render" if name in ("bubbles", "sankey") else "aggregate"):
+                try:
+                    panels[name] = _panel(name, date, conn, head)
+                except Exception as e:
+                    metrics.count("exceptions")
+                    panels[name] = {"error": str(e)}
+
+    return json_response({"scan_date": date, "panels": panels})
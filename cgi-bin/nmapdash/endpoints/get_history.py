@@ -0,0 +1,23 @@
+import os
+
+from .. import history, scan_files
+from ..config import SCAN_ROOT
+from ..web import json_response
+
+def handle(form):
+    dates = history.scan_dates()
+    new = form.getfirst("to") or (dates[-1] if dates else None)
+    if new in dates and not form.getfirst("from"):
+        i = dates.index(new)
+        old = dates[i - 1] if i > 0 else None
+    else:
+        old = form.getfirst("from")
+
+    for date in (old, new):
+        if not date or not date.isdigit():
+            return json_response({"error": "Missing or invalid date parameter"})
+        scan_dir = os.path.join(SCAN_ROOT, date)
+        if not scan_files.exists(scan_dir):
+            return json_response({"error": f"Scan directory not found: {scan_dir}"})
+
+    return json_response(history.diff(old, new))
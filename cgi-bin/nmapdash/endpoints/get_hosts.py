@@ -0,0 +1,45 @@
+import os
+from contextlib import closing
+
+from .. import scan_files, scan_index
+from ..config import SCAN_ROOT
+from ..hosts_query import MAX_LIMIT, query_hosts
+from ..versions import date_version
+from ..web import int_param, json_response
+
+
+version = date_version
+
+def handle(form):
+    date = form.getfirst("date")
+
+    if not date or not date.isdigit():
+        return json_response({"error": "Missing or invalid date parameter"})
+
+    scan_dir = os.path.join(SCAN_ROOT, date)
+    if not scan_files.exists(scan_dir):
+        return json_response({"error": f"Scan directory not found: {scan_dir}"})
+
+    sort = form.getfirst("sort", "ip")
+    if sort not in scan_index.SORT_KEYS:
+        return json_response({"error": f"Invalid sort key: {sort}"})
+
+    offset = int_param(form.getfirst("offset"), 0, 0, 2 ** 62)
+    limit = int_param(form.getfirst("limit"), 50, 1, MAX_LIMIT)
+
+    with closing(scan_index.open_index(scan_dir)) as conn:
+        total, hosts = query_hosts(
+            conn, offset, limit, sort,
+            descending=form.getfirst("order") == "desc",
+            port=form.getfirst("port"),
+            state=form.getfirst("state"),
+            service=form.getfirst("service"),
+            os_name=form.getfirst("os"))
+
+    return json_response({
+        "scan_date": date,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "hosts": hosts
+    })
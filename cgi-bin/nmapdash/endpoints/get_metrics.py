@@ -0,0 +1,11 @@
+from .. import metrics
+from ..web import int_param, json_response
+
+
+def handle(form):
+    # p50/p95 per route over the last `limit` requests in the metrics log.
+    limit = int_param(form.getfirst("limit"), 10000, 1, 1000000)
+    return json_response({
+        "limit": limit,
+        "routes": metrics.summary(limit, form.getfirst("route"))
+    })
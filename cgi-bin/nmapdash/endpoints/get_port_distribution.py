@@ -0,0 +1,22 @@
+import os
+
+from .. import scan_files
+from ..config import SCAN_ROOT
+from ..scan_index import port_distribution
+from ..versions import date_version
+from ..web import json_response
+
+version = date_version
+
+def handle(form):
+    date = form.getfirst("date")
+
+    if not date or not date.isdigit():
+        return json_response({"error": "Missing or invalid date"})
+
+    scan_dir = os.path.join(SCAN_ROOT, date)
+    if not scan_files.exists(scan_dir):
+        return json_response({"error": f"Scan directory not found: {scan_dir}"})
+
+    result = port_distribution(scan_dir)
+    return json_response(result)
@@ -0,0 +1,64 @@
+import os
+from contextlib import closing
+from itertools import islice
+
+from .. import adjacency, scan_files, scan_index
+from ..config import SCAN_ROOT
+from ..hosts_query import MAX_LIMIT
+from ..versions import date_version
+from ..web import int_param, json_response
+
+MAX_TOP = 1000
+
+
+def _ports(value):
+    return [p.strip() for p in (value or "").split(",") if p.strip()]
+
+
+version = date_version
+
+def handle(form):
+    # Set queries over the date's port -> host bitmaps, e.g.
+    # ?all=22,3389&none=443 for hosts with 22 and 3389 open but not 443.
+    # top=ports|hosts ranks within the selected hosts instead of listing them.
+    date = form.getfirst("date")
+
+    if not date or not date.isdigit():
+        return json_response({"error": "Missing or invalid date parameter"})
+
+    scan_dir = os.path.join(SCAN_ROOT, date)
+    if not scan_files.exists(scan_dir):
+        return json_response({"error": f"Scan directory not found: {scan_dir}"})
+
+    state = form.getfirst("state", "open")
+    top = form.getfirst("top")
+    if state not in ("open", "any"):
+        return json_response({"error": f"Invalid state: {state}"})
+    if top not in (None, "ports", "hosts"):
+        return json_response({"error": f"Invalid top: {top}"})
+
+    query = {"all": _ports(form.getfirst("all")), "none": _ports(form.getfirst("none")),
+             "any": _ports(form.getfirst("any")), "state": state}
+    open_only = state == "open"
+
+    with closing(scan_index.open_index(scan_dir)) as conn:
+        adj = adjacency.Adjacency(conn)
+        selected = adj.select(query["all"], query["none"], query["any"], open_only)
+        result = {"scan_date": date, "query": query, "total": selected.bit_count()}
+
+        if top:
+            k = int_param(form.getfirst("k"), 10, 1, MAX_TOP)
+            within = None if selected == adj.all else selected
+            if top == "ports":
+                result["ports"] = [{"port": port, "hosts": n}
+                                   for port, n in adj.top_ports(k, within, open_only)]
+            else:
+                result["hosts"] = [{"ip": ip, "ports": n}
+                                   for ip, n in adj.top_hosts(k, within, open_only)]
+            return json_response(result)
+
+        offset = int_param(form.getfirst("offset"), 0, 0, 2 ** 62)
+        limit = int_param(form.getfirst("limit"), 100, 1, MAX_LIMIT)
+        result.update(offset=offset, limit=limit, hosts=[
+            adj.ips[b] for b in islice(adjacency.members(selected), offset, offset + limit)])
+    return json_response(result)
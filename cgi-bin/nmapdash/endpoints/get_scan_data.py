@@ -0,0 +1,38 @@
+from .. import scan_data, scan_files
+from ..config import SCAN_ROOT
+from ..versions import date_version
+from ..web import Response, json_response
+
+version = date_version
+
+
+def handle(form):
+    date = form.getfirst("date")
+    force = form.getfirst("rebuild") == "true"
+
+    # The date names files under SCAN_ROOT and CACHE_DIR (index, caches,
+    # build lock), so nothing but digits gets that far.
+    if not date or not date.isdigit():
+        return json_response({"error": "Missing or invalid date parameter"}, "400 Bad Request")
+
+    scan_dir = SCAN_ROOT / date
+    if not scan_files.exists(scan_dir):
+        return json_response({"error": f"Scan directory {scan_dir} not found"})
+
+    # One host or just the header: answered from the packed cache, so only
+    # the pages holding them are read.
+    ip = form.getfirst("ip")
+    if ip or form.getfirst("summary") == "true":
+        with scan_data.open_packed(scan_dir, date, force) as scan:
+            if not ip:
+                return json_response(scan.header)
+            host = scan.host(ip)
+        if host is None:
+            return json_response({"error": f"Host {ip} not found"})
+        return json_response({"ip": ip, **scan_data.host_data(host)})
+
+    cache_file = scan_data.cache_path(date)
+    if cache_file.exists() and not force:
+        return Response(scan_data.read_cache(date))
+
+    return Response(scan_data.build(scan_dir, date))
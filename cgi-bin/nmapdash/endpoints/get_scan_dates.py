@@ -0,0 +1,8 @@
+from .. import manifest
+from ..web import json_response
+
+
+def handle(form):
+    # Newest first: {"date", "files", "bytes", "live_hosts", "cache", "modified"}
+    # per date, so the date picker never needs a request per date.
+    return json_response(manifest.refresh())
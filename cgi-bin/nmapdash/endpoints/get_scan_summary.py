@@ -0,0 +1,26 @@
+import os
+from contextlib import closing
+
+from .. import scan_files, scan_index
+from ..config import SCAN_ROOT
+from ..versions import date_version
+from ..web import json_response
+
+def parse_scan_data(scan_dir):
+    with closing(scan_index.open_index(scan_dir)) as conn:
+        return scan_index.summary(conn)
+
+version = date_version
+
+def handle(form):
+    date = form.getfirst("date")
+
+    if not date or not date.isdigit():
+        return json_response({"error": "Missing or invalid date parameter"})
+
+    scan_dir = os.path.join(SCAN_ROOT, date)
+    if not scan_files.exists(scan_dir):
+        return json_response({"error": f"Scan directory not found: {scan_dir}"})
+
+    summary = parse_scan_data(scan_dir)
+    return json_response(summary)
@@ -0,0 +1,70 @@
+import ipaddress
+import os
+from contextlib import closing
+
+from .. import scan_files, scan_index, subnets
+from ..config import SCAN_ROOT
+from ..hosts_query import MAX_LIMIT
+from ..versions import date_version
+from ..web import int_param, json_response
+
+EVERYTHING = {4: ipaddress.ip_network("0.0.0.0/0"), 6: ipaddress.ip_network("::/0")}
+
+
+version = date_version
+
+def handle(form):
+    # Live hosts and open ports per /prefix subnet, e.g. ?prefix=24 or
+    # ?network=10.1.0.0/16&prefix=24 for the /24s inside one /16.
+    date = form.getfirst("date")
+
+    if not date or not date.isdigit():
+        return json_response({"error": "Missing or invalid date parameter"})
+
+    scan_dir = os.path.join(SCAN_ROOT, date)
+    if not scan_files.exists(scan_dir):
+        return json_response({"error": f"Scan directory not found: {scan_dir}"})
+
+    within = None
+    if form.getfirst("network"):
+        try:
+            within = ipaddress.ip_network(form.getfirst("network"), strict=False)
+        except ValueError:
+            return json_response({"error": f"Invalid network: {form.getfirst('network')}"})
+    family = within.version if within else int_param(form.getfirst("family"), 4, 4, 6)
+    if family not in subnets.BITS:
+        return json_response({"error": f"Invalid family: {family}"})
+
+    low = within.prefixlen if within else 1
+    prefix = int_param(form.getfirst("prefix"), min(max(24 if family == 4 else 64, low), subnets.BITS[family]),
+                       low, subnets.BITS[family])
+    sort = form.getfirst("sort", "network")
+    if sort not in ("network", "hosts", "open_ports"):
+        return json_response({"error": f"Invalid sort key: {sort}"})
+
+    offset = int_param(form.getfirst("offset"), 0, 0, 2 ** 62)
+    limit = int_param(form.getfirst("limit"), 100, 1, MAX_LIMIT)
+
+    with closing(scan_index.open_index(scan_dir)) as conn:
+        index = subnets.Subnets(conn)
+        hosts, open_ports = index.count(within or EVERYTHING[family])
+        rows = index.rollup(prefix, family, within)
+
+    if sort != "network":
+        column = 1 if sort == "hosts" else 2
+        # Stable, so equal counts stay in address order.
+        rows.sort(key=lambda row: -row[column])
+
+    return json_response({
+        "scan_date": date,
+        "family": family,
+        "network": str(within) if within else None,
+        "prefix": prefix,
+        "hosts": hosts,
+        "open_ports": open_ports,
+        "total": len(rows),
+        "offset": offset,
+        "limit": limit,
+        "subnets": [{"network": network, "hosts": n, "open_ports": n_open}
+                    for network, n, n_open in rows[offset:offset + limit]]
+    })
@@ -0,0 +1,39 @@
+import os
+from contextlib import closing
+
+from .. import scan_files, scan_index, tls
+from ..config import SCAN_ROOT
+from ..hosts_query import MAX_LIMIT
+from ..versions import date_version
+from ..web import int_param, json_response
+
+
+version = date_version
+
+def handle(form):
+    # Certificate counts, expiry buckets and the top issuers for one date,
+    # plus a page of its certificates, soonest to expire first; expiry= and
+    # issuer= narrow the page to one bucket or issuer.
+    date = form.getfirst("date")
+
+    if not date or not date.isdigit():
+        return json_response({"error": "Missing or invalid date parameter"})
+
+    scan_dir = os.path.join(SCAN_ROOT, date)
+    if not scan_files.exists(scan_dir):
+        return json_response({"error": f"Scan directory not found: {scan_dir}"})
+
+    expiry = form.getfirst("expiry")
+    if expiry and expiry not in tls.BUCKET_NAMES:
+        return json_response({"error": f"Invalid expiry bucket: {expiry}"})
+
+    issuers = int_param(form.getfirst("issuers"), 10, 1, 1000)
+    offset = int_param(form.getfirst("offset"), 0, 0, 2 ** 62)
+    limit = int_param(form.getfirst("limit"), 10, 1, MAX_LIMIT)
+
+    with closing(scan_index.open_index(scan_dir)) as conn:
+        result = {"scan_date": date, **tls.summary(conn, issuers)}
+        total, certs = tls.certs(conn, expiry, form.getfirst("issuer"), offset, limit)
+
+    result.update(total=total, offset=offset, limit=limit, certs=certs)
+    return json_response(result)
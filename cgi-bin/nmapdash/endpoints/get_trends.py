@@ -0,0 +1,23 @@
+from .. import history, rollups
+from ..web import int_param, json_response
+
+# At most this many of the latest dates per series (ten years of dailies).
+MAX_LIMIT = 3650
+
+def handle(form):
+    metric = form.getfirst("metric", "live_hosts")
+    key = form.getfirst("key")
+
+    if metric not in rollups.METRICS:
+        return json_response({"error": f"Invalid metric: {metric}"})
+    if metric != "live_hosts" and not key:
+        return json_response({"error": f"Missing key for metric: {metric}"})
+
+    limit = int_param(form.getfirst("limit"), 365, 1, MAX_LIMIT)
+
+    dates = history.scan_dates()[-limit:]
+    return json_response({
+        "metric": metric,
+        "key": key,
+        "series": rollups.series(dates, metric, key)
+    })
@@ -0,0 +1,75 @@
+import os
+import random
+from contextlib import closing
+
+from .. import metrics, scan_files, scan_index
+from ..config import SCAN_ROOT
+from ..versions import date_version
+from ..web import svg_response
+
+MAX_RADIUS = 30
+MIN_RADIUS = 10
+CHART_WIDTH = 720
+CHART_HEIGHT = 160
+
+
+def top_ports(conn):
+    port_counts = scan_index.port_counts(conn)
+    return sorted(port_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+
+def chart(conn):
+    # The chart off an open scan index; get-dashboard.py passes its own.
+    with metrics.phase("aggregate"):
+        ports = top_ports(conn)
+    return svg_response(generate_svg(ports))
+
+def generate_svg(top_ports):
+    if not top_ports:
+        return '<svg width="100" height="50"><text x="10" y="25">No data</text></svg>'
+
+    max_count = top_ports[0][1]
+    # Wobble seeded from the data: the same ports and counts always get
+    # the same layout, so the SVG can be cached and ETagged.
+    rnd = random.Random(repr(top_ports))
+    svg = [f'<svg width="{CHART_WIDTH}" height="{CHART_HEIGHT}" xmlns="http://www.w3.org/2000/svg">']
+
+    x = 0  # Start at the far left
+    cx = 40  # initial center x
+    cy_base = CHART_HEIGHT // 2
+
+    for port, count in top_ports:
+        # More aggressive scaling
+        radius = MIN_RADIUS + ((MAX_RADIUS - MIN_RADIUS) * (count / max_count))
+
+        # Random vertical wobble
+        cy = cy_base + rnd.choice([-8, -4, 0, 4, 8])
+
+        # Draw the bubble
+        svg.append(f'<circle cx="{cx}" cy="{cy}" r="{radius:.1f}" fill="#4fc3f7">')
+        svg.append(f'  <title>Port {port}: {count} hosts</title>')
+        svg.append('</circle>')
+
+        # Label inside bubble
+        svg.append(f'<text x="{cx}" y="{cy + 4}" text-anchor="middle" font-size="9" fill="#000">{port}</text>')
+
+        # Move x to the right, allowing for slight overlap (85% of width)
+        cx += radius * 1.7
+
+    svg.append('</svg>')
+    return '\n'.join(svg)
+
+version = date_version
+render_cache = True
+
+def handle(form):
+    date = form.getfirst("date")
+
+    if not date or not date.isdigit():
+        return svg_response('<svg><text x="10" y="20">Invalid date</text></svg>')
+
+    scan_dir = os.path.join(SCAN_ROOT, date)
+    if not scan_files.exists(scan_dir):
+        return svg_response('<svg><text x="10" y="20">Scan directory not found</text></svg>')
+
+    with closing(scan_index.open_index(scan_dir)) as conn:
+        return chart(conn)
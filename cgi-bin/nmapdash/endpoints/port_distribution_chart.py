@@ -0,0 +1,55 @@
+import os
+
+from .. import metrics, scan_files
+from ..config import SCAN_ROOT
+from ..scan_index import port_distribution
+from ..versions import date_version
+from ..web import svg_response
+
+MAX_WIDTH = 400
+BAR_HEIGHT = 18
+GAP = 6
+FONT_SIZE = 10
+CHART_MARGIN = 50
+
+def render_chart(data):
+    sorted_ports = sorted(data.items(), key=lambda x: int(x[1]), reverse=True)[:10]
+    max_count = max([int(v) for _, v in sorted_ports]) if sorted_ports else 1
+
+    height = (BAR_HEIGHT + GAP) * len(sorted_ports) + 40
+    svg_width = MAX_WIDTH + CHART_MARGIN + 40
+    svg = [f'<svg viewBox="0 0 {svg_width} {height}" preserveAspectRatio="xMinYMin meet" xmlns="http://www.w3.org/2000/svg">']
+
+    y = 20
+    for port, count in sorted_ports:
+        width = int((int(count) / max_count) * MAX_WIDTH)
+        svg.append(f'<rect x="{CHART_MARGIN}" y="{y}" width="{width}" height="{BAR_HEIGHT}" fill="#4fc3f7">')
+        svg.append(f'<title>Port {port}: {count} hosts</title></rect>')
+        svg.append(f'<text x="{CHART_MARGIN - 10}" y="{y + BAR_HEIGHT - 4}" text-anchor="end" font-size="{FONT_SIZE}" fill="#4fc3f7">{port}</text>')
+        label_x = min(CHART_MARGIN + width + 5, MAX_WIDTH + CHART_MARGIN - 10)
+        svg.append(f'<text x="{CHART_MARGIN + width + 5}" y="{y + BAR_HEIGHT - 4}" font-size="{FONT_SIZE}" fill="#999">{count}</text>')
+        y += BAR_HEIGHT + GAP
+
+    svg.append('</svg>')
+    return "\n".join(svg)
+
+version = date_version
+render_cache = True
+
+def handle(form):
+    date = form.getfirst("date")
+    if not date or not date.isdigit():
+        return svg_response('<svg><text x="10" y="20">Invalid date</text></svg>')
+
+    scan_dir = os.path.join(SCAN_ROOT, date)
+    if not scan_files.exists(scan_dir):
+        return svg_response('<svg><text x="10" y="20">Scan directory not found</text></svg>')
+
+    try:
+        with metrics.phase("aggregate"):
+            data = port_distribution(scan_dir)
+    except Exception as e:
+        metrics.count("exceptions")
+        return svg_response(f'<svg><text x="10" y="20">Error loading data: {str(e)}</text></svg>')
+
+    return svg_response(render_chart(data))
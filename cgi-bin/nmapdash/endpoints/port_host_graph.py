@@ -0,0 +1,223 @@
+import ipaddress
+import os
+from collections import Counter
+from contextlib import closing
+from html import escape
+
+from .. import adjacency, metrics, scan_files, scan_index
+from ..config import SCAN_ROOT
+from ..versions import date_version
+from ..web import int_param, svg_response
+
+SVG_WIDTH = 800
+SVG_HEIGHT = 500
+MARGIN = 80
+PORT_X = MARGIN
+HOST_X = SVG_WIDTH - MARGIN
+
+# Past MAX_NODES hosts (or ports) the graph collapses hosts into CIDR groups
+# and draws one weighted edge per (port, group); either side keeps at most
+# MAX_NODES nodes, the lightest folded into one "other" node.
+MAX_NODES = 60
+GROUP_PREFIX = 24
+GROUP_PREFIX6 = 64
+OTHER = "other"
+
+def extract_links(adj, bits):
+    # The hosts at `bits` with their (port, host) pairs, for the ungrouped
+    # drawing.
+    hosts = [adj.ips[b] for b in bits]
+    selection = 0
+    for b in bits:
+        selection |= 1 << b
+    links = [(port, adj.ips[b]) for port in adj.ports()
+             for b in adjacency.members(adj.bitmap(port) & selection)]
+    ports = {port for port, _ in links}
+    return sorted(ports), sorted(hosts), links
+
+def render_svg(ports, hosts, links):
+    spacing_ports = SVG_HEIGHT // max(1, len(ports))
+    spacing_hosts = SVG_HEIGHT // max(1, len(hosts))
+
+    svg = [f'<svg width="{SVG_WIDTH}" height="{SVG_HEIGHT}" xmlns="http://www.w3.org/2000/svg">']
+
+    port_pos = {}
+    host_pos = {}
+
+    for i, port in enumerate(ports):
+        y = spacing_ports * i + spacing_ports // 2
+        port_pos[port] = y
+        svg.append(f'<text x="{PORT_X - 10}" y="{y}" text-anchor="end" font-size="10" fill="#4fc3f7">{port}</text>')
+        svg.append(f'<circle cx="{PORT_X}" cy="{y}" r="4" fill="#4fc3f7" />')
+
+    for i, host in enumerate(hosts):
+        y = spacing_hosts * i + spacing_hosts // 2
+        host_pos[host] = y
+        svg.append(f'<text x="{HOST_X + 10}" y="{y}" text-anchor="start" font-size="10" fill="#e53935">{host}</text>')
+        svg.append(f'<circle cx="{HOST_X}" cy="{y}" r="4" fill="#e53935" />')
+
+    for port, host in links:
+        y1 = port_pos.get(port)
+        y2 = host_pos.get(host)
+        if y1 is not None and y2 is not None:
+            svg.append(f'<line x1="{PORT_X}" y1="{y1}" x2="{HOST_X}" y2="{y2}" stroke="#aaa" stroke-width="1" />')
+
+    svg.append('</svg>')
+    return '\n'.join(svg)
+
+def group_of(ip, prefix):
+    # IPv4 groups are /prefix, IPv6 ones /GROUP_PREFIX6; prefix 32 keeps
+    # every host on its own.
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return ip
+    if prefix >= 32:
+        return ip
+    bits = prefix if addr.version == 4 else GROUP_PREFIX6
+    return str(ipaddress.ip_network(f"{ip}/{bits}", strict=False))
+
+
+def _in_network(ip, network):
+    try:
+        return ipaddress.ip_address(ip) in network
+    except ValueError:
+        return False
+
+
+def _node_key(node):
+    if node == OTHER:
+        return (1, b"")
+    return (0, scan_index.ip_sort_key(node.split("/")[0]))
+
+
+def _cap(weights, limit):
+    # Keeps the `limit - 1` heaviest nodes and folds the rest into OTHER.
+    if len(weights) <= limit:
+        return {node: node for node in weights}
+    kept = {node for node, _ in sorted(weights.items(), key=lambda kv: (-kv[1], kv[0]))[:limit - 1]}
+    return {node: node if node in kept else OTHER for node in weights}
+
+
+def aggregate(adj, bits, prefix):
+    # -> (port nodes, [(group, member count)], {(port node, group): hosts}).
+    # Bits run in ip_key order, so every group is a contiguous span and an
+    # edge weight is the popcount of a port bitmap under the group's mask.
+    masks = {}
+    members = Counter()
+    for b in bits:
+        name = group_of(adj.ips[b], prefix)
+        masks[name] = masks.get(name, 0) | 1 << b
+        members[name] += 1
+    selection = 0
+    for mask in masks.values():
+        selection |= mask
+
+    port_weight = Counter()
+    for port in adj.ports():
+        n = (adj.bitmap(port) & selection).bit_count()
+        if n:
+            port_weight[port] = n
+    port_node = _cap(port_weight, MAX_NODES)
+    group_node = _cap(members, MAX_NODES)
+
+    node_masks = {}
+    sizes = Counter()
+    for name, mask in masks.items():
+        node = group_node[name]
+        node_masks[node] = node_masks.get(node, 0) | mask
+        sizes[node] += members[name]
+
+    edges = Counter()
+    for port in port_weight:
+        bitmap = adj.bitmap(port)
+        for node, mask in node_masks.items():
+            n = (bitmap & mask).bit_count()
+            if n:
+                edges[(port_node[port], node)] += n
+
+    port_nodes = sorted(set(port_node.values()), key=lambda p: (p == OTHER, int(p) if p.isdigit() else 0, p))
+    groups = sorted(sizes.items(), key=lambda kv: _node_key(kv[0]))
+    return port_nodes, groups, edges
+
+
+def render_groups(date, ports, groups, edges, prefix, mode):
+    spacing_ports = SVG_HEIGHT / max(1, len(ports))
+    spacing_groups = SVG_HEIGHT / max(1, len(groups))
+    heaviest = max(edges.values(), default=1)
+
+    svg = [f'<svg width="{SVG_WIDTH}" height="{SVG_HEIGHT}" xmlns="http://www.w3.org/2000/svg" '
+           f'xmlns:xlink="http://www.w3.org/1999/xlink">']
+
+    port_pos = {}
+    for i, port in enumerate(ports):
+        y = round(spacing_ports * i + spacing_ports / 2, 1)
+        port_pos[port] = y
+        svg.append(f'<text x="{PORT_X - 10}" y="{y}" text-anchor="end" font-size="10" fill="#4fc3f7">{port}</text>')
+        svg.append(f'<circle cx="{PORT_X}" cy="{y}" r="4" fill="#4fc3f7" />')
+
+    group_pos = {}
+    for i, (name, size) in enumerate(groups):
+        y = round(spacing_groups * i + spacing_groups / 2, 1)
+        group_pos[name] = y
+        label = f'<text x="{HOST_X + 10}" y="{y}" text-anchor="start" font-size="10" fill="#e53935">' \
+                f'{escape(name)} ({size})</text>'
+        if name != OTHER and "/" in name:
+            href = escape(f"port-host-graph.py?date={date}&mode={mode}&expand={name}&prefix={prefix}")
+            label = f'<a xlink:href="{href}">{label}</a>'
+        svg.append(label)
+        svg.append(f'<circle cx="{HOST_X}" cy="{y}" r="{min(10, 3 + size.bit_length())}" fill="#e53935" />')
+
+    for (port, name), weight in sorted(edges.items(), key=lambda kv: (kv[1], kv[0])):
+        width = round(1 + 7 * weight / heaviest, 1)
+        svg.append(f'<line x1="{PORT_X}" y1="{port_pos[port]}" x2="{HOST_X}" y2="{group_pos[name]}" '
+                   f'stroke="#aaa" stroke-width="{width}" stroke-opacity="0.6">'
+                   f'<title>{port} - {escape(name)}: {weight} hosts</title></line>')
+
+    svg.append('</svg>')
+    return '\n'.join(svg)
+
+
+version = date_version
+render_cache = True
+
+def handle(form):
+    date = form.getfirst("date")
+    if not date or not date.isdigit():
+        return svg_response('<svg><text x="10" y="20">Invalid date</text></svg>')
+
+    scan_dir = os.path.join(SCAN_ROOT, date)
+    if not scan_files.exists(scan_dir):
+        return svg_response('<svg><text x="10" y="20">Scan directory not found</text></svg>')
+
+    # mode=auto groups only past MAX_NODES, mode=groups always does, and
+    # mode=hosts never groups (the host side is still capped). expand=CIDR
+    # keeps just the hosts in that network, grouped one level finer if
+    # there are still too many.
+    mode = form.getfirst("mode", "auto")
+    prefix = int_param(form.getfirst("prefix"), GROUP_PREFIX, 1, 32)
+    expand = form.getfirst("expand")
+    if mode not in ("auto", "groups", "hosts"):
+        return svg_response('<svg><text x="10" y="20">Invalid mode</text></svg>')
+
+    with metrics.phase("aggregate"), closing(scan_index.open_index(scan_dir)) as conn:
+        adj = adjacency.Adjacency(conn)
+        bits = range(len(adj.ips))
+        if expand:
+            try:
+                network = ipaddress.ip_network(expand, strict=False)
+            except ValueError:
+                return svg_response('<svg><text x="10" y="20">Invalid expand network</text></svg>')
+            bits = [b for b in bits if _in_network(adj.ips[b], network)]
+            prefix = min(32, max(prefix, network.prefixlen + 8)) if network.version == 4 else 32
+
+        small = len(bits) <= MAX_NODES
+        if small:
+            ports, hosts, links = extract_links(adj, bits)
+            small = len(ports) <= MAX_NODES
+        if mode == "hosts" or (mode == "auto" and small):
+            if small:
+                return svg_response(render_svg(ports, hosts, links))
+            prefix = 32
+        ports, groups, edges = aggregate(adj, bits, prefix)
+    return svg_response(render_groups(date, ports, groups, edges, prefix, mode))
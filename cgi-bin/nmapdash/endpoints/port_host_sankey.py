@@ -0,0 +1,80 @@
+import os
+from contextlib import closing
+
+from .. import adjacency, metrics, scan_files, scan_index
+from ..config import SCAN_ROOT
+from ..versions import date_version
+from ..web import svg_response
+
+SVG_WIDTH = 800
+SVG_HEIGHT = 500
+MARGIN_X = 100
+PORT_X = MARGIN_X
+HOST_X = SVG_WIDTH - MARGIN_X
+
+def connections(conn):
+    # Top 10 ports by host count and top 10 hosts by port count, straight
+    # off the date's adjacency bitmaps; a link is one bit test.
+    adj = adjacency.Adjacency(conn)
+    top_ports = [p for p, _ in adj.top_ports(10)]
+    top_hosts = [h for h, _ in adj.top_hosts(10)]
+    bit = {ip: b for b, ip in enumerate(adj.ips)}
+    links = [(p, h) for p in top_ports for h in top_hosts
+             if adj.bitmap(p) >> bit[h] & 1]
+    return top_ports, top_hosts, links
+
+def chart(conn):
+    # The chart off an open scan index; get-dashboard.py passes its own.
+    with metrics.phase("aggregate"):
+        ports, hosts, links = connections(conn)
+    return svg_response(generate_svg(ports, hosts, links))
+
+def generate_svg(ports, hosts, links):
+    svg = [f'<svg width="{SVG_WIDTH}" height="{SVG_HEIGHT}" xmlns="http://www.w3.org/2000/svg">']
+
+    spacing_ports = SVG_HEIGHT // (len(ports) + 1)
+    spacing_hosts = SVG_HEIGHT // (len(hosts) + 1)
+
+    port_pos = {}
+    host_pos = {}
+
+    # Draw ports on the left
+    for i, port in enumerate(ports):
+        y = (i + 1) * spacing_ports
+        port_pos[port] = y
+        svg.append(f'<circle cx="{PORT_X}" cy="{y}" r="4" fill="#4fc3f7" />')
+        svg.append(f'<text x="{PORT_X - 10}" y="{y + 4}" text-anchor="end" font-size="10" fill="#4fc3f7">{port}</text>')
+
+    # Draw hosts on the right
+    for i, host in enumerate(hosts):
+        y = (i + 1) * spacing_hosts
+        host_pos[host] = y
+        svg.append(f'<circle cx="{HOST_X}" cy="{y}" r="4" fill="#e53935" />')
+        svg.append(f'<text x="{HOST_X + 10}" y="{y + 4}" text-anchor="start" font-size="10" fill="#e53935">{host}</text>')
+
+    # Draw curved lines
+    for port, host in links:
+        y1 = port_pos[port]
+        y2 = host_pos[host]
+        svg.append(
+            f'<path d="M {PORT_X},{y1} C {(PORT_X + HOST_X)//2},{y1} {(PORT_X + HOST_X)//2},{y2} {HOST_X},{y2}" '
+            f'stroke="#999" stroke-width="1" fill="none" />'
+        )
+
+    svg.append('</svg>')
+    return "\n".join(svg)
+
+version = date_version
+render_cache = True
+
+def handle(form):
+    date = form.getfirst("date")
+    if not date or not date.isdigit():
+        return svg_response('<svg><text x="10" y="20">Invalid date</text></svg>')
+
+    scan_dir = os.path.join(SCAN_ROOT, date)
+    if not scan_files.exists(scan_dir):
+        return svg_response('<svg><text x="10" y="20">Scan directory not found</text></svg>')
+
+    with closing(scan_index.open_index(scan_dir)) as conn:
+        return chart(conn)
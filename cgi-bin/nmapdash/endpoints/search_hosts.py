@@ -0,0 +1,39 @@
+import os
+
+from .. import scan_files, search
+from ..config import SCAN_ROOT
+from ..hosts_query import MAX_LIMIT
+from ..web import int_param, json_response
+
+
+def handle(form):
+    # ?q=product:openssh "7.4"* finds host/port pairs across every date;
+    # see search.parse_query() for the syntax. date= (comma-separated)
+    # and port= narrow the search. Dates the ingest has not indexed yet are
+    # listed under "unindexed" rather than indexed on the spot.
+    text = (form.getfirst("q") or "").strip()
+    if not text:
+        return json_response({"error": "Missing q parameter"})
+
+    dates = None
+    if form.getfirst("date"):
+        dates = [d.strip() for d in form.getfirst("date").split(",") if d.strip()]
+        for date in dates:
+            if not date.isdigit():
+                return json_response({"error": "Missing or invalid date parameter"})
+            scan_dir = os.path.join(SCAN_ROOT, date)
+            if not scan_files.exists(scan_dir):
+                return json_response({"error": f"Scan directory not found: {scan_dir}"})
+
+    offset = int_param(form.getfirst("offset"), 0, 0, 2 ** 62)
+    limit = int_param(form.getfirst("limit"), 50, 1, MAX_LIMIT)
+
+    total, results, unindexed = search.search(text, dates, form.getfirst("port"), offset, limit)
+    return json_response({
+        "query": text,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "results": results,
+        "unindexed": unindexed
+    })
@@ -0,0 +1,160 @@
+import hashlib
+import json
+from contextlib import closing
+
+from . import scan_files, scan_index, store
+from .config import CACHE_DIR, SCAN_ROOT
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE dates (
+    date TEXT PRIMARY KEY,
+    generation TEXT NOT NULL
+);
+CREATE TABLE fingerprints (
+    date TEXT NOT NULL,
+    ip TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    ports TEXT NOT NULL,
+    PRIMARY KEY (date, ip)
+) WITHOUT ROWID;
+CREATE TABLE diffs (
+    old TEXT NOT NULL,
+    new TEXT NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (old, new)
+) WITHOUT ROWID;
+"""
+
+
+def history_path():
+    return CACHE_DIR / "history.db"
+
+
+def _connect():
+    return store.connect(history_path(), SCHEMA, SCHEMA_VERSION)
+
+
+def _fingerprint(ports):
+    ports = sorted(set(ports))
+    encoded = json.dumps(ports, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode(), digest_size=8).digest(), encoded
+
+
+def record(conn, date):
+    # Brings the stored fingerprints for one date in line with its scan index.
+    # Returns True when they changed (and cached diffs touching it were dropped).
+    with closing(scan_index.open_index(SCAN_ROOT / date)) as idx:
+        with store.transaction(idx, "DEFERRED"):
+            generation = scan_index.generation(idx)
+            row = conn.execute("SELECT generation FROM dates WHERE date = ?", (date,)).fetchone()
+            if row and row[0] == generation:
+                return False
+            rows = [(date, ip, *_fingerprint(ports)) for ip, ports in scan_index.live_host_ports(idx)]
+
+    with store.transaction(conn):
+        conn.execute("DELETE FROM fingerprints WHERE date = ?", (date,))
+        conn.execute("DELETE FROM diffs WHERE old = ? OR new = ?", (date, date))
+        conn.executemany("INSERT INTO fingerprints VALUES (?, ?, ?, ?)", rows)
+        conn.execute("INSERT OR REPLACE INTO dates VALUES (?, ?)", (date, generation))
+    return True
+
+
+def _load(conn, date):
+    return {ip: (digest, ports) for ip, digest, ports in conn.execute(
+        "SELECT ip, digest, ports FROM fingerprints WHERE date = ?", (date,))}
+
+
+def _port_changes(ip, old_ports, new_ports):
+    old = {(p[0], p[1]): p for p in json.loads(old_ports)}
+    new = {(p[0], p[1]): p for p in json.loads(new_ports)}
+    opened, closed, changed = [], [], []
+
+    for key in sorted(old.keys() | new.keys(), key=lambda k: (k[1], int(k[0]) if k[0].isdigit() else 0, k[0])):
+        before, after = old.get(key), new.get(key)
+        was_open = before is not None and before[2] == "open"
+        is_open = after is not None and after[2] == "open"
+        entry = {"ip": ip, "port": key[0], "protocol": key[1]}
+
+        if is_open and not was_open:
+            opened.append(dict(entry, service=after[3], version=after[4]))
+        elif was_open and not is_open:
+            closed.append(dict(entry, service=before[3], version=before[4],
+                               state=after[2] if after else "absent"))
+        elif before and after and (before[3], before[4]) != (after[3], after[4]):
+            changed.append(dict(entry,
+                                old={"service": before[3], "version": before[4]},
+                                new={"service": after[3], "version": after[4]}))
+    return opened, closed, changed
+
+
+def _compute(conn, old, new):
+    before = _load(conn, old)
+    after = _load(conn, new)
+
+    result = {
+        "from": old,
+        "to": new,
+        "new_hosts": sorted(after.keys() - before.keys(), key=scan_index.ip_sort_key),
+        "vanished_hosts": sorted(before.keys() - after.keys(), key=scan_index.ip_sort_key),
+        "opened": [],
+        "closed": [],
+        "changed": []
+    }
+
+    for ip in sorted(before.keys() & after.keys(), key=scan_index.ip_sort_key):
+        if before[ip][0] == after[ip][0]:
+            continue
+        opened, closed, changed = _port_changes(ip, before[ip][1], after[ip][1])
+        result["opened"] += opened
+        result["closed"] += closed
+        result["changed"] += changed
+
+    return result
+
+
+def _diff(conn, old, new):
+    # The cached diff between two recorded dates, computed on first use.
+    row = conn.execute("SELECT body FROM diffs WHERE old = ? AND new = ?", (old, new)).fetchone()
+    if row:
+        return json.loads(row[0])
+
+    result = _compute(conn, old, new)
+    with store.transaction(conn):
+        conn.execute("INSERT OR REPLACE INTO diffs VALUES (?, ?, ?)",
+                     (old, new, json.dumps(result, separators=(",", ":"))))
+    return result
+
+
+def diff(old, new):
+    with closing(_connect()) as conn:
+        record(conn, old)
+        record(conn, new)
+        return _diff(conn, old, new)
+
+
+def scan_dates():
+    try:
+        return sorted(scan_files.dates(SCAN_ROOT))
+    except OSError:
+        return []
+
+
+def update(date):
+    # Ingest hook: fingerprint a date and pre-compute its diffs against the
+    # neighbouring dates, so the History tab never waits on a comparison.
+    # Only neighbours already fingerprinted are compared: this runs inside
+    # the date's own build, which must not index other dates. A neighbour
+    # built later picks up the diff from its own update().
+    dates = scan_dates()
+    if date not in dates:
+        return
+    i = dates.index(date)
+    with closing(_connect()) as conn:
+        record(conn, date)
+        recorded = {row[0] for row in conn.execute("SELECT date FROM dates")}
+        if i > 0 and dates[i - 1] in recorded:
+            _diff(conn, dates[i - 1], date)
+        if i + 1 < len(dates) and dates[i + 1] in recorded:
+            _diff(conn, date, dates[i + 1])
@@ -0,0 +1,48 @@
+from .scan_data import host_data
+from .scan_index import SORT_KEYS, hosts_by_id
+
+MAX_LIMIT = 500
+
+
+def query_hosts(conn, offset=0, limit=50, sort="ip", descending=False,
+                port=None, state=None, service=None, os_name=None):
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key: {sort}")
+    rank = f"host_order.by_{sort}"
+    direction = "DESC" if descending else "ASC"
+
+    conditions = []
+    params = []
+    port_conditions = []
+    for column, value in (("portid", port), ("state", state), ("service", service)):
+        if value:
+            port_conditions.append(f"{column} = ?")
+            params.append(value)
+    if port_conditions:
+        conditions.append("host_order.host_id IN (SELECT host_id FROM ports WHERE "
+                          + " AND ".join(port_conditions) + ")")
+    if os_name:
+        conditions.append("hosts.os LIKE ? ESCAPE '\\'")
+        params.append("%" + os_name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+
+    if conditions:
+        where = " WHERE " + " AND ".join(conditions)
+        base = "FROM host_order JOIN hosts ON hosts.id = host_order.host_id" + where
+        total = conn.execute(f"SELECT COUNT(*) {base}", params).fetchone()[0]
+        ids = [host_id for (host_id,) in conn.execute(
+            f"SELECT host_order.host_id {base} ORDER BY {rank} {direction} LIMIT ? OFFSET ?",
+            params + [limit, offset])]
+    else:
+        # Unfiltered pages are a range over the precomputed rank.
+        total = conn.execute("SELECT COUNT(*) FROM host_order").fetchone()[0]
+        if descending:
+            bound, args = f"{rank} <= ?", [total - offset]
+        else:
+            bound, args = f"{rank} > ?", [offset]
+        ids = [host_id for (host_id,) in conn.execute(
+            f"SELECT host_id FROM host_order WHERE {bound} ORDER BY {rank} {direction} LIMIT ?",
+            args + [limit])]
+
+    records = hosts_by_id(conn, ids)
+    hosts = [dict(ip=records[i]["ip"], **host_data(records[i])) for i in ids]
+    return total, hosts
@@ -0,0 +1,177 @@
+import argparse
+import os
+import sys
+import time
+
+from . import history, manifest, metrics, scan_data, scan_files, scan_index, search
+from .config import INGEST_POLL, INGEST_SETTLE, SCAN_ROOT
+from .endpoints import get_endpoint
+from .web import Form, render
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+# Chart scripts rendered for every date as it is built, so their first
+# request is a render cache hit.
+PRERENDER = ("port-bubbles.py", "port-distribution-chart.py", "port-host-graph.py", "port-host-sankey.py")
+
+DATE_EVENTS = ("CREATE", "MODIFY", "CLOSE_WRITE", "MOVED_TO", "MOVED_FROM", "DELETE")
+ROOT_EVENTS = ("CREATE", "MOVED_TO")
+
+
+def warm(date):
+    # Builds the scan index, both get-scan-data caches, history diffs,
+    # rollups and the search index for a date, exactly as a rebuild request
+    # would, then brings the date manifest up to date and pre-renders the
+    # date's charts.
+    scan_data.rebuild(SCAN_ROOT / date, date)
+    manifest.refresh()
+    prerender(date)
+
+
+def prerender(date):
+    form = Form(f"date={date}")
+    for script in PRERENDER:
+        endpoint = get_endpoint(script)
+        try:
+            render(endpoint, form, endpoint.version(form))
+        except Exception:
+            metrics.count("exceptions")
+
+
+def _signature(date):
+    try:
+        return scan_index.stat_files(SCAN_ROOT / date)
+    except OSError:
+        return None
+
+
+class _Watcher:
+    # Which dates may have changed since the last call to changed(). With
+    # inotify that is whatever the kernel reported; polling falls back to
+    # directory (or archive) mtimes, plus the newest date, whose files are
+    # the ones still being appended to.
+    def __init__(self, use_inotify=True):
+        self.inotify = INotify() if use_inotify and INotify is not None else None
+        self._watches = {}
+        self._mtimes = {}
+        if self.inotify is not None:
+            self.inotify.add_watch(str(SCAN_ROOT), _mask(ROOT_EVENTS))
+
+    def watch(self, date):
+        if self.inotify is None:
+            try:
+                self._mtimes[date] = _mtime(date)
+            except OSError:
+                pass
+            return
+        if date not in self._watches.values():
+            try:
+                wd = self.inotify.add_watch(str(SCAN_ROOT / date), _mask(DATE_EVENTS))
+            except OSError:
+                return
+            self._watches[wd] = date
+
+    def changed(self, timeout):
+        if self.inotify is None:
+            time.sleep(timeout)
+            dates = history.scan_dates()
+            touched = set(dates[-1:])
+            for date in dates:
+                try:
+                    mtime = _mtime(date)
+                except OSError:
+                    continue
+                if self._mtimes.get(date) != mtime:
+                    self._mtimes[date] = mtime
+                    touched.add(date)
+            return touched
+
+        touched = set()
+        for event in self.inotify.read(timeout=int(timeout * 1000)):
+            date = self._watches.get(event.wd)
+            if date is None:
+                # A new date directory, or a date compact.py just archived.
+                date = scan_files.date_name(event.name)
+                if date is not None:
+                    self.watch(date)
+                    touched.add(date)
+            else:
+                touched.add(date)
+        return touched
+
+
+def _mtime(date):
+    path = scan_files.source(SCAN_ROOT / date)
+    if path is None:
+        raise FileNotFoundError(SCAN_ROOT / date)
+    return os.stat(path).st_mtime_ns
+
+
+def _mask(names):
+    mask = 0
+    for name in names:
+        mask |= getattr(flags, name)
+    return mask
+
+
+def run(settle=INGEST_SETTLE, poll=INGEST_POLL, once=False, use_inotify=True):
+    watcher = _Watcher(use_inotify)
+    # date -> (file signature, when it was last seen to change)
+    pending = {}
+    now = time.monotonic()
+    for date in history.scan_dates():
+        watcher.watch(date)
+        if not scan_data.is_current(SCAN_ROOT / date, date):
+            pending[date] = (_signature(date), now)
+        else:
+            # Built before search.db had it (or search.db was removed):
+            # searches only cover what has been indexed here.
+            try:
+                search.update(date)
+            except Exception as e:
+                print(f"ingest: {date} search index failed: {e}", file=sys.stderr)
+
+    while True:
+        now = time.monotonic()
+        for date, (signature, since) in sorted(pending.items()):
+            current = _signature(date)
+            if current is None:
+                del pending[date]
+            elif current != signature:
+                pending[date] = (current, now)
+            elif once or now - since >= settle:
+                del pending[date]
+                if scan_data.is_current(SCAN_ROOT / date, date):
+                    continue
+                started = time.monotonic()
+                try:
+                    warm(date)
+                except Exception as e:
+                    print(f"ingest: {date} failed: {e}", file=sys.stderr)
+                    continue
+                print(f"ingest: {date} built in {time.monotonic() - started:.1f}s", file=sys.stderr)
+
+        if once and not pending:
+            return
+
+        for date in watcher.changed(poll if not pending else min(poll, settle)):
+            if date not in pending and not scan_data.is_current(SCAN_ROOT / date, date):
+                pending[date] = (_signature(date), time.monotonic())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Watch the scan root and build every cache for a date once its files settle.")
+    parser.add_argument("--settle", type=float, default=INGEST_SETTLE,
+                        help="seconds a date's files must stay unchanged before it is built")
+    parser.add_argument("--poll", type=float, default=INGEST_POLL,
+                        help="polling interval when inotify is unavailable")
+    parser.add_argument("--no-inotify", action="store_true", help="always poll")
+    parser.add_argument("--once", action="store_true",
+                        help="build whatever is stale now, without waiting to settle, and exit")
+    args = parser.parse_args(argv)
+
+    run(args.settle, args.poll, args.once, not args.no_inotify)
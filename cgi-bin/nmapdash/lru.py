@@ -0,0 +1,56 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class IndexPool:
+    # Idle scan index connections for the long-running server, least
+    # recently used first, at most max_bytes of SQLite page cache between
+    # them (each pooled connection may cache cache_bytes). The page cache is
+    # what keeps a date's parsed index resident between requests. Nothing
+    # here decides freshness: open_index() refreshes every connection it
+    # checks out against the date's file signatures, and SQLite drops cached
+    # pages that another connection has since written.
+    def __init__(self, max_bytes, cache_bytes):
+        self.max_idle = max(1, max_bytes // cache_bytes)
+        self.cache_bytes = cache_bytes
+        self._idle = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _inode(path):
+        try:
+            return os.stat(path).st_ino
+        except OSError:
+            return None
+
+    def get(self, path):
+        # An idle connection to the index at path, or None. A connection to
+        # an index file that has since been deleted or replaced is dropped.
+        with self._lock:
+            for key in reversed(self._idle):
+                if key[0] == path:
+                    conn = self._idle.pop(key)
+                    break
+            else:
+                return None
+        if key[1] != self._inode(path):
+            conn.discard()
+            return None
+        return conn
+
+    def put(self, path, conn):
+        # Takes conn back once it is idle; -> False if it should be closed.
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        inode = self._inode(path)
+        if inode is None:
+            return False
+        with self._lock:
+            self._idle[(path, inode, id(conn))] = conn
+            evicted = []
+            while len(self._idle) > self.max_idle:
+                evicted.append(self._idle.popitem(last=False)[1])
+        for old in evicted:
+            old.discard()
+        return True
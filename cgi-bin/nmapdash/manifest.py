@@ -0,0 +1,89 @@
+import os
+from contextlib import closing
+
+from . import metrics, packed, scan_data, scan_files, scan_index, store
+from .config import CACHE_DIR, SCAN_ROOT
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE dates (
+    date TEXT PRIMARY KEY,
+    dir_mtime_ns INTEGER NOT NULL,
+    cache_mtime_ns INTEGER NOT NULL,
+    files INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    live_hosts INTEGER,
+    cache TEXT NOT NULL,
+    modified INTEGER NOT NULL
+);
+"""
+
+COLUMNS = ("date", "files", "bytes", "live_hosts", "cache", "modified")
+
+
+def manifest_path():
+    return CACHE_DIR / "manifest.db"
+
+
+def _connect():
+    return store.connect(manifest_path(), SCHEMA, SCHEMA_VERSION)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _describe(date, dir_mtime, cache_mtime):
+    scan_dir = SCAN_ROOT / date
+    files = scan_index.stat_files(scan_dir)
+    live_hosts = None
+    if cache_mtime:
+        try:
+            with packed.PackedScan(scan_data.packed_path(date)) as scan:
+                live_hosts = scan.header["summary"]["live_hosts"]
+        except Exception:
+            metrics.count("exceptions")
+    if not cache_mtime:
+        cache = "missing"
+    elif scan_data.is_current(scan_dir, date):
+        cache = "ready"
+    else:
+        cache = "stale"
+    modified = max([dir_mtime] + [sig[0] for sig in files.values()])
+    return (date, dir_mtime, cache_mtime, len(files), sum(sig[1] for sig in files.values()),
+            live_hosts, cache, modified // 10 ** 9)
+
+
+def refresh():
+    # One scandir of SCAN_ROOT; a date is re-described only when its
+    # directory (or archive) or its get-scan-data cache has moved since
+    # last time.
+    try:
+        entries = {date: e.stat().st_mtime_ns for date, e in scan_files.dates(SCAN_ROOT).items()}
+    except OSError:
+        entries = {}
+
+    with closing(_connect()) as conn:
+        known = {date: (dir_mtime, cache_mtime) for date, dir_mtime, cache_mtime in conn.execute(
+            "SELECT date, dir_mtime_ns, cache_mtime_ns FROM dates")}
+        rows = []
+        for date, dir_mtime in entries.items():
+            cache_mtime = _mtime(scan_data.packed_path(date))
+            if known.get(date) != (dir_mtime, cache_mtime):
+                try:
+                    rows.append(_describe(date, dir_mtime, cache_mtime))
+                except OSError:
+                    continue
+        gone = [(date,) for date in known if date not in entries]
+
+        if rows or gone:
+            with store.transaction(conn):
+                conn.executemany("DELETE FROM dates WHERE date = ?", gone)
+                conn.executemany("INSERT OR REPLACE INTO dates VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+        return [dict(zip(COLUMNS, row)) for row in conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM dates ORDER BY date DESC")]
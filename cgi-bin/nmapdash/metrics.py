@@ -0,0 +1,167 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from .config import METRICS_LOG
+
+# Per-request phase timings and counters. web.respond() begins a recorder
+# for the request on the current thread, code on the request path adds
+# phase() blocks and count()s, and web.encode() turns it into a
+# Server-Timing header and one line of METRICS_LOG.
+
+COUNTS = ("files_parsed", "files_skipped", "builds_joined", "exceptions")
+MAX_LOG_BYTES = 16 * 1024 * 1024
+
+_local = threading.local()
+
+
+class _Recorder:
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.phases = Counter()
+        self.counts = Counter()
+        # [name, started, seconds spent in nested phases]
+        self.stack = []
+
+
+def begin(route):
+    _local.recorder = _Recorder(route)
+
+
+def _current():
+    return getattr(_local, "recorder", None)
+
+
+@contextmanager
+def phase(name):
+    # Exclusive time: a phase nested in another is not counted twice.
+    recorder = _current()
+    if recorder is None:
+        yield
+        return
+    frame = [name, time.perf_counter(), 0.0]
+    recorder.stack.append(frame)
+    try:
+        yield
+    finally:
+        recorder.stack.pop()
+        elapsed = time.perf_counter() - frame[1]
+        recorder.phases[name] += elapsed - frame[2]
+        if recorder.stack:
+            recorder.stack[-1][2] += elapsed
+
+
+def count(name, n=1):
+    recorder = _current()
+    if recorder is not None:
+        recorder.counts[name] += n
+
+
+def finish(status, content_type):
+    # -> the Server-Timing header value, or None outside a request. Time
+    # not claimed by any phase is reported as "render" for SVG responses and
+    # "aggregate" for everything else.
+    recorder = _current()
+    if recorder is None:
+        return None
+    _local.recorder = None
+
+    total = time.perf_counter() - recorder.started
+    phases = dict(recorder.phases)
+    rest = total - sum(phases.values())
+    residual = "render" if content_type == "image/svg+xml" else "aggregate"
+    phases[residual] = phases.get(residual, 0.0) + max(rest, 0.0)
+    ms = {name: round(seconds * 1000, 2) for name, seconds in phases.items() if seconds > 0}
+    counts = {name: recorder.counts[name] for name in COUNTS}
+
+    _log({"ts": round(time.time(), 3), "route": recorder.route, "status": int(status.split()[0]),
+          "total_ms": round(total * 1000, 2), "phases": ms, "counts": counts})
+
+    parts = [f"{name};dur={value}" for name, value in ms.items()]
+    parts.append(f"total;dur={round(total * 1000, 2)}")
+    parts += [f'{name.replace("_", "-")};desc="{n}"' for name, n in counts.items()]
+    return ", ".join(parts)
+
+
+def _log(entry):
+    if not METRICS_LOG:
+        return
+    try:
+        METRICS_LOG.parent.mkdir(parents=True, exist_ok=True)
+        if METRICS_LOG.exists() and METRICS_LOG.stat().st_size > MAX_LOG_BYTES:
+            os.replace(METRICS_LOG, METRICS_LOG.with_name(METRICS_LOG.name + ".1"))
+        # One short O_APPEND write per line, so concurrent CGI processes
+        # never interleave.
+        fd = os.open(METRICS_LOG, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (json.dumps(entry, separators=(",", ":")) + "\n").encode())
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def _tail(limit):
+    # The last `limit` entries, reading backwards in blocks.
+    if not METRICS_LOG:
+        return []
+    try:
+        with open(METRICS_LOG, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            data = b""
+            while end > 0 and data.count(b"\n") <= limit:
+                start = max(0, end - 65536)
+                f.seek(start)
+                data = f.read(end - start) + data
+                end = start
+    except OSError:
+        return []
+    entries = []
+    for line in data.splitlines()[-limit:]:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
+
+
+def _percentile(values, p):
+    # Nearest rank.
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def summary(limit=10000, route=None):
+    # p50/p95 of total and per-phase time, and counter sums, per route.
+    routes = {}
+    for entry in _tail(limit):
+        if route and entry["route"] != route:
+            continue
+        routes.setdefault(entry["route"], []).append(entry)
+
+    result = {}
+    for name, entries in sorted(routes.items()):
+        totals = [e["total_ms"] for e in entries]
+        phases = {}
+        for e in entries:
+            for phase_name, ms in e["phases"].items():
+                phases.setdefault(phase_name, []).append(ms)
+        counts = Counter()
+        for e in entries:
+            counts.update(e["counts"])
+        result[name] = {
+            "requests": len(entries),
+            "p50_ms": _percentile(totals, 50),
+            "p95_ms": _percentile(totals, 95),
+            "max_ms": max(totals),
+            "phases": {phase_name: {"p50_ms": _percentile(values, 50), "p95_ms": _percentile(values, 95)}
+                       for phase_name, values in sorted(phases.items())},
+            "counts": dict(counts),
+        }
+    return result
@@ -0,0 +1,164 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from .scan_index import PORT_COLUMNS
+
+# Memory-mappable companion to scan-cache/<date>.json. Layout:
+#
+#   prelude   magic, counts and section offsets (PRELUDE)
+#   header    compact JSON: everything in get-scan-data except "hosts"
+#   records   per host: u32 word count, then u32 string ids
+#             (ip state hostname os mac vendor n_ports, then per port
+#             the PORT_COLUMNS in order)
+#   strings   u32 offsets (n_strings + 1) into a UTF-8 blob, then the blob
+#   index     u32 ip string id per host, then u64 record offset per host,
+#             both in hosts map order
+#   lookup    u32 host positions sorted by ip, for binary search
+#
+# Words are in native byte order; the magic records which one.
+MAGIC = b"NMPK1" + (b"L" if sys.byteorder == "little" else b"B") + b"\0\0"
+PRELUDE = struct.Struct("<8sIII4xQQQQ")
+NONE = 0xFFFFFFFF
+
+HOST_COLUMNS = ("ip", "state", "hostname", "os", "mac", "vendor")
+
+
+class Writer:
+    def __init__(self, path, header):
+        self._f = open(path, "wb")
+        self._header = json.dumps(header, separators=(",", ":")).encode()
+        self._f.write(b"\0" * PRELUDE.size)
+        self._f.write(self._header)
+        self._records = self._f.tell()
+        self._strings = {}
+        self._ips = array("I")
+        self._offsets = array("Q")
+
+    def _id(self, value):
+        if value is None:
+            return NONE
+        sid = self._strings.get(value)
+        if sid is None:
+            sid = self._strings[value] = len(self._strings)
+        return sid
+
+    def add(self, host):
+        words = array("I", (self._id(host[c]) for c in HOST_COLUMNS))
+        words.append(len(host["ports"]))
+        for port in host["ports"]:
+            words.extend(self._id(port[c]) for c in PORT_COLUMNS)
+        self._ips.append(words[0])
+        self._offsets.append(self._f.tell())
+        self._f.write(struct.pack("<I", len(words)))
+        self._f.write(words.tobytes())
+
+    def close(self):
+        f = self._f
+        strings = list(self._strings)
+        encoded = [s.encode() for s in strings]
+        starts = array("I", [0])
+        for blob in encoded:
+            starts.append(starts[-1] + len(blob))
+        strings_off = f.tell()
+        f.write(starts.tobytes())
+        f.write(b"".join(encoded))
+
+        index_off = f.tell()
+        f.write(self._ips.tobytes())
+        f.write(self._offsets.tobytes())
+
+        lookup_off = f.tell()
+        lookup = sorted(range(len(self._ips)), key=lambda i: encoded[self._ips[i]])
+        f.write(array("I", lookup).tobytes())
+
+        f.seek(0)
+        f.write(PRELUDE.pack(MAGIC, len(self._header), len(self._ips), len(strings),
+                             self._records, strings_off, index_off, lookup_off))
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+
+    def abort(self):
+        self._f.close()
+
+
+class PackedScan:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, header_len, self._count, n_strings, records_off, strings_off,
+             index_off, lookup_off) = PRELUDE.unpack_from(self._mm, 0)
+            if magic != MAGIC:
+                raise ValueError(f"Not a packed scan cache: {path}")
+        except Exception:
+            self._mm.close()
+            raise
+        self._header = (PRELUDE.size, header_len)
+        view = memoryview(self._mm)
+        self._starts = view[strings_off:strings_off + 4 * (n_strings + 1)].cast("I")
+        self._blob = strings_off + 4 * (n_strings + 1)
+        self._ips = view[index_off:index_off + 4 * self._count].cast("I")
+        offsets = index_off + 4 * self._count
+        self._offsets = view[offsets:offsets + 8 * self._count].cast("Q")
+        self._lookup = view[lookup_off:lookup_off + 4 * self._count].cast("I")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        for view in (self._starts, self._ips, self._offsets, self._lookup):
+            view.release()
+        self._mm.close()
+
+    @property
+    def header(self):
+        start, length = self._header
+        return json.loads(self._mm[start:start + length])
+
+    def _bytes(self, sid):
+        return self._mm[self._blob + self._starts[sid]:self._blob + self._starts[sid + 1]]
+
+    def _string(self, sid):
+        return None if sid == NONE else self._bytes(sid).decode()
+
+    def _record(self, position):
+        offset = self._offsets[position]
+        (count,) = struct.unpack_from("<I", self._mm, offset)
+        words = array("I", self._mm[offset + 4:offset + 4 + 4 * count])
+        strings = [self._string(sid) for sid in words[:len(HOST_COLUMNS)]]
+        host = dict(zip(HOST_COLUMNS, strings))
+        n = len(HOST_COLUMNS) + 1
+        width = len(PORT_COLUMNS)
+        host["ports"] = [dict(zip(PORT_COLUMNS, (self._string(sid) for sid in words[i:i + width])))
+                         for i in range(n, n + words[n - 1] * width, width)]
+        return host
+
+    def host(self, ip):
+        # Binary search over the ip-sorted lookup; only the probed strings
+        # and the one record are paged in.
+        target = ip.encode()
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            if self._bytes(self._ips[self._lookup[mid]]) < target:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self._count and self._bytes(self._ips[self._lookup[low]]) == target:
+            return self._record(self._lookup[low])
+        return None
+
+    def __iter__(self):
+        for position in range(self._count):
+            yield self._record(position)
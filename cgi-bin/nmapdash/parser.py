@@ -0,0 +1,110 @@
+import xml.etree.ElementTree as ET
+
+
+def _attr(elem, name, default=""):
+    return elem.attrib.get(name, default) if elem is not None else default
+
+
+def _elems(table):
+    if table is None:
+        return {}
+    return {e.attrib.get("key"): (e.text or "").strip() for e in table.findall("elem")}
+
+
+def _dn(fields):
+    # nmap's own rendering: commonName=x/organizationName=y
+    return "/".join(f"{key}={value}" for key, value in fields.items() if value)
+
+
+def parse_cert(script_elem):
+    # The structured children of an ssl-cert <script>; None when it has no
+    # fingerprint to identify the certificate by.
+    top = _elems(script_elem)
+    fingerprint = top.get("sha256") or top.get("sha1") or top.get("md5")
+    if not fingerprint:
+        return None
+    subject = _elems(script_elem.find('table[@key="subject"]'))
+    issuer = _elems(script_elem.find('table[@key="issuer"]'))
+    pubkey = _elems(script_elem.find('table[@key="pubkey"]'))
+    validity = _elems(script_elem.find('table[@key="validity"]'))
+    try:
+        bits = int(pubkey.get("bits", ""))
+    except ValueError:
+        bits = None
+    return {
+        "fingerprint": fingerprint.replace(":", "").replace(" ", "").lower(),
+        "subject": _dn(subject),
+        "issuer": _dn(issuer),
+        "issuer_name": issuer.get("organizationName") or issuer.get("commonName") or "",
+        "not_before": validity.get("notBefore", ""),
+        "not_after": validity.get("notAfter", ""),
+        "key_type": pubkey.get("type", ""),
+        "key_bits": bits,
+    }
+
+
+def parse_host(host_elem):
+    status = host_elem.find("status")
+    state = _attr(status, "state")
+
+    ipv4 = host_elem.find('address[@addrtype="ipv4"]')
+    address = ipv4 if ipv4 is not None else host_elem.find("address")
+    ip = _attr(address, "addr", None)
+
+    mac_elem = host_elem.find('address[@addrtype="mac"]')
+    hostname_elem = host_elem.find("hostnames/hostname")
+    os_elem = host_elem.find("os/osmatch")
+
+    ports = []
+    for port_elem in host_elem.findall(".//port"):
+        portid = port_elem.attrib.get("portid")
+        if not portid:
+            continue
+
+        state_elem = port_elem.find("state")
+        service_elem = port_elem.find("service")
+        tls = None
+        cert = None
+        script_output = ""
+        for script in port_elem.findall("script"):
+            if script.attrib.get("id") == "ssl-cert":
+                cert = parse_cert(script)
+            if "tls" in script.attrib.get("id", ""):
+                tls = script.attrib.get("output")
+                script_output += script.attrib.get("output", "")
+
+        ports.append({
+            "portid": portid,
+            "protocol": _attr(port_elem, "protocol"),
+            "state": _attr(state_elem, "state"),
+            "reason": _attr(state_elem, "reason"),
+            "service": _attr(service_elem, "name"),
+            "product": _attr(service_elem, "product"),
+            "version": _attr(service_elem, "version"),
+            "tls_cert": tls,
+            "script_output": script_output,
+            "cert": cert,
+        })
+
+    return {
+        "ip": ip,
+        "state": state,
+        "hostname": _attr(hostname_elem, "name"),
+        "os": _attr(os_elem, "name", "Unknown"),
+        "mac": _attr(mac_elem, "addr"),
+        "vendor": _attr(mac_elem, "vendor"),
+        "ports": ports,
+    }
+
+
+def iter_hosts(source):
+    # Streams one record per <host>, so a single nmap -oX file covering a
+    # whole sweep parses in constant memory. Each finished <host> is cleared
+    # together with everything the root has accumulated so far. Raises on
+    # malformed XML after yielding every host that came before the error.
+    context = iter(ET.iterparse(source, events=("start", "end")))
+    _, root = next(context)
+    for event, elem in context:
+        if event == "end" and elem.tag == "host":
+            yield parse_host(elem)
+            root.clear()
@@ -0,0 +1,49 @@
+from contextlib import closing
+
+from . import store
+from .config import CACHE_DIR
+
+# Finished chart bodies, keyed by (script, date, query) and stamped with
+# the version of the inputs they were rendered from (see web.render). A
+# row whose version no longer matches is a miss; storing a new version of
+# a date drops that date's older renders.
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE renders (
+    script TEXT NOT NULL,
+    date TEXT NOT NULL,
+    params TEXT NOT NULL,
+    version TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    body BLOB NOT NULL,
+    PRIMARY KEY (script, date, params)
+) WITHOUT ROWID;
+"""
+
+
+def renders_path():
+    return CACHE_DIR / "renders.db"
+
+
+def _connect():
+    return store.connect(renders_path(), SCHEMA, SCHEMA_VERSION)
+
+
+def get(script, date, params, version):
+    # -> (content_type, body), or None.
+    try:
+        with closing(_connect()) as conn:
+            return conn.execute(
+                "SELECT content_type, body FROM renders WHERE script = ? AND date = ? AND params = ? AND version = ?",
+                (script, date, params, version)).fetchone()
+    except Exception:
+        return None
+
+
+def put(script, date, params, version, content_type, body):
+    with closing(_connect()) as conn, store.transaction(conn):
+        conn.execute("DELETE FROM renders WHERE script = ? AND date = ? AND version != ?", (script, date, version))
+        conn.execute("INSERT OR REPLACE INTO renders VALUES (?, ?, ?, ?, ?, ?)",
+                     (script, date, params, version, content_type, body))
@@ -0,0 +1,99 @@
+from contextlib import closing
+
+from . import store
+from .config import CACHE_DIR
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE dates (
+    date TEXT PRIMARY KEY,
+    total_hosts INTEGER NOT NULL,
+    live_hosts INTEGER NOT NULL,
+    total_ports INTEGER NOT NULL,
+    unique_ports INTEGER NOT NULL,
+    tls_valid INTEGER NOT NULL,
+    tls_expired INTEGER NOT NULL,
+    tls_self_signed INTEGER NOT NULL
+);
+CREATE TABLE port_counts (
+    port TEXT NOT NULL,
+    date TEXT NOT NULL,
+    hosts INTEGER NOT NULL,
+    open_hosts INTEGER NOT NULL,
+    PRIMARY KEY (port, date)
+) WITHOUT ROWID;
+CREATE TABLE os_counts (
+    os TEXT NOT NULL,
+    date TEXT NOT NULL,
+    hosts INTEGER NOT NULL,
+    PRIMARY KEY (os, date)
+) WITHOUT ROWID;
+"""
+
+METRICS = ("live_hosts", "port", "os")
+
+
+def rollups_path():
+    return CACHE_DIR / "rollups.db"
+
+
+def _connect():
+    return store.connect(rollups_path(), SCHEMA, SCHEMA_VERSION)
+
+
+def record(output, port_counter, open_counter):
+    # Stores one date's aggregates, as built by scan_data.build() (output is
+    # everything but the hosts map). Replaces whatever an earlier build of
+    # the same date left behind.
+    date = output["scan_date"]
+    summary = output["summary"]
+    tls = output["tls_info"]
+
+    with closing(_connect()) as conn, store.transaction(conn):
+        conn.execute("DELETE FROM port_counts WHERE date = ?", (date,))
+        conn.execute("DELETE FROM os_counts WHERE date = ?", (date,))
+        conn.execute("INSERT OR REPLACE INTO dates VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                     (date, summary["total_hosts"], summary["live_hosts"], summary["total_ports"],
+                      summary["unique_ports"], tls["valid"], tls["expired"], tls["self_signed"]))
+        conn.executemany("INSERT INTO port_counts VALUES (?, ?, ?, ?)",
+                         [(port, date, n, open_counter.get(port, 0)) for port, n in port_counter.items()])
+        conn.executemany("INSERT INTO os_counts VALUES (?, ?, ?)",
+                         [(os_name, date, n) for os_name, n in output["os_distribution"].items()])
+
+
+def series(dates, metric, key=None):
+    # One point per requested date; dates that have not been rolled up yet
+    # come back as None rather than being computed here.
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric}")
+    if not dates:
+        return []
+    first, last = min(dates), max(dates)
+
+    with closing(_connect()) as conn:
+        live = {date: (total, live_hosts) for date, total, live_hosts in conn.execute(
+            "SELECT date, total_hosts, live_hosts FROM dates WHERE date BETWEEN ? AND ?", (first, last))}
+
+        if metric == "live_hosts":
+            return [{"date": d, "live_hosts": live[d][1], "total_hosts": live[d][0]} if d in live
+                    else {"date": d, "live_hosts": None, "total_hosts": None} for d in dates]
+
+        if metric == "port":
+            rows = {date: (hosts, open_hosts) for date, hosts, open_hosts in conn.execute(
+                "SELECT date, hosts, open_hosts FROM port_counts WHERE port = ? AND date BETWEEN ? AND ?",
+                (key, first, last))}
+            return [{"date": d, "hosts": rows.get(d, (0, 0))[0], "open_hosts": rows.get(d, (0, 0))[1]}
+                    if d in live else {"date": d, "hosts": None, "open_hosts": None} for d in dates]
+
+        rows = {date: hosts for date, hosts in conn.execute(
+            "SELECT date, hosts FROM os_counts WHERE os = ? AND date BETWEEN ? AND ?", (key, first, last))}
+        points = []
+        for d in dates:
+            if d not in live:
+                points.append({"date": d, "hosts": None, "share": None})
+                continue
+            hosts = rows.get(d, 0)
+            points.append({"date": d, "hosts": hosts,
+                           "share": round(hosts / live[d][1], 4) if live[d][1] else 0.0})
+        return points
@@ -0,0 +1,301 @@
+import fcntl
+import json
+import os
+import time
+from collections import Counter
+
+from . import history, metrics, packed, rollups, scan_index, search, tls
+from .config import BUILD_WAIT, CACHE_DIR
+
+CHUNK_SIZE = 64 * 1024
+
+# How often a request waiting on another build retries the lock (seconds).
+LOCK_POLL = 0.05
+
+
+def cache_path(date):
+    return CACHE_DIR / f"{date}.json"
+
+
+def packed_path(date):
+    # Binary twin of cache_path(date); see packed.py.
+    return CACHE_DIR / f"{date}.pack"
+
+
+def state_path(date):
+    # Per-file signatures and counter contributions behind cache_path(date).
+    return CACHE_DIR / f"{date}.files.json"
+
+
+def lock_path(date):
+    # flock()ed while a build writes the caches; see _lock().
+    return CACHE_DIR / f"{date}.lock"
+
+
+def host_data(host):
+    ports = {}
+    for p in host["ports"]:
+        ports[p["portid"]] = {
+            "protocol": p["protocol"],
+            "state": p["state"],
+            "reason": p["reason"],
+            "service": p["service"],
+            "product": p["product"],
+            "version": p["version"],
+            "tls_cert": p["tls_cert"],
+            "script_output": p["script_output"]
+        }
+
+    return {
+        "hostname": host["hostname"],
+        "os": host["os"],
+        "mac": host["mac"],
+        "vendor": host["vendor"],
+        "ports": ports,
+        "open_ports": sum(1 for p in ports.values() if p["state"] == "open"),
+        "closed_ports": sum(1 for p in ports.values() if p["state"] == "closed"),
+        "filtered_ports": sum(1 for p in ports.values() if p["state"] == "filtered"),
+        "state": host["state"]
+    }
+
+
+def _live(hosts):
+    for host in hosts or ():
+        if host["state"] == "up" and host["ip"]:
+            yield host["ip"], host_data(host)
+
+
+def _contribution(ip, data):
+    return [ip, data["os"], list(data["ports"])]
+
+
+def _load_state(date):
+    # name -> {"sig", counters} as of the last build, or None when there has
+    # been no build under this schema. A build of an empty date leaves {}.
+    try:
+        with open(state_path(date)) as f:
+            state = json.load(f)
+        if state["version"] != scan_index.SCHEMA_VERSION:
+            return None
+        return state["files"]
+    except Exception:
+        return None
+
+
+def _write_json(path, data):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _lock(date):
+    # -> (open lock file, whether another build held it first). One build
+    # per date at a time, across processes and server threads alike (flock
+    # locks belong to the open file, not the process); closing the file
+    # releases it, as does the builder dying. A build that is still going
+    # after BUILD_WAIT seconds leaves a waiter with previous caches to serve
+    # them instead: (None, True).
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    f = open(lock_path(date), "a")
+    try:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return f, False
+        except BlockingIOError:
+            pass
+        deadline = time.monotonic() + BUILD_WAIT
+        with metrics.phase("wait"):
+            while True:
+                time.sleep(LOCK_POLL)
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return f, True
+                except BlockingIOError:
+                    pass
+                if time.monotonic() >= deadline and cache_path(date).exists() and packed_path(date).exists():
+                    f.close()
+                    return None, True
+    except BaseException:
+        f.close()
+        raise
+
+
+def read_cache(date):
+    with open(cache_path(date), "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def is_current(scan_dir, date):
+    # True when both caches exist and were built from the files now on disk.
+    files = _load_state(date)
+    if files is None or not cache_path(date).exists() or not packed_path(date).exists():
+        return False
+    current = scan_index.stat_files(scan_dir)
+    return current.keys() == files.keys() and all(
+        files[name]["sig"] == list(sig) for name, sig in current.items())
+
+
+def open_packed(scan_dir, date, force=False):
+    # The packed cache for a date, building both caches first if needed.
+    if force or not packed_path(date).exists():
+        rebuild(scan_dir, date)
+    return packed.PackedScan(packed_path(date))
+
+
+def build(scan_dir, date):
+    # Returns the get-scan-data body as a stream of byte chunks: summary and
+    # distributions first, then one host at a time. The caches are rebuilt
+    # in full first and the client is served the finished file, so a slow
+    # client never holds up the build lock.
+    rebuild(scan_dir, date)
+    return read_cache(date)
+
+
+def rebuild(scan_dir, date):
+    # Brings both caches up to date with the scan files. Only files whose
+    # (mtime, size, inode) moved since the last build have their counter
+    # contributions recomputed; the hosts map streams straight off the index.
+    # Single flight: a request that finds the date already being built waits
+    # for that build and, if it left the caches current, uses them instead
+    # of building them all over again.
+    lock, waited = _lock(date)
+    if lock is None:
+        metrics.count("builds_joined")
+        return
+    try:
+        if waited and is_current(scan_dir, date):
+            metrics.count("builds_joined")
+            return
+        _prepare(scan_dir, date)
+    finally:
+        lock.close()
+
+
+def _prepare(scan_dir, date):
+    files = _load_state(date) or {}
+
+    conn = scan_index.open_index(scan_dir)
+    try:
+        # One read snapshot so signatures, counters and records always agree.
+        conn.execute("BEGIN")
+        signatures = scan_index.file_signatures(conn)
+        churned = {name for name in files if name not in signatures}
+        churned.update(name for name, sig in signatures.items()
+                       if name not in files or files[name]["sig"] != list(sig))
+
+        for name in churned:
+            files.pop(name, None)
+        for name, records in scan_index.file_hosts(conn, None if not files else churned & signatures.keys()):
+            files[name] = {"sig": list(signatures[name]),
+                           "total": len(records),
+                           "hosts": [_contribution(ip, data) for ip, data in _live(records)]}
+        for name, sig in signatures.items():
+            # Empty or unreadable files hold no hosts but still count as seen.
+            if name not in files:
+                files[name] = {"sig": list(sig), "total": 0, "hosts": []}
+
+        # Counters are re-summed from the per-file contributions so ties in
+        # most_common() fall out exactly as they would in a full rebuild.
+        port_counter = Counter()
+        os_counter = Counter()
+        live_hosts = 0
+        for name in sorted(files):
+            for ip, os_name, ports in files[name]["hosts"]:
+                live_hosts += 1
+                os_counter[os_name] += 1
+                port_counter.update(ports)
+        open_counter = scan_index.open_port_counts(conn)
+        tls_info = tls.tls_info(conn, date)
+    except Exception:
+        conn.close()
+        raise
+
+    head = {
+        "scan_date": date,
+        "summary": {
+            "total_hosts": sum(f["total"] for f in files.values()),
+            "live_hosts": live_hosts,
+            "total_ports": sum(port_counter.values()),
+            "unique_ports": len(port_counter)
+        },
+        "os_distribution": dict(os_counter.most_common()),
+        "port_distribution": dict(port_counter.most_common(10)),
+        "tls_info": tls_info
+    }
+
+    # History, rollups and search are derived data; never fail the scan build over them.
+    with metrics.phase("history"):
+        try:
+            history.update(date)
+        except Exception:
+            metrics.count("exceptions")
+    with metrics.phase("rollups"):
+        try:
+            rollups.record(head, port_counter, open_counter)
+        except Exception:
+            metrics.count("exceptions")
+    with metrics.phase("search"):
+        try:
+            search.update(date)
+        except Exception:
+            metrics.count("exceptions")
+
+    _write(conn, date, head, files)
+
+
+def _write(conn, date, head, files):
+    # Writes the cache to a temp file that replaces it only once the last
+    # host is written (and synced); a build that fails midway leaves the
+    # previous cache alone. The packed cache is written alongside from the
+    # same records.
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = cache_path(date)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    pack = packed_path(date)
+    pack_tmp = pack.with_name(f"{pack.name}.{os.getpid()}.tmp")
+    writer = None
+    done = False
+    try:
+        writer = packed.Writer(pack_tmp, head)
+        with open(tmp, "wb") as cache:
+            parts = [json.dumps(head, separators=(",", ":"))[:-1], ',"hosts":{']
+            size = 0
+            first = True
+            for host in scan_index.live_hosts(conn):
+                writer.add(host)
+                part = ("" if first else ",") + json.dumps(host["ip"]) + ":" + \
+                    json.dumps(host_data(host), separators=(",", ":"))
+                first = False
+                parts.append(part)
+                size += len(part)
+                if size >= CHUNK_SIZE:
+                    cache.write("".join(parts).encode())
+                    parts, size = [], 0
+            parts.append("}}")
+            cache.write("".join(parts).encode())
+            cache.flush()
+            os.fsync(cache.fileno())
+        conn.execute("COMMIT")
+        writer.close()
+        writer = None
+        os.replace(tmp, path)
+        os.replace(pack_tmp, pack)
+        _write_json(state_path(date), {"version": scan_index.SCHEMA_VERSION, "files": files})
+        done = True
+    finally:
+        conn.close()
+        if writer is not None:
+            writer.abort()
+        if not done:
+            for leftover in (tmp, pack_tmp):
+                try:
+                    os.unlink(leftover)
+                except OSError:
+                    pass
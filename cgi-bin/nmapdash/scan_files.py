@@ -0,0 +1,142 @@
+import gzip
+import os
+import tarfile
+from pathlib import Path
+
+from .parser import iter_hosts as parse_hosts
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Where a date's scan files live. Normally SCAN_ROOT/<date>/ holds nmap -oX
+# output as *.xml, *.xml.gz or *.xml.zst; a date compacted by compact.py is
+# instead one SCAN_ROOT/<date>.tar[.gz|.zst] whose members are those same
+# files. Everything is decompressed as a stream while it is parsed, never
+# extracted. An archive counts as a single scan file (name, signature and
+# hosts.file are the archive's): archived dates do not change, so one stat
+# keeps them current.
+
+SUFFIXES = (".xml", ".xml.gz", ".xml.zst")
+ARCHIVES = (".tar", ".tar.gz", ".tar.zst")
+
+READ_SIZE = 1024 * 1024
+
+
+def archive_path(scan_dir):
+    for suffix in ARCHIVES:
+        path = Path(f"{scan_dir}{suffix}")
+        if path.is_file():
+            return path
+    return None
+
+
+def source(scan_dir):
+    # The directory holding a date's files or, failing that, its archive;
+    # None when the date does not exist.
+    if os.path.isdir(scan_dir):
+        return Path(scan_dir)
+    return archive_path(scan_dir)
+
+
+def exists(scan_dir):
+    return source(scan_dir) is not None
+
+
+def date_name(name):
+    # SCAN_ROOT entry name -> date, or None for anything else.
+    for suffix in ARCHIVES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    return name if name.isdigit() else None
+
+
+def dates(root):
+    # date -> os.DirEntry of its directory, or of its archive when there is
+    # no directory (compact.py swaps the one for the other).
+    found = {}
+    for entry in os.scandir(root):
+        date = date_name(entry.name)
+        if date is None:
+            continue
+        if entry.name == date and entry.is_dir():
+            found[date] = entry
+        elif entry.name != date and date not in found and entry.is_file():
+            found[date] = entry
+    return found
+
+
+def list_files(scan_dir):
+    # (name, os.stat_result) per scan file of a date.
+    if os.path.isdir(scan_dir):
+        for entry in os.scandir(scan_dir):
+            if entry.name.endswith(SUFFIXES) and entry.is_file():
+                yield entry.name, entry.stat()
+        return
+    archive = archive_path(scan_dir)
+    if archive is None:
+        raise FileNotFoundError(f"No scan directory or archive for {scan_dir}")
+    yield archive.name, archive.stat()
+
+
+def file_path(scan_dir, name):
+    if name.endswith(ARCHIVES):
+        return os.path.join(os.path.dirname(os.fspath(scan_dir)), name)
+    return os.path.join(scan_dir, name)
+
+
+def _decompress(f, name):
+    if name.endswith(".gz"):
+        return gzip.GzipFile(fileobj=f, mode="rb")
+    if name.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{name}: reading .zst files needs the zstandard module")
+        return zstandard.ZstdDecompressor().stream_reader(f, read_size=READ_SIZE)
+    return f
+
+
+def open_file(path, name=None):
+    # A binary stream of the uncompressed bytes of a scan file or archive,
+    # decompressed according to name (default: the path's own).
+    name = name or os.fspath(path)
+    if name.endswith(".gz"):
+        # GzipFile does not close a file object it was handed.
+        return gzip.open(path, "rb")
+    f = open(path, "rb")
+    try:
+        return _decompress(f, name)
+    except Exception:
+        f.close()
+        raise
+
+
+def _archive_hosts(path):
+    # Members in archive order (compact.py writes them in name order, the
+    # order a directory is read in), each parsed straight off the tar
+    # stream. A malformed member keeps the hosts read before its error and
+    # the rest of the archive is still read; the error is raised at the end
+    # so the archive is flagged like any other malformed file.
+    error = None
+    with open_file(path) as f, tarfile.open(fileobj=f, mode="r|") as tar:
+        for member in tar:
+            if not member.isfile() or not member.name.endswith(SUFFIXES):
+                continue
+            try:
+                with _decompress(tar.extractfile(member), member.name) as data:
+                    yield from parse_hosts(data)
+            except Exception as e:
+                error = error or e
+    if error is not None:
+        raise error
+
+
+def iter_hosts(path):
+    # parser.iter_hosts() for any scan file: plain, compressed or an archive.
+    path = os.fspath(path)
+    if path.endswith(ARCHIVES):
+        yield from _archive_hosts(path)
+        return
+    with open_file(path) as f:
+        yield from parse_hosts(f)
@@ -0,0 +1,566 @@
+import ipaddress
+import sqlite3
+import uuid
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .config import CACHE_DIR, INGEST_CHUNK, INGEST_PARALLEL_MIN, INGEST_WORKERS
+from . import adjacency, metrics, scan_files, store, subnets, tls
+
+# Bump whenever the schema or the parser output changes; stale indexes are
+# dropped and rebuilt on next open.
+SCHEMA_VERSION = 10
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE files (
+    name TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    ok INTEGER NOT NULL
+);
+CREATE TABLE hosts (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    ip TEXT,
+    ip_key BLOB,
+    state TEXT NOT NULL,
+    hostname TEXT NOT NULL,
+    os TEXT NOT NULL,
+    mac TEXT NOT NULL,
+    vendor TEXT NOT NULL
+);
+CREATE INDEX hosts_file ON hosts(file);
+CREATE TABLE ports (
+    host_id INTEGER NOT NULL,
+    portid TEXT NOT NULL,
+    protocol TEXT NOT NULL,
+    state TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    service TEXT NOT NULL,
+    product TEXT NOT NULL,
+    version TEXT NOT NULL,
+    tls_cert TEXT,
+    script_output TEXT NOT NULL
+);
+CREATE INDEX ports_host ON ports(host_id);
+CREATE INDEX ports_portid ON ports(portid);
+CREATE TABLE port_certs (
+    host_id INTEGER NOT NULL,
+    portid TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    issuer TEXT NOT NULL,
+    issuer_name TEXT NOT NULL,
+    not_before TEXT NOT NULL,
+    not_after TEXT NOT NULL,
+    key_type TEXT NOT NULL,
+    key_bits INTEGER
+);
+CREATE INDEX port_certs_host ON port_certs(host_id);
+CREATE TABLE host_order (
+    host_id INTEGER PRIMARY KEY,
+    open_ports INTEGER NOT NULL,
+    by_ip INTEGER NOT NULL,
+    by_open_ports INTEGER NOT NULL,
+    by_os INTEGER NOT NULL,
+    by_hostname INTEGER NOT NULL,
+    by_file INTEGER NOT NULL,
+    first_id INTEGER NOT NULL
+);
+CREATE INDEX host_order_ip ON host_order(by_ip);
+CREATE INDEX host_order_open_ports ON host_order(by_open_ports);
+CREATE INDEX host_order_os ON host_order(by_os);
+CREATE INDEX host_order_hostname ON host_order(by_hostname);
+CREATE INDEX host_order_file ON host_order(by_file);
+CREATE TABLE port_bitmaps (
+    portid TEXT PRIMARY KEY,
+    hosts INTEGER NOT NULL,
+    open_hosts INTEGER NOT NULL,
+    first_link INTEGER NOT NULL,
+    any_bits BLOB NOT NULL,
+    open_bits BLOB NOT NULL
+);
+CREATE TABLE bitmap_hosts (
+    bit INTEGER PRIMARY KEY,
+    ip TEXT NOT NULL,
+    ports INTEGER NOT NULL,
+    open_ports INTEGER NOT NULL,
+    first_link INTEGER
+);
+CREATE TABLE certs (
+    fingerprint TEXT PRIMARY KEY,
+    subject TEXT NOT NULL,
+    issuer TEXT NOT NULL,
+    issuer_name TEXT NOT NULL,
+    not_before TEXT NOT NULL,
+    not_after TEXT NOT NULL,
+    key_type TEXT NOT NULL,
+    key_bits INTEGER,
+    self_signed INTEGER NOT NULL,
+    expiry TEXT NOT NULL,
+    days_left INTEGER,
+    hosts INTEGER NOT NULL,
+    endpoints INTEGER NOT NULL
+);
+CREATE INDEX certs_not_after ON certs(not_after);
+CREATE TABLE cert_expiry (
+    bucket TEXT PRIMARY KEY,
+    certs INTEGER NOT NULL,
+    endpoints INTEGER NOT NULL
+);
+CREATE TABLE cert_issuers (
+    issuer_name TEXT PRIMARY KEY,
+    certs INTEGER NOT NULL,
+    endpoints INTEGER NOT NULL,
+    self_signed INTEGER NOT NULL
+);
+CREATE TABLE subnet_addrs (
+    family INTEGER PRIMARY KEY,
+    addrs BLOB NOT NULL,
+    cum BLOB NOT NULL
+);
+CREATE TABLE subnet_counts (
+    family INTEGER NOT NULL,
+    prefix INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    network TEXT NOT NULL,
+    hosts INTEGER NOT NULL,
+    open_ports INTEGER NOT NULL,
+    PRIMARY KEY (family, prefix, position)
+);
+"""
+
+SORT_KEYS = ("ip", "open_ports", "os", "hostname")
+
+# refresh() updates host_order incrementally while the IPs it touched are
+# at most 1/INCREMENTAL_SHARE of the live ones.
+INCREMENTAL_SHARE = 4
+
+
+def index_path(scan_dir):
+    return CACHE_DIR / f"{Path(scan_dir).name}.db"
+
+
+def _connect(path):
+    return store.connect(path, SCHEMA, SCHEMA_VERSION)
+
+
+# Set by server.py (see lru.IndexPool); CGI processes open a fresh
+# connection per request.
+_pool = None
+
+
+def use_pool(pool):
+    global _pool
+    _pool = pool
+
+
+class _PooledConnection(sqlite3.Connection):
+    # close() hands the connection back to the pool, so the usual
+    # closing(open_index(...)) blocks need not know about it. Pooled
+    # connections move between server threads, one request at a time.
+    def close(self):
+        if not _pool.put(self.path, self):
+            self.discard()
+
+    def discard(self):
+        super().close()
+
+
+def stat_files(scan_dir):
+    # name -> (mtime, size, inode) per scan file; see scan_files.py.
+    files = {}
+    with metrics.phase("list"):
+        for name, st in scan_files.list_files(scan_dir):
+            files[name] = (st.st_mtime_ns, st.st_size, st.st_ino)
+    return files
+
+
+def _diff(conn, current):
+    known = file_signatures(conn)
+    removed = sorted(name for name in known if name not in current)
+    changed = sorted(name for name, sig in current.items() if known.get(name) != sig)
+    return removed, changed
+
+
+def _drop_file(conn, name):
+    conn.execute("DELETE FROM ports WHERE host_id IN (SELECT id FROM hosts WHERE file = ?)", (name,))
+    conn.execute("DELETE FROM port_certs WHERE host_id IN (SELECT id FROM hosts WHERE file = ?)", (name,))
+    conn.execute("DELETE FROM hosts WHERE file = ?", (name,))
+    conn.execute("DELETE FROM files WHERE name = ?", (name,))
+
+
+def ip_sort_key(ip):
+    # IPv4 sorts before IPv6, both numerically; anything unparsable sorts last.
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return b"\xff" + str(ip).encode()
+    return bytes([addr.version]) + addr.packed
+
+
+def _insert_host(conn, name, host):
+    cur = conn.execute(
+        "INSERT INTO hosts (file, ip, ip_key, state, hostname, os, mac, vendor) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (name, host["ip"], ip_sort_key(host["ip"]), host["state"], host["hostname"], host["os"],
+         host["mac"], host["vendor"]))
+    conn.executemany(
+        "INSERT INTO ports VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(cur.lastrowid, p["portid"], p["protocol"], p["state"], p["reason"], p["service"],
+          p["product"], p["version"], p["tls_cert"], p["script_output"]) for p in host["ports"]])
+    conn.executemany(
+        "INSERT INTO port_certs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(cur.lastrowid, p["portid"], *(p["cert"][c] for c in tls.CERT_FIELDS))
+         for p in host["ports"] if p["cert"]])
+
+
+def _ingest_file(conn, scan_dir, name, sig):
+    # Hosts are inserted as they stream out of the parser; a truncated or
+    # malformed file keeps the hosts read before the error and is flagged.
+    ok = 1
+    try:
+        for host in scan_files.iter_hosts(scan_files.file_path(scan_dir, name)):
+            _insert_host(conn, name, host)
+    except Exception:
+        ok = 0
+        metrics.count("files_skipped")
+        metrics.count("exceptions")
+    conn.execute("INSERT INTO files VALUES (?, ?, ?, ?, ?)", (name, *sig, ok))
+
+
+def _read_file(path):
+    hosts = []
+    try:
+        for host in scan_files.iter_hosts(path):
+            hosts.append(host)
+    except Exception:
+        return hosts, 0
+    return hosts, 1
+
+
+def _ingest_parallel(conn, scan_dir, names, signatures, workers):
+    # Workers only parse; rows are inserted here in name order, so the index
+    # ends up exactly as the serial path would have left it.
+    paths = [scan_files.file_path(scan_dir, name) for name in names]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for name, (hosts, ok) in zip(names, pool.map(_read_file, paths, chunksize=INGEST_CHUNK)):
+            for host in hosts:
+                _insert_host(conn, name, host)
+            if not ok:
+                metrics.count("files_skipped")
+                metrics.count("exceptions")
+            conn.execute("INSERT INTO files VALUES (?, ?, ?, ?, ?)", (name, *signatures[name], ok))
+
+
+# The record host_order keeps per live IP (latest = 1), with the IP's first
+# record and its open port count; {where} narrows the IPs considered.
+_PICKED = """
+    SELECT hosts.*,
+           FIRST_VALUE(file) OVER (PARTITION BY ip ORDER BY file, id) AS first_file,
+           FIRST_VALUE(id) OVER (PARTITION BY ip ORDER BY file, id) AS first_id,
+           (SELECT COUNT(DISTINCT portid) FROM ports
+            WHERE host_id = hosts.id AND ports.state = 'open') AS open_ports,
+           ROW_NUMBER() OVER (PARTITION BY ip ORDER BY file DESC, id DESC) AS latest
+    FROM hosts WHERE state = 'up' AND ip IS NOT NULL AND ip != ''{where}
+"""
+
+_RANKS = """
+    ROW_NUMBER() OVER (ORDER BY ip_key) AS by_ip,
+    ROW_NUMBER() OVER (ORDER BY open_ports, ip_key) AS by_open_ports,
+    ROW_NUMBER() OVER (ORDER BY os COLLATE NOCASE, ip_key) AS by_os,
+    ROW_NUMBER() OVER (ORDER BY hostname COLLATE NOCASE, ip_key) AS by_hostname,
+    ROW_NUMBER() OVER (ORDER BY first_file, first_id) AS by_file
+"""
+
+_ORDER_COLUMNS = ("by_ip", "by_open_ports", "by_os", "by_hostname", "by_file")
+
+
+def _rebuild_order(conn):
+    # One row per live IP -- the record from the last file that holds it,
+    # as in get-scan-data's hosts map -- with its rank under every sort key,
+    # so a page of any sort is a range scan rather than a sort. by_file is
+    # where the IP first appears in file order, the order of that hosts map.
+    conn.execute("DELETE FROM host_order")
+    conn.execute(f"""
+        INSERT INTO host_order (host_id, open_ports, {", ".join(_ORDER_COLUMNS)}, first_id)
+        SELECT id, open_ports, {_RANKS}, first_id
+        FROM ({_PICKED.format(where="")}) WHERE latest = 1
+    """)
+
+
+def _update_order(conn):
+    # _rebuild_order() for a refresh that only touched the IPs in the
+    # touched table: their rows are picked again, then every rank is
+    # recomputed but only the rows whose ranks moved are written.
+    conn.execute("DELETE FROM host_order WHERE host_id NOT IN (SELECT id FROM hosts)")
+    conn.execute("DELETE FROM host_order WHERE host_id IN "
+                 "(SELECT id FROM hosts WHERE ip IN (SELECT ip FROM touched))")
+    conn.execute(f"""
+        INSERT INTO host_order (host_id, open_ports, {", ".join(_ORDER_COLUMNS)}, first_id)
+        SELECT id, open_ports, 0, 0, 0, 0, 0, first_id
+        FROM ({_PICKED.format(where=" AND ip IN (SELECT ip FROM touched)")}) WHERE latest = 1
+    """)
+    conn.execute(f"""
+        UPDATE host_order SET {", ".join(f"{c} = ranked.{c}" for c in _ORDER_COLUMNS)}
+        FROM (
+            SELECT host_id, {_RANKS}
+            FROM (
+                SELECT host_order.host_id, host_order.open_ports, host_order.first_id,
+                       hosts.ip_key, hosts.os, hosts.hostname, first.file AS first_file
+                FROM host_order JOIN hosts ON hosts.id = host_order.host_id
+                JOIN hosts AS first ON first.id = host_order.first_id
+            )
+        ) AS ranked
+        WHERE host_order.host_id = ranked.host_id
+          AND ({" OR ".join(f"host_order.{c} != ranked.{c}" for c in _ORDER_COLUMNS)})
+    """)
+
+
+def _touch(conn, names):
+    # Adds the IPs recorded in the named files to the touched table.
+    conn.executemany("INSERT OR IGNORE INTO touched SELECT ip FROM hosts WHERE file = ? AND ip IS NOT NULL",
+                     [(name,) for name in names])
+
+
+def _touched_certs(conn):
+    # Fingerprints presented by the host_order records of touched IPs.
+    return {fingerprint for (fingerprint,) in conn.execute(
+        "SELECT DISTINCT fingerprint FROM port_certs WHERE host_id IN "
+        "(SELECT host_id FROM host_order WHERE host_id IN (SELECT id FROM hosts WHERE ip IN (SELECT ip FROM touched)))")}
+
+
+def _touched_ports(conn):
+    # Port ids in any record of a touched IP.
+    return {portid for (portid,) in conn.execute(
+        "SELECT DISTINCT portid FROM ports WHERE host_id IN (SELECT id FROM hosts WHERE ip IN (SELECT ip FROM touched))")}
+
+
+def refresh(conn, scan_dir, workers=None):
+    current = stat_files(scan_dir)
+    removed, changed = _diff(conn, current)
+    if not removed and not changed:
+        return []
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Somebody may have refreshed while we waited for the write lock.
+        removed, changed = _diff(conn, current)
+        # A refresh that leaves most live IPs alone redoes host_order, the
+        # port bitmaps and the certificate aggregates for the IPs (in any
+        # file) it touched, and the ports and certificates those IPs carried.
+        live = conn.execute("SELECT COUNT(*) FROM host_order").fetchone()[0]
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS touched (ip TEXT PRIMARY KEY) WITHOUT ROWID")
+        conn.execute("DELETE FROM touched")
+        _touch(conn, removed + changed)
+        certs, ports = _touched_certs(conn), _touched_ports(conn)
+        for name in removed + changed:
+            _drop_file(conn, name)
+        workers = INGEST_WORKERS if workers is None else workers
+        with metrics.phase("parse"):
+            if workers > 1 and len(changed) >= INGEST_PARALLEL_MIN:
+                _ingest_parallel(conn, scan_dir, changed, current, workers)
+            else:
+                for name in changed:
+                    _ingest_file(conn, scan_dir, name, current[name])
+        metrics.count("files_parsed", len(changed))
+        with metrics.phase("index"):
+            _touch(conn, changed)
+            touched = conn.execute("SELECT COUNT(*) FROM touched").fetchone()[0]
+            if touched * INCREMENTAL_SHARE <= live:
+                certs |= _touched_certs(conn)
+                _update_order(conn)
+                certs |= _touched_certs(conn)
+                adjacency.update(conn, ports | _touched_ports(conn))
+            else:
+                certs = None
+                _rebuild_order(conn)
+                adjacency.rebuild(conn)
+            tls.rebuild(conn, Path(scan_dir).name, certs)
+            # Prefix counts are cumulative over every live IP in order.
+            subnets.rebuild(conn)
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (uuid.uuid4().hex,))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return removed + changed
+
+
+def _pooled(path):
+    conn = _pool.get(path)
+    if conn is None:
+        conn = store.connect(path, SCHEMA, SCHEMA_VERSION, factory=_PooledConnection,
+                             check_same_thread=False)
+        conn.path = path
+        conn.execute(f"PRAGMA cache_size=-{_pool.cache_bytes // 1024}")
+    return conn
+
+
+def open_index(scan_dir, workers=None):
+    # Refreshed against the files on disk before it is handed out, pooled
+    # or not.
+    path = index_path(scan_dir)
+    conn = _pooled(path) if _pool is not None else _connect(path)
+    try:
+        refresh(conn, scan_dir, workers)
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+def summary(conn):
+    total_hosts, live_hosts = conn.execute(
+        "SELECT COUNT(*), COUNT(CASE WHEN state = 'up' THEN 1 END) FROM hosts").fetchone()
+    total_ports, unique_ports = conn.execute(
+        "SELECT COUNT(*), COUNT(DISTINCT portid) FROM ports "
+        "JOIN hosts ON hosts.id = ports.host_id WHERE hosts.state = 'up'").fetchone()
+    return {
+        "total_hosts": total_hosts,
+        "live_hosts": live_hosts,
+        "total_ports": total_ports,
+        "unique_ports": unique_ports
+    }
+
+
+def port_counts(conn):
+    rows = conn.execute(
+        "SELECT portid, COUNT(*) AS n FROM ports JOIN hosts ON hosts.id = ports.host_id "
+        "WHERE hosts.state = 'up' GROUP BY portid ORDER BY n DESC, portid")
+    return {portid: n for portid, n in rows}
+
+
+def port_distribution(scan_dir):
+    # Up-host count per port id for one date, shared by the JSON endpoint and
+    # the server-rendered bar chart.
+    with closing(open_index(scan_dir)) as conn:
+        return port_counts(conn)
+
+
+def port_host_links(conn):
+    return conn.execute(
+        "SELECT ports.portid, hosts.ip FROM ports JOIN hosts ON hosts.id = ports.host_id "
+        "WHERE hosts.state = 'up' AND hosts.ip IS NOT NULL ORDER BY hosts.id, ports.rowid").fetchall()
+
+
+def file_signatures(conn):
+    return {name: (mtime_ns, size, inode) for name, mtime_ns, size, inode
+            in conn.execute("SELECT name, mtime_ns, size, inode FROM files")}
+
+
+PORT_COLUMNS = ("portid", "protocol", "state", "reason", "service", "product", "version",
+                "tls_cert", "script_output")
+
+
+def _host_rows(conn, where="", params=(), join="", order="hosts.file, hosts.id"):
+    # One joined pass, grouped as it streams, so callers never hold more
+    # than the host being assembled.
+    current = None
+    for host_id, name, ip, state, hostname, os_name, mac, vendor, *port in conn.execute(
+            "SELECT hosts.id, hosts.file, hosts.ip, hosts.state, hosts.hostname, hosts.os, "
+            f"hosts.mac, hosts.vendor, {', '.join('ports.' + c for c in PORT_COLUMNS)} "
+            f"FROM hosts {join} LEFT JOIN ports ON ports.host_id = hosts.id "
+            f"{where} ORDER BY {order}, ports.rowid", params):
+        if current is None or current[0] != host_id:
+            if current is not None:
+                yield current
+            current = (host_id, name, {
+                "ip": ip,
+                "state": state,
+                "hostname": hostname,
+                "os": os_name,
+                "mac": mac,
+                "vendor": vendor,
+                "ports": [],
+            })
+        if port[0] is not None:
+            current[2]["ports"].append(dict(zip(PORT_COLUMNS, port)))
+    if current is not None:
+        yield current
+
+
+def file_hosts(conn, names=None):
+    # (name, [host, ...]) per file, in file name order. names=None streams all.
+    if names is None:
+        rows = _host_rows(conn)
+    else:
+        rows = (row for name in sorted(names)
+                for row in _host_rows(conn, "WHERE hosts.file = ?", (name,)))
+
+    current, hosts = None, []
+    for _, name, host in rows:
+        if name != current:
+            if current is not None:
+                yield current, hosts
+            current, hosts = name, []
+        hosts.append(host)
+    if current is not None:
+        yield current, hosts
+
+
+def hosts_by_id(conn, ids):
+    found = {}
+    for start in range(0, len(ids), 500):
+        chunk = list(ids[start:start + 500])
+        where = f"WHERE hosts.id IN ({', '.join('?' * len(chunk))})"
+        for host_id, _, host in _host_rows(conn, where, chunk):
+            found[host_id] = host
+    return found
+
+
+def generation(conn):
+    # Changes on every refresh that touched the index; derived stores use it
+    # to tell whether their copy of a date is current.
+    row = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+    return row[0] if row else ""
+
+
+def live_host_ports(conn):
+    # (ip, [(portid, protocol, state, service, version), ...]) per live IP.
+    current_ip, ports = None, []
+    for ip, *port in conn.execute(
+            "SELECT hosts.ip, ports.portid, ports.protocol, ports.state, ports.service, ports.version "
+            "FROM host_order JOIN hosts ON hosts.id = host_order.host_id "
+            "LEFT JOIN ports ON ports.host_id = hosts.id ORDER BY host_order.by_ip, ports.rowid"):
+        if ip != current_ip:
+            if current_ip is not None:
+                yield current_ip, ports
+            current_ip, ports = ip, []
+        if port[0] is not None:
+            ports.append(tuple(port))
+    if current_ip is not None:
+        yield current_ip, ports
+
+
+def live_hosts(conn):
+    # The record behind every live IP, in get-scan-data's hosts map order.
+    for _, _, host in _host_rows(conn, join="JOIN host_order ON host_order.host_id = hosts.id",
+                                 order="host_order.by_file"):
+        yield host
+
+
+def open_port_counts(conn):
+    # Live IPs with each port open, counted once per IP.
+    return dict(conn.execute(
+        "SELECT portid, COUNT(DISTINCT host_order.host_id) FROM host_order "
+        "JOIN ports ON ports.host_id = host_order.host_id AND ports.state = 'open' GROUP BY portid"))
+
+
+def service_counts(conn, limit=10):
+    # [(service, product, live IPs with it open)], most common first.
+    return conn.execute(
+        "SELECT ports.service, ports.product, COUNT(DISTINCT host_order.host_id) AS n FROM host_order "
+        "JOIN ports ON ports.host_id = host_order.host_id AND ports.state = 'open' "
+        "GROUP BY ports.service, ports.product ORDER BY n DESC, ports.service, ports.product LIMIT ?",
+        (limit,)).fetchall()
+
+
+def live_ips(conn):
+    return [ip for (ip,) in conn.execute(
+        "SELECT ip FROM hosts WHERE state = 'up' AND ip IS NOT NULL ORDER BY id")]
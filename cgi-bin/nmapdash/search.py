@@ -0,0 +1,182 @@
+import re
+from contextlib import closing
+
+from . import history, scan_index, store
+from .config import CACHE_DIR, SCAN_ROOT
+
+# Full-text search over every date's live hosts: one entry per (date, IP,
+# port) -- or per (date, IP) for a host without ports -- carrying the
+# port's service fields and the host's hostname, MAC vendor and OS, so a
+# query can combine both. entries_fts is an FTS5 index over entries.
+
+SCHEMA_VERSION = 1
+
+FIELDS = ("service", "product", "version", "script_output", "hostname", "vendor", "os")
+
+SCHEMA = f"""
+CREATE TABLE dates (
+    date TEXT PRIMARY KEY,
+    generation TEXT NOT NULL
+);
+CREATE TABLE entries (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    ip TEXT NOT NULL,
+    portid TEXT NOT NULL,
+    protocol TEXT NOT NULL,
+    state TEXT NOT NULL,
+    {", ".join(f"{field} TEXT NOT NULL" for field in FIELDS)}
+);
+CREATE INDEX entries_date ON entries(date);
+CREATE VIRTUAL TABLE entries_fts USING fts5(
+    {", ".join(FIELDS)},
+    content='entries', content_rowid='id', prefix='2 3'
+);
+"""
+
+# bm25 weight per FIELDS column: a hit in the product or version outranks
+# the same word somewhere in a script's output.
+WEIGHTS = (3.0, 4.0, 3.0, 1.0, 2.0, 1.5, 2.0)
+
+# Query-side names for FIELDS, e.g. product:openssh or script:expired.
+ALIASES = {field: field for field in FIELDS}
+ALIASES.update(script="script_output", host="hostname")
+
+TERM = re.compile(r'(-?)(?:(\w+):)?(?:"([^"]*)"|([^\s"]+))(\*?)')
+
+RESULT_COLUMNS = ("date", "ip", "portid", "protocol", "state") + FIELDS
+
+
+def search_path():
+    return CACHE_DIR / "search.db"
+
+
+def _connect():
+    return store.connect(search_path(), SCHEMA, SCHEMA_VERSION)
+
+
+def _entries(date, hosts):
+    for host in hosts:
+        shared = (host["hostname"], host["vendor"], host["os"])
+        if not host["ports"]:
+            yield (date, host["ip"], "", "", "", "", "", "", "") + shared
+        for p in host["ports"]:
+            yield (date, host["ip"], p["portid"], p["protocol"], p["state"], p["service"],
+                   p["product"], p["version"], p["script_output"]) + shared
+
+
+def _forget(conn, date):
+    # External-content FTS5 tables are told what each deleted row held.
+    conn.execute(f"INSERT INTO entries_fts(entries_fts, rowid, {', '.join(FIELDS)}) "
+                 f"SELECT 'delete', id, {', '.join(FIELDS)} FROM entries WHERE date = ?", (date,))
+    conn.execute("DELETE FROM entries WHERE date = ?", (date,))
+    conn.execute("DELETE FROM dates WHERE date = ?", (date,))
+
+
+def record(conn, date):
+    # Re-indexes one date when its scan index has moved since the last time.
+    # Returns True when it did.
+    with closing(scan_index.open_index(SCAN_ROOT / date)) as idx:
+        with store.transaction(idx, "DEFERRED"):
+            generation = scan_index.generation(idx)
+            row = conn.execute("SELECT generation FROM dates WHERE date = ?", (date,)).fetchone()
+            if row and row[0] == generation:
+                return False
+            with store.transaction(conn):
+                _forget(conn, date)
+                first = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM entries").fetchone()[0]
+                conn.executemany(f"INSERT INTO entries ({', '.join(RESULT_COLUMNS)}) "
+                                 f"VALUES ({', '.join('?' * len(RESULT_COLUMNS))})",
+                                 _entries(date, scan_index.live_hosts(idx)))
+                conn.execute(f"INSERT INTO entries_fts(rowid, {', '.join(FIELDS)}) "
+                             f"SELECT id, {', '.join(FIELDS)} FROM entries WHERE id >= ?", (first,))
+                conn.execute("INSERT INTO dates VALUES (?, ?)", (date, generation))
+    return True
+
+
+def update(date):
+    # Ingest hook, next to history.update().
+    with closing(_connect()) as conn:
+        record(conn, date)
+
+
+def _prune(conn, dates):
+    # Drops dates no longer among dates (their files are gone); -> the dates
+    # still indexed. Nothing is indexed here: update(), which every scan
+    # build calls, does that.
+    known = {date for (date,) in conn.execute("SELECT date FROM dates")}
+    for date in known - set(dates):
+        with store.transaction(conn):
+            _forget(conn, date)
+    return known & set(dates)
+
+
+def parse_query(text):
+    # Query text -> FTS5 expression. Words match whole tokens, "quoted
+    # words" match as a phrase, a trailing * makes either a prefix match,
+    # field:word limits a term to one field, OR joins the terms either side
+    # and a leading - excludes. Everything else is quoted, so no input is an
+    # FTS5 syntax error. Returns None when nothing searchable is left.
+    groups, current, excluded = [], [], []
+    for match in TERM.finditer(text):
+        negate, field, phrase, word, prefix = match.groups()
+        if word == "OR" and not (negate or field or prefix):
+            if current:
+                groups.append(current)
+                current = []
+            continue
+        term = phrase if phrase is not None else word
+        if not re.search(r"\w", term):
+            continue
+        term = '"' + term.replace('"', '""') + '"' + (" *" if prefix else "")
+        if field and field.lower() in ALIASES:
+            term = f"{ALIASES[field.lower()]} : {term}"
+        (excluded if negate else current).append(term)
+    if current:
+        groups.append(current)
+    if not groups:
+        return None
+
+    expression = " OR ".join("(" + " AND ".join(group) + ")" for group in groups)
+    if excluded:
+        expression = f"({expression}) NOT ({' OR '.join(excluded)})"
+    return expression
+
+
+def search(text, dates=None, port=None, offset=0, limit=50):
+    # -> (total, [entry, ...], unindexed) best match first; ties go to the
+    # newer date. dates restricts to those dates and port to one port id.
+    # unindexed lists the dates searched for that no build has indexed yet.
+    expression = parse_query(text)
+    if expression is None:
+        return 0, [], []
+
+    where, params = ["entries_fts MATCH ?"], [expression]
+    if dates is not None:
+        where.append(f"entries.date IN ({', '.join('?' * len(dates))})")
+        params += dates
+    if port:
+        where.append("entries.portid = ?")
+        params.append(port)
+    sql = (f"FROM entries_fts JOIN entries ON entries.id = entries_fts.rowid "
+           f"WHERE {' AND '.join(where)}")
+
+    with closing(_connect()) as conn:
+        existing = history.scan_dates()
+        indexed = _prune(conn, existing)
+        unindexed = sorted(set(existing if dates is None else dates) - indexed)
+        with store.transaction(conn, "DEFERRED"):
+            total = conn.execute(f"SELECT COUNT(*) {sql}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT {', '.join('entries.' + c for c in RESULT_COLUMNS)}, "
+                f"bm25(entries_fts, {', '.join(map(str, WEIGHTS))}) AS score "
+                f"{sql} ORDER BY score, entries.date DESC, entries.id LIMIT ? OFFSET ?",
+                params + [limit, offset]).fetchall()
+
+    results = []
+    for *values, score in rows:
+        entry = dict(zip(("date", "ip", "port") + RESULT_COLUMNS[3:], values))
+        entry["port"] = entry["port"] or None
+        entry["score"] = round(-score, 3)
+        results.append(entry)
+    return total, results, unindexed
@@ -0,0 +1,83 @@
+import argparse
+import json
+import mimetypes
+import os
+import sys
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, make_server
+
+from . import endpoints, scan_index
+from .lru import IndexPool
+from .web import Form, Response, encode, etag_matches, make_etag, not_modified, respond
+
+WEB_ROOT = Path(__file__).resolve().parents[2]
+STATIC_FILES = {"/": "index.html", "/index.html": "index.html"}
+STATIC_DIRS = ("css", "js")
+
+# Parsed scans stay resident as pooled scan index connections, each with up
+# to INDEX_CACHE_BYTES of SQLite page cache, NMAP_LRU_BYTES between them.
+INDEX_CACHE_BYTES = 32 * 1024 * 1024
+INDEX_POOL = IndexPool(int(os.environ.get("NMAP_LRU_BYTES", 256 * 1024 * 1024)), INDEX_CACHE_BYTES)
+scan_index.use_pool(INDEX_POOL)
+
+
+def dispatch(script, environ):
+    endpoint = endpoints.get_endpoint(script)
+    if endpoint is None:
+        return Response(json.dumps({"error": f"Unknown endpoint: {script}"}), status="404 Not Found")
+    return respond(endpoint, Form(environ.get("QUERY_STRING", "")), environ)
+
+
+def _static(path, environ):
+    name = STATIC_FILES.get(path)
+    if name is None and path.lstrip("/").split("/", 1)[0] in STATIC_DIRS:
+        name = path.lstrip("/")
+    if name is None:
+        return None
+
+    file_path = (WEB_ROOT / name).resolve()
+    if WEB_ROOT not in file_path.parents or not file_path.is_file():
+        return None
+    st = file_path.stat()
+    etag = make_etag(name, st.st_mtime_ns, st.st_size)
+    if etag_matches(environ, etag):
+        return not_modified(etag)
+    content_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+    response = Response(file_path.read_bytes(), content_type)
+    response.etag = etag
+    return response
+
+
+def application(environ, start_response):
+    path = environ.get("PATH_INFO") or "/"
+    try:
+        if path.startswith("/cgi-bin/"):
+            response = dispatch(path[len("/cgi-bin/"):], environ)
+        else:
+            response = _static(path, environ) or Response("Not found", "text/plain", "404 Not Found")
+    except Exception as e:
+        response = Response(json.dumps({"error": str(e)}), status="500 Internal Server Error")
+
+    body, headers = encode(response, environ)
+    start_response(response.status, headers)
+    return [body] if isinstance(body, bytes) else body
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Nmap dashboard and its cgi-bin routes from one process.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+
+    # Pay every import once at startup rather than on the first request.
+    for script in endpoints.ROUTES:
+        endpoints.get_endpoint(script)
+
+    with make_server(args.host, args.port, application, server_class=ThreadingWSGIServer) as httpd:
+        print(f"Serving {WEB_ROOT} on http://{args.host}:{args.port}/", file=sys.stderr)
+        httpd.serve_forever()
@@ -0,0 +1,49 @@
+import sqlite3
+
+
+def connect(path, schema, version, **kwargs):
+    # Opens a SQLite store under scan-cache/, recreating it from scratch when
+    # its user_version does not match the caller's schema version. kwargs go
+    # to sqlite3.connect().
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=300, isolation_level=None, **kwargs)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    if conn.execute("PRAGMA user_version").fetchone()[0] != version:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock; another process may have won.
+            if conn.execute("PRAGMA user_version").fetchone()[0] != version:
+                for (name,) in conn.execute(
+                        "SELECT name FROM sqlite_master WHERE type='table'").fetchall():
+                    # IF EXISTS: dropping an FTS5 table takes its shadow
+                    # tables with it.
+                    conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+                for statement in schema.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version={version}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return conn
+
+
+def transaction(conn, mode="IMMEDIATE"):
+    return _Transaction(conn, mode)
+
+
+class _Transaction:
+    def __init__(self, conn, mode):
+        self.conn = conn
+        self.mode = mode
+
+    def __enter__(self):
+        self.conn.execute(f"BEGIN {self.mode}")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        return False
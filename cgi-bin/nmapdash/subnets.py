@@ -0,0 +1,116 @@
+import ipaddress
+import sys
+from array import array
+from bisect import bisect_left
+
+# Subnet rollups for one date, stored in the scan index next to the port
+# bitmaps. Every live IP of a family goes into one sorted array of packed
+# integers, with a running total of open ports alongside (cum[i] is the
+# sum over the first i addresses), so the hosts and open ports under any
+# prefix are two binary searches and a subtraction. Counts for the usual
+# prefixes are kept ready in subnet_counts; any other prefix is rolled up
+# from the arrays on demand.
+
+PREFIXES = {4: (8, 16, 24), 6: (32, 48, 64)}
+BITS = {4: 32, 6: 128}
+
+
+def _pack(values, width):
+    if width == 4:
+        packed = array("I", values)
+        if sys.byteorder == "little":
+            packed.byteswap()
+        return packed.tobytes()
+    return b"".join(v.to_bytes(width, "big") for v in values)
+
+
+def _unpack(blob, width):
+    if width == 4:
+        values = array("I")
+        values.frombytes(blob)
+        if sys.byteorder == "little":
+            values.byteswap()
+        return values
+    return [int.from_bytes(blob[i:i + width], "big") for i in range(0, len(blob), width)]
+
+
+def _groups(addrs, cum, bits, prefix, lo, hi):
+    # (network start, hosts, open ports) per prefix-sized block in lo..hi.
+    shift = bits - prefix
+    i = lo
+    while i < hi:
+        net = addrs[i] >> shift
+        j = bisect_left(addrs, (net + 1) << shift, i, hi)
+        yield net << shift, j - i, cum[j] - cum[i]
+        i = j
+
+
+def _network(family, start, prefix):
+    return str((ipaddress.IPv4Network if family == 4 else ipaddress.IPv6Network)((start, prefix)))
+
+
+def rebuild(conn):
+    conn.execute("DELETE FROM subnet_addrs")
+    conn.execute("DELETE FROM subnet_counts")
+
+    # host_order.by_ip is ip_key order: IPv4 then IPv6, each numerically.
+    families = {4: ([], [0]), 6: ([], [0])}
+    for ip_key, open_ports in conn.execute(
+            "SELECT hosts.ip_key, host_order.open_ports FROM host_order "
+            "JOIN hosts ON hosts.id = host_order.host_id ORDER BY host_order.by_ip"):
+        if ip_key[0] in families:
+            addrs, cum = families[ip_key[0]]
+            addrs.append(int.from_bytes(ip_key[1:], "big"))
+            cum.append(cum[-1] + open_ports)
+
+    for family, (addrs, cum) in families.items():
+        if not addrs:
+            continue
+        conn.execute("INSERT INTO subnet_addrs VALUES (?, ?, ?)",
+                     (family, _pack(addrs, BITS[family] // 8), _pack(cum, 4)))
+        conn.executemany("INSERT INTO subnet_counts VALUES (?, ?, ?, ?, ?, ?)", [
+            (family, prefix, position, _network(family, start, prefix), hosts, open_ports)
+            for prefix in PREFIXES[family]
+            for position, (start, hosts, open_ports)
+            in enumerate(_groups(addrs, cum, BITS[family], prefix, 0, len(addrs)))])
+
+
+class Subnets:
+    # Read side; each family's arrays load on first use.
+    def __init__(self, conn):
+        self.conn = conn
+        self._arrays = {}
+
+    def _load(self, family):
+        if family not in self._arrays:
+            row = self.conn.execute("SELECT addrs, cum FROM subnet_addrs WHERE family = ?", (family,)).fetchone()
+            self._arrays[family] = ((_unpack(row[0], BITS[family] // 8), _unpack(row[1], 4))
+                                    if row else ([], [0]))
+        return self._arrays[family]
+
+    def _range(self, network):
+        addrs, cum = self._load(network.version)
+        lo = bisect_left(addrs, int(network.network_address))
+        hi = bisect_left(addrs, int(network.broadcast_address) + 1, lo)
+        return addrs, cum, lo, hi
+
+    def count(self, network):
+        # (live hosts, open ports) inside an ipaddress network.
+        _, cum, lo, hi = self._range(network)
+        return hi - lo, cum[hi] - cum[lo]
+
+    def rollup(self, prefix, family=4, within=None):
+        # [(network, hosts, open ports)] per /prefix block holding a live
+        # host, in address order; within limits it to one enclosing network.
+        if within is None and prefix in PREFIXES[family]:
+            return [row for row in self.conn.execute(
+                "SELECT network, hosts, open_ports FROM subnet_counts "
+                "WHERE family = ? AND prefix = ? ORDER BY position", (family, prefix))]
+        if within is not None:
+            family = within.version
+            addrs, cum, lo, hi = self._range(within)
+        else:
+            addrs, cum = self._load(family)
+            lo, hi = 0, len(addrs)
+        return [(_network(family, start, prefix), hosts, open_ports)
+                for start, hosts, open_ports in _groups(addrs, cum, BITS[family], prefix, lo, hi)]
@@ -0,0 +1,159 @@
+import os
+import random
+from xml.sax.saxutils import quoteattr
+
+# Deterministic nmap -oX output for benchmarks: the same arguments always
+# produce byte-identical files.
+
+SERVICES = [
+    (21, "ftp", "vsftpd", "3.0.3"),
+    (22, "ssh", "OpenSSH", "8.9p1 Ubuntu 3ubuntu0.4"),
+    (23, "telnet", "", ""),
+    (25, "smtp", "Postfix smtpd", ""),
+    (53, "domain", "ISC BIND", "9.18.12"),
+    (80, "http", "nginx", "1.24.0"),
+    (110, "pop3", "Dovecot pop3d", ""),
+    (135, "msrpc", "Microsoft Windows RPC", ""),
+    (139, "netbios-ssn", "Microsoft Windows netbios-ssn", ""),
+    (143, "imap", "Dovecot imapd", ""),
+    (443, "https", "nginx", "1.24.0"),
+    (445, "microsoft-ds", "", ""),
+    (993, "imaps", "Dovecot imapd", ""),
+    (1433, "ms-sql-s", "Microsoft SQL Server 2019", "15.00.2000"),
+    (3306, "mysql", "MySQL", "8.0.33"),
+    (3389, "ms-wbt-server", "Microsoft Terminal Services", ""),
+    (5432, "postgresql", "PostgreSQL DB", "14.8"),
+    (5900, "vnc", "VNC", "protocol 3.8"),
+    (6379, "redis", "Redis key-value store", "7.0.11"),
+    (8080, "http-proxy", "Apache Tomcat", "9.0.75"),
+    (8443, "https-alt", "Jetty", "9.4.51"),
+    (9200, "http", "Elasticsearch REST API", "8.8.0"),
+]
+TLS_PORTS = {443, 993, 3389, 8443}
+
+OSES = ["Linux 5.0 - 5.14", "Microsoft Windows 10 1809 - 21H2", "Microsoft Windows Server 2019",
+        "FreeBSD 13.1", "Apple macOS 12", "Cisco IOS 15", "Linux 4.15 - 5.8", "OpenBSD 7.2"]
+VENDORS = ["Dell", "Hewlett Packard", "Cisco Systems", "VMware", "Intel Corporate", "Super Micro Computer"]
+ISSUERS = [("Let's Encrypt", "R3"), ("DigiCert Inc", "DigiCert TLS RSA SHA256 2020 CA1"),
+           ("Example Corp", "Example Internal CA"), (None, None)]
+
+
+def _ip(i, subnets):
+    net = i % subnets
+    return f"10.{net // 256 % 256}.{net % 256}.{i // subnets % 254 + 1}"
+
+
+def _ssl_cert(rnd, ip):
+    org, cn = rnd.choice(ISSUERS)
+    subject = f"host-{ip.replace('.', '-')}.example.com"
+    subject_org = ""
+    if org is None:
+        # Self-signed: issuer and subject are the same name.
+        org, cn = "Example Corp", subject
+        subject_org = f'<elem key="organizationName">{org}</elem>'
+    year = rnd.choice([2022, 2023, 2024, 2025, 2026])
+    bits = rnd.choice([2048, 2048, 4096, 256])
+    sha1 = "".join(rnd.choice("0123456789abcdef") for _ in range(40))
+    output = (f"Subject: commonName={subject}\nIssuer: commonName={cn}/organizationName={org}\n"
+              f"Public Key type: rsa\nPublic Key bits: {bits}\n"
+              f"Not valid before: {year - 1}-06-01T00:00:00\nNot valid after:  {year}-06-01T00:00:00\n"
+              f"SHA-1: {sha1}")
+    return (f'<script id="ssl-cert" output={quoteattr(output)}>'
+            f'<table key="subject"><elem key="commonName">{subject}</elem>{subject_org}</table>'
+            f'<table key="issuer"><elem key="commonName">{cn}</elem>'
+            f'<elem key="organizationName">{org}</elem></table>'
+            f'<table key="pubkey"><elem key="type">rsa</elem><elem key="bits">{bits}</elem></table>'
+            f'<table key="validity"><elem key="notBefore">{year - 1}-06-01T00:00:00</elem>'
+            f'<elem key="notAfter">{year}-06-01T00:00:00</elem></table>'
+            f'<elem key="sha1">{sha1}</elem></script>')
+
+
+def _scripts(rnd, port, service, ip, density):
+    out = []
+    if port in TLS_PORTS:
+        out.append(_ssl_cert(rnd, ip))
+        if rnd.random() < density:
+            out.append('<script id="tls-alpn" output="&#xa;  h2&#xa;  http/1.1"/>')
+        if rnd.random() < density:
+            kind = rnd.choice(["Subject: commonName=ok", "self-signed certificate",
+                               "certificate has expired"])
+            out.append(f'<script id="tls-nextprotoneg" output={quoteattr(kind)}/>')
+    if service.startswith("http") and rnd.random() < density:
+        out.append(f'<script id="http-title" output={quoteattr("Welcome to " + service)}/>')
+    if service == "ssh" and rnd.random() < density:
+        out.append('<script id="ssh-hostkey" output="&#xa;  256 aa:bb:cc (ECDSA)&#xa;  256 dd:ee:ff (ED25519)"/>')
+    return "".join(out)
+
+
+def host_xml(rnd, i, ports_per_host=6, script_density=0.5, subnets=64):
+    ip = _ip(i, subnets)
+    up = rnd.random() > 0.15
+    parts = [f'<host starttime="1700000000" endtime="1700000042">'
+             f'<status state="{"up" if up else "down"}" reason="{"arp-response" if up else "no-response"}"/>',
+             f'<address addr="{ip}" addrtype="ipv4"/>']
+    if rnd.random() < 0.6:
+        mac = ":".join(f"{rnd.randrange(256):02X}" for _ in range(6))
+        parts.append(f'<address addr="{mac}" addrtype="mac" vendor={quoteattr(rnd.choice(VENDORS))}/>')
+    if not up:
+        parts.append("</host>")
+        return "".join(parts)
+
+    if rnd.random() < 0.7:
+        parts.append(f'<hostnames><hostname name="h{i}.corp.example.com" type="PTR"/></hostnames>')
+    else:
+        parts.append("<hostnames/>")
+
+    parts.append('<ports><extraports state="closed" count="990"/>')
+    count = min(len(SERVICES), max(0, int(rnd.gauss(ports_per_host, ports_per_host / 2))))
+    for port, service, product, version in sorted(rnd.sample(SERVICES, count)):
+        state = rnd.choices(["open", "closed", "filtered"], [8, 1, 1])[0]
+        reason = {"open": "syn-ack", "closed": "reset", "filtered": "no-response"}[state]
+        parts.append(f'<port protocol="tcp" portid="{port}"><state state="{state}" reason="{reason}" reason_ttl="64"/>'
+                     f'<service name="{service}" product={quoteattr(product)} version={quoteattr(version)}'
+                     f' method="probed" conf="10"/>')
+        if state == "open":
+            parts.append(_scripts(rnd, port, service, ip, script_density))
+        parts.append("</port>")
+    parts.append("</ports>")
+
+    if rnd.random() < 0.75:
+        parts.append(f'<os><osmatch name={quoteattr(rnd.choice(OSES))} accuracy="{rnd.randint(85, 100)}" line="1"/></os>')
+    parts.append('<times srtt="512" rttvar="128" to="100000"/></host>')
+    return "".join(parts)
+
+
+HEAD = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<nmaprun scanner="nmap" args="nmap -sV -O --script ssl-cert -oX" start="1700000000" version="7.94">\n')
+TAIL = '<runstats><finished time="1700000900" exit="success"/></runstats>\n</nmaprun>\n'
+
+
+def generate(scan_dir, hosts=1000, layout="per-host", ports_per_host=6, script_density=0.5,
+             malformed=0, subnets=64, seed=0):
+    # layout "per-host" writes host<N>.xml per host, "single" one sweep.xml.
+    # malformed adds that many broken files: truncated mid-host, empty, and
+    # not XML at all, in turn. Returns the number of files written.
+    rnd = random.Random(seed)
+    os.makedirs(scan_dir, exist_ok=True)
+    written = 0
+    if layout == "single":
+        with open(os.path.join(scan_dir, "sweep.xml"), "w") as f:
+            f.write(HEAD)
+            for i in range(hosts):
+                f.write(host_xml(rnd, i, ports_per_host, script_density, subnets) + "\n")
+            f.write(TAIL)
+        written += 1
+    elif layout == "per-host":
+        for i in range(hosts):
+            with open(os.path.join(scan_dir, f"host{i:06d}.xml"), "w") as f:
+                f.write(HEAD + host_xml(rnd, i, ports_per_host, script_density, subnets) + "\n" + TAIL)
+        written += hosts
+    else:
+        raise ValueError(f"Unknown layout: {layout}")
+
+    for n in range(malformed):
+        body = [HEAD + host_xml(rnd, hosts + n, ports_per_host, script_density, subnets)[:200],
+                "", "this is not xml\n"][n % 3]
+        with open(os.path.join(scan_dir, f"malformed{n:04d}.xml"), "w") as f:
+            f.write(body)
+        written += 1
+    return written
@@ -0,0 +1,128 @@
+import json
+from datetime import date as Date, datetime
+
+# Certificates from the structured <elem>/<table> children of ssl-cert
+# scripts (see parser.parse_cert). The scan index keeps one port_certs row
+# per port that presented one; on every refresh the live hosts' certs are
+# folded into certs, one row per fingerprint, plus the expiry and issuer
+# counts the dashboard cards read. Expiry is measured from the scan date,
+# so a date's buckets never change once built.
+
+CERT_FIELDS = ("fingerprint", "subject", "issuer", "issuer_name", "not_before", "not_after",
+               "key_type", "key_bits")
+
+# (bucket, expires within this many days of the scan); "expired" and
+# "unknown" (no parsable notAfter) are the two ends.
+BUCKETS = (("expired", 0), ("7d", 7), ("30d", 30), ("90d", 90), ("365d", 365), ("later", None))
+BUCKET_NAMES = tuple(name for name, _ in BUCKETS) + ("unknown",)
+
+CERT_COLUMNS = CERT_FIELDS + ("self_signed", "expiry", "days_left", "hosts", "endpoints")
+
+
+def scan_day(date):
+    try:
+        return datetime.strptime(date, "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def _days_left(not_after, day):
+    try:
+        return (Date.fromisoformat(not_after[:10]) - day).days
+    except (TypeError, ValueError):
+        return None
+
+
+def bucket(days_left):
+    if days_left is None:
+        return "unknown"
+    for name, days in BUCKETS:
+        if days is None or days_left < days:
+            return name
+
+
+def rebuild(conn, date, fingerprints=None):
+    # fingerprints limits the certs rows recomputed to those certificates
+    # (the only ones whose hosts changed); None recomputes them all.
+    if fingerprints is None:
+        conn.execute("DELETE FROM certs")
+        where, params = "", ()
+    else:
+        fingerprints = json.dumps(sorted(fingerprints))
+        conn.execute("DELETE FROM certs WHERE fingerprint IN (SELECT value FROM json_each(?))", (fingerprints,))
+        where, params = "WHERE port_certs.fingerprint IN (SELECT value FROM json_each(?)) ", (fingerprints,)
+    conn.execute("DELETE FROM cert_expiry")
+    conn.execute("DELETE FROM cert_issuers")
+
+    day = scan_day(date)
+    rows = []
+    for *fields, hosts, endpoints in conn.execute(
+            f"SELECT {', '.join('port_certs.' + c for c in CERT_FIELDS)}, "
+            "COUNT(DISTINCT host_order.host_id), COUNT(*) FROM host_order "
+            f"JOIN port_certs ON port_certs.host_id = host_order.host_id {where}"
+            "GROUP BY port_certs.fingerprint", params):
+        cert = dict(zip(CERT_FIELDS, fields))
+        days_left = _days_left(cert["not_after"], day) if day else None
+        self_signed = int(bool(cert["subject"]) and cert["subject"] == cert["issuer"])
+        rows.append((*fields, self_signed, bucket(days_left), days_left, hosts, endpoints))
+    conn.executemany(f"INSERT INTO certs VALUES ({', '.join('?' * len(CERT_COLUMNS))})", rows)
+
+    conn.execute("INSERT INTO cert_expiry SELECT expiry, COUNT(*), SUM(endpoints) FROM certs GROUP BY expiry")
+    conn.execute("INSERT INTO cert_issuers SELECT issuer_name, COUNT(*), SUM(endpoints), SUM(self_signed) "
+                 "FROM certs GROUP BY issuer_name")
+
+
+def tls_info(conn, date):
+    # get-scan-data's tls_info: every port of every live host record that
+    # presented a certificate, as self_signed, expired (at the scan date)
+    # or valid.
+    day = scan_day(date)
+    counts = {"valid": 0, "expired": 0, "self_signed": 0}
+    for kind, n in conn.execute(
+            "SELECT CASE WHEN port_certs.subject != '' AND port_certs.subject = port_certs.issuer THEN 'self_signed' "
+            "WHEN port_certs.not_after != '' AND substr(port_certs.not_after, 1, 10) < ? THEN 'expired' "
+            "ELSE 'valid' END, COUNT(*) FROM port_certs JOIN hosts ON hosts.id = port_certs.host_id "
+            "WHERE hosts.state = 'up' AND hosts.ip IS NOT NULL AND hosts.ip != '' GROUP BY 1",
+            (day.isoformat() if day else "",)):
+        counts[kind] = n
+    return counts
+
+
+def summary(conn, issuers=10):
+    # The TLS Certificate Info and CA Breakdown cards, from the aggregates
+    # rebuild() left behind.
+    certificates, endpoints, self_signed = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(endpoints), 0), COALESCE(SUM(self_signed), 0) FROM certs").fetchone()
+    expiry = {name: {"certs": 0, "endpoints": 0} for name in BUCKET_NAMES}
+    for name, count, n in conn.execute("SELECT bucket, certs, endpoints FROM cert_expiry"):
+        expiry[name] = {"certs": count, "endpoints": n}
+    return {
+        "certificates": certificates,
+        "endpoints": endpoints,
+        "self_signed": self_signed,
+        "expiry": expiry,
+        "key_sizes": {f"{key_type} {bits}".strip(): n for key_type, bits, n in conn.execute(
+            "SELECT key_type, COALESCE(key_bits, ''), COUNT(*) FROM certs "
+            "GROUP BY key_type, key_bits ORDER BY COUNT(*) DESC, key_type, key_bits")},
+        "issuers": [{"issuer": name, "certs": count, "endpoints": n, "self_signed": own}
+                    for name, count, n, own in conn.execute(
+                        "SELECT issuer_name, certs, endpoints, self_signed FROM cert_issuers "
+                        "ORDER BY certs DESC, issuer_name LIMIT ?", (issuers,))],
+    }
+
+
+def certs(conn, expiry=None, issuer=None, offset=0, limit=10):
+    # -> (total, [cert, ...]) soonest notAfter first.
+    where, params = [], []
+    if expiry:
+        where.append("expiry = ?")
+        params.append(expiry)
+    if issuer is not None:
+        where.append("issuer_name = ?")
+        params.append(issuer)
+    where = f"WHERE {' AND '.join(where)}" if where else ""
+    total = conn.execute(f"SELECT COUNT(*) FROM certs {where}", params).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT {', '.join(CERT_COLUMNS)} FROM certs {where} "
+        "ORDER BY days_left IS NULL, days_left, fingerprint LIMIT ? OFFSET ?", params + [limit, offset])
+    return total, [dict(zip(CERT_COLUMNS, row)) for row in rows]
@@ -0,0 +1,31 @@
+import hashlib
+import os
+
+from . import scan_data, scan_index
+from .config import SCAN_ROOT
+
+# Version tokens name the state of an endpoint's inputs without computing
+# its output, so web.respond() can answer If-None-Match up front.
+
+
+def date_version(form):
+    # The (mtime, size, inode) of every scan file of the date -- exactly
+    # what the scan index refreshes from -- plus the get-scan-data cache.
+    # Known before any refresh runs, and different as soon as a file is
+    # added, removed or rewritten in place, so neither a 304 nor a render
+    # cache hit can stand in for a refresh that would change the answer.
+    date = form.getfirst("date")
+    if not date or not date.isdigit() or form.getfirst("rebuild") == "true":
+        return None
+
+    try:
+        files = scan_index.stat_files(SCAN_ROOT / date)
+    except OSError:
+        return None
+
+    try:
+        cache_mtime = os.stat(scan_data.cache_path(date)).st_mtime_ns
+    except OSError:
+        cache_mtime = 0
+    signature = repr((scan_index.SCHEMA_VERSION, sorted(files.items()), cache_mtime)).encode()
+    return hashlib.blake2b(signature, digest_size=12).hexdigest()
@@ -0,0 +1,237 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+import zlib
+from urllib.parse import parse_qs
+
+from . import metrics, renders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ("application/json", "image/svg+xml", "text/html", "text/css", "text/javascript")
+MIN_COMPRESS_BYTES = 1024
+
+
+class Response:
+    # body is bytes, or an iterable of byte chunks for a streamed response;
+    # streamed bodies are never hashed, render-cached or given a length.
+    def __init__(self, body, content_type="application/json", status="200 OK", headers=None):
+        self.body = body.encode() if isinstance(body, str) else body
+        self.content_type = content_type
+        self.status = status
+        self.headers = headers or []
+        self.etag = None
+        # Compressed bodies by content-coding, filled on first use so a
+        # response is only ever compressed once per coding.
+        self.encoded = {}
+
+
+def json_response(data, status="200 OK"):
+    with metrics.phase("json"):
+        return Response(json.dumps(data, separators=(",", ":")), status=status)
+
+
+def svg_response(svg):
+    return Response(svg, "image/svg+xml")
+
+
+def not_modified(etag):
+    response = Response(b"", status="304 Not Modified")
+    response.etag = etag
+    return response
+
+
+class Form:
+    # The slice of cgi.FieldStorage the endpoints use, for GET query strings.
+    def __init__(self, query_string):
+        self._params = parse_qs(query_string)
+
+    def getfirst(self, name, default=None):
+        values = self._params.get(name)
+        return values[0] if values else default
+
+    def canonical(self):
+        return tuple(sorted((name, tuple(values)) for name, values in self._params.items()))
+
+
+def int_param(value, default, low, high):
+    # A query parameter as an int clamped to low..high; default when it is
+    # missing or not a number.
+    try:
+        return max(low, min(high, int(value)))
+    except (TypeError, ValueError):
+        return default
+
+
+def make_etag(*parts):
+    digest = hashlib.blake2b("\0".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(environ, etag):
+    header = environ.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    base = etag.strip('"')
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        # Encoded variants carry a -gzip/-br suffix on the same base tag.
+        if tag.rsplit("-", 1)[0] == base or tag == base:
+            return True
+    return False
+
+
+def script_name(endpoint):
+    return endpoint.__name__.rsplit(".", 1)[-1].replace("_", "-") + ".py"
+
+
+def render(endpoint, form, token, handle=None):
+    # endpoint.handle(form) -- or handle(), when the caller can produce the
+    # same response more cheaply -- answered from the render cache when the
+    # endpoint opts in (render_cache = True) and its inputs have a version
+    # token. A hit
+    # skips the handler and with it the index refresh, so the token has to
+    # change with the scan files themselves (versions.date_version). The
+    # version also covers the endpoint's own code, so editing a chart
+    # script retires its renders.
+    if not token or not getattr(endpoint, "render_cache", False):
+        return handle() if handle else endpoint.handle(form)
+
+    key = (script_name(endpoint), form.getfirst("date") or "", json.dumps(form.canonical()),
+           f"{token}:{os.stat(endpoint.__file__).st_mtime_ns}")
+    with metrics.phase("cache"):
+        hit = renders.get(*key)
+    if hit is not None:
+        return Response(hit[1], hit[0])
+
+    response = handle() if handle else endpoint.handle(form)
+    if response.status == "200 OK" and isinstance(response.body, bytes):
+        with metrics.phase("cache"):
+            try:
+                renders.put(*key, response.content_type, response.body)
+            except Exception:
+                metrics.count("exceptions")
+    return response
+
+
+def respond(endpoint, form, environ):
+    # Runs an endpoint with conditional-GET handling. When the endpoint can
+    # name the version of its inputs up front (endpoint.version), a matching
+    # If-None-Match is answered before any work is done; otherwise the ETag
+    # falls back to a digest of the body.
+    metrics.begin(script_name(endpoint))
+    version = getattr(endpoint, "version", None)
+    token = version(form) if version else None
+    etag = None
+    if token:
+        code = os.stat(endpoint.__file__).st_mtime_ns
+        etag = make_etag(endpoint.__name__, code, form.canonical(), token)
+    if etag and etag_matches(environ, etag):
+        return not_modified(etag)
+
+    response = render(endpoint, form, token)
+    if response.status != "200 OK":
+        return response
+
+    streamed = not isinstance(response.body, bytes)
+    if response.etag is None:
+        if etag is None and streamed:
+            return response
+        response.etag = etag or make_etag(hashlib.blake2b(response.body).hexdigest())
+    if etag_matches(environ, response.etag):
+        if streamed and hasattr(response.body, "close"):
+            response.body.close()
+        return not_modified(response.etag)
+    return response
+
+
+def _compress_stream(chunks, coding):
+    compressor = (brotli.Compressor() if coding == "br"
+                  else zlib.compressobj(6, zlib.DEFLATED, 31))
+    try:
+        for chunk in chunks:
+            data = compressor.process(chunk) if coding == "br" else compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish() if coding == "br" else compressor.flush()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+
+
+def encode(response, environ):
+    # -> (body, headers) for the client's Accept-Encoding. body is bytes, or
+    # an iterator of chunks when the response is streamed.
+    headers = [("Content-Type", response.content_type)] + response.headers
+    if response.etag:
+        headers += [("ETag", response.etag), ("Cache-Control", "no-cache")]
+
+    body = response.body
+    streamed = not isinstance(body, bytes)
+    coding = None
+    if response.content_type in COMPRESSIBLE:
+        headers.append(("Vary", "Accept-Encoding"))
+        accepted = {c.split(";")[0].strip() for c in environ.get("HTTP_ACCEPT_ENCODING", "").split(",")}
+        if streamed or len(body) >= MIN_COMPRESS_BYTES:
+            if brotli is not None and "br" in accepted:
+                coding = "br"
+            elif "gzip" in accepted:
+                coding = "gzip"
+
+    if coding:
+        if streamed:
+            body = _compress_stream(body, coding)
+        else:
+            if coding not in response.encoded:
+                with metrics.phase("compress"):
+                    response.encoded[coding] = (brotli.compress(body) if coding == "br"
+                                                else gzip.compress(body, compresslevel=6, mtime=0))
+            body = response.encoded[coding]
+        headers.append(("Content-Encoding", coding))
+        if response.etag:
+            headers = [(k, f'{v[:-1]}-{coding}"' if k == "ETag" else v) for k, v in headers]
+
+    # Streamed bodies are produced after the headers go out, so their
+    # timing covers everything up to the first byte.
+    timing = metrics.finish(response.status, response.content_type)
+    if timing:
+        headers.append(("Server-Timing", timing))
+
+    if streamed:
+        return body, headers
+    return body, headers + [("Content-Length", str(len(body)))]
+
+
+def run_cgi(endpoint):
+    form = Form(os.environ.get("QUERY_STRING", ""))
+    response = respond(endpoint, form, os.environ)
+    body, headers = encode(response, os.environ)
+
+    head = [] if response.status == "200 OK" else [f"Status: {response.status}"]
+    head += [f"{name}: {value}" for name, value in headers]
+
+    out = sys.stdout.buffer
+    out.write(("\n".join(head) + "\n\n").encode())
+    if isinstance(body, bytes):
+        out.write(body)
+    else:
+        try:
+            for chunk in body:
+                out.write(chunk)
+                out.flush()
+        finally:
+            close = getattr(body, "close", None)
+            if close:
+                close()
+    out.flush()
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+
+# Archives dates that are done changing, one compressed tar per date:
+#   ./compact.py                    (every date older than 90 days)
+#   ./compact.py --older-than 30 --dry-run
+#   ./compact.py 20240101 --format gz
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "cgi-bin"))
+
+from nmapdash.compact import main
+
+if __name__ == "__main__":
+    sys.exit(main())
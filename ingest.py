@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+
+# Keeps scan-cache/ warm so no dashboard request pays a cold parse:
+#   ./ingest.py                 (watch NMAP_SCAN_ROOT; inotify if available)
+#   ./ingest.py --once          (build every stale date and exit, e.g. from cron)
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "cgi-bin"))
+
+from nmapdash.ingest import main
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+const DASHBOARD_PANELS = "summary,ports,os,tls,services,subnets";
+
 document.addEventListener('DOMContentLoaded', () => {
   const tabs = document.querySelectorAll('.tab-btn');
   const tabContents = document.querySelectorAll('.tab-content');
@@ -18,6 +20,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
       if (tabId === 'hosts') {
         initHostsTab();
+      } else if (tabId === 'history') {
+        initHistoryTab();
       }
     });
   });
@@ -35,30 +39,28 @@ document.addEventListener('DOMContentLoaded', () => {
   // --- Load Scan Dates from CGI ---
   fetch('cgi-bin/get-scan-dates.py')
     .then(res => res.json())
-    .then(scanDates => {
-      if (!Array.isArray(scanDates) || scanDates.length === 0) {
+    .then(manifest => {
+      if (!Array.isArray(manifest) || manifest.length === 0) {
         scanDateDropdown.innerHTML = `<option disabled>No scan dates found</option>`;
         return;
       }
 
-      scanDates.forEach(date => {
+      const scanDates = manifest.map(entry => entry.date);
+      manifest.forEach(entry => {
         const opt = document.createElement('option');
-        opt.value = date;
-        opt.textContent = date;
+        opt.value = entry.date;
+        opt.textContent = entry.live_hosts === null
+          ? `${entry.date} (${entry.files} files)`
+          : `${entry.date} (${entry.live_hosts} live)`;
+        opt.title = `${entry.files} files, ${(entry.bytes / 1048576).toFixed(1)} MB, cache ${entry.cache}, ` +
+          `modified ${new Date(entry.modified * 1000).toLocaleString()}`;
         scanDateDropdown.appendChild(opt);
       });
 
       scanDateDropdown.value = scanDates[0];
       statusDate.textContent = formatDate(scanDates[0]);
 
-      loadAndCacheScanData(scanDates[0]).then(() => {
-        if (!window.cachedScanData) return;
-
-        loadSummaryForDate(scanDates[0]);
-        updatePortDistributionChartJS(scanDates[0]);
-        updateOSDistributionChartJS(scanDates[0]);
-        setupChartToggles(scanDates[0]);
-      });
+      loadDashboard(scanDates[0]);
 
       // updatePortDistributionChart(scanDates[0]);
       // updatePortHostGraph(scanDates[0]);
@@ -69,21 +71,44 @@ document.addEventListener('DOMContentLoaded', () => {
     });
 
   // --- Update Sidebar Stats ---
-  function loadSummaryForDate(date) {
-    fetch(`cgi-bin/get-scan-summary.py?date=${date}`)
+  function showSummary(data) {
+    if (!data || data.error) {
+      console.error("Scan summary error:", data && data.error);
+      return;
+    }
+
+    document.getElementById("status-hosts").textContent = data.total_hosts;
+    document.getElementById("status-live").textContent = data.live_hosts;
+    document.getElementById("status-ports").textContent = data.total_ports;
+    document.getElementById("status-unique").textContent = data.unique_ports;
+  }
+
+  // --- Load Every Dashboard Panel for a Date ---
+  // One get-dashboard.py request replaces the summary, the full
+  // get-scan-data.py download and the per-card requests.
+  function loadDashboard(date) {
+    return fetch(`cgi-bin/get-dashboard.py?date=${date}&panels=${DASHBOARD_PANELS}`)
       .then(res => res.json())
       .then(data => {
-        if (data.error) {
-          console.error("Scan summary error:", data.error);
-          return;
-        }
-
-        document.getElementById("status-hosts").textContent = data.total_hosts;
-        document.getElementById("status-live").textContent = data.live_hosts;
-        document.getElementById("status-ports").textContent = data.total_ports;
-        document.getElementById("status-unique").textContent = data.unique_ports;
+        if (data.error) throw new Error(data.error);
+        const panels = data.panels;
+        window.cachedScanData = {
+          port_distribution: panels.ports.error ? null : panels.ports,
+          os_distribution: panels.os.error ? null : panels.os
+        };
+
+        showSummary(panels.summary);
+        updatePortDistributionChartJS(date);
+        updateOSDistributionChartJS(date);
+        setupChartToggles(date);
+        renderTLSCards(panels.tls);
+        renderServiceTops(panels.services);
+        renderSubnetCards(panels.subnets);
       })
-      .catch(err => console.error("Failed to load summary:", err));
+      .catch(err => {
+        console.error("Failed to load dashboard:", err);
+        window.cachedScanData = null;
+      });
   }
 
 function setupChartToggles(scanDate) {
@@ -112,13 +137,7 @@ function setupChartToggles(scanDate) {
   scanDateDropdown.addEventListener('change', () => {
     const selectedDate = scanDateDropdown.value;
     statusDate.textContent = formatDate(selectedDate);
-    loadAndCacheScanData(selectedDate).then(() => {
-      if (!window.cachedScanData) return;
-        loadSummaryForDate(selectedDate);
-        updatePortDistributionChartJS(selectedDate);
-        updateOSDistributionChartJS(selectedDate);
-        setupChartToggles(selectedDate);
-    });
+    loadDashboard(selectedDate);
   });
 
   // --- Dark Mode Toggle ---
@@ -228,18 +247,6 @@ function setupChartToggles(scanDate) {
     });
   }
 
-  function loadAndCacheScanData(date) {
-    return fetch(`cgi-bin/get-scan-data.py?date=${date}`)
-      .then(res => res.json())
-      .then(data => {
-        window.cachedScanData = data;
-    })
-    .catch(err => {
-      console.error("Failed to load scan data:", err);
-      window.cachedScanData = null;
-    });
-  }
-
 });
 
 
@@ -203,6 +203,209 @@ function updateOSDistributionChartJS(scanDate) {
 }
 
 
+const CERT_EXPIRY_LABELS = {
+  expired: "Expired",
+  "7d": "Expires within 7 days",
+  "30d": "Expires within 30 days",
+  "90d": "Expires within 90 days",
+  "365d": "Expires within a year",
+  later: "Valid for a year or more",
+  unknown: "No expiry date"
+};
+
+function renderTLSCards(data) {
+  // The dashboard's "tls" panel: per-date certificate aggregates, expiry
+  // counted from the scan date.
+  const info = document.getElementById("cert-info");
+  const caChart = document.getElementById("ca-breakdown-chart");
+  if (!info || !caChart) return;
+  if (!data || data.error) {
+    info.innerHTML = "<div>No certificate data available</div>";
+    caChart.innerHTML = "";
+    return;
+  }
+
+  const rows = [
+    ["Certificates", data.certificates],
+    ["TLS endpoints", data.endpoints],
+    ["Self-signed", data.self_signed]
+  ];
+  Object.entries(CERT_EXPIRY_LABELS).forEach(([bucket, label]) => {
+    const count = data.expiry[bucket]?.certs || 0;
+    if (count || bucket === "expired") rows.push([label, count]);
+  });
+
+  const table = document.createElement("table");
+  table.className = "port-table data-table";
+  const tbody = document.createElement("tbody");
+  rows.forEach(([label, value]) => {
+    const tr = tbody.insertRow();
+    tr.insertCell().textContent = label;
+    tr.insertCell().textContent = value;
+  });
+  table.appendChild(tbody);
+  info.innerHTML = "";
+  info.appendChild(table);
+
+  const issuers = {};
+  data.issuers.forEach(entry => {
+    issuers[entry.issuer || "(unknown)"] = entry.certs;
+  });
+  window.renderSVGBarChart(caChart, issuers, {
+    title: "Certificates by Issuer",
+    xLabel: "Certificates",
+    yLabel: "Issuer"
+  });
+  attachOverlayZoom("ca-breakdown-chart", "Certificates by Issuer");
+}
+
+
+function renderServiceTops(services) {
+  // The dashboard's "services" panel: live hosts per (service, product).
+  const container = document.getElementById("service-tops-chart");
+  if (!container) return;
+  if (!Array.isArray(services)) {
+    container.innerHTML = "<div>No service data available</div>";
+    return;
+  }
+
+  const counts = {};
+  services.forEach(entry => {
+    const label = [entry.service || "unknown", entry.product].filter(Boolean).join(" / ");
+    counts[label] = entry.hosts;
+  });
+  window.renderSVGBarChart(container, counts, {
+    title: "Top Services & Daemons",
+    xLabel: "Hosts",
+    yLabel: "Service"
+  });
+  attachOverlayZoom("service-tops-chart", "Top Services & Daemons");
+}
+
+
+function renderSVGWaffleChart(container, data, options = {}) {
+  // 10x10 grid, one cell per percent; cells go to the largest shares
+  // first, leftovers by largest remainder.
+  if (typeof container === "string") {
+    container = document.getElementById(container);
+  }
+  if (!container) return;
+
+  const CELL = options.cell || 24;
+  const GAP = options.gap || 3;
+  const FONT_SIZE = options.fontSize || 12;
+  const TEXT_COLOR = options.textColor || '#333';
+  const title = options.title || '';
+
+  const entries = Object.entries(data)
+    .filter(([_, val]) => typeof val === 'number' && val > 0);
+  const total = entries.reduce((sum, [_, val]) => sum + val, 0);
+
+  container.innerHTML = "";
+  if (total === 0) {
+    container.innerHTML = '<div>No data to display</div>';
+    return;
+  }
+
+  const shares = entries.map(([label, value]) => {
+    const exact = value / total * 100;
+    return { label, value, cells: Math.floor(exact), rest: exact - Math.floor(exact) };
+  });
+  let left = 100 - shares.reduce((sum, s) => sum + s.cells, 0);
+  [...shares].sort((a, b) => b.rest - a.rest).forEach(s => {
+    if (left > 0) { s.cells++; left--; }
+  });
+
+  const grid = 10 * (CELL + GAP);
+  const legendTop = grid + 50;
+  const width = grid + 40;
+  const height = legendTop + shares.length * (FONT_SIZE + 8);
+
+  const svgNS = "http://www.w3.org/2000/svg";
+  const svg = document.createElementNS(svgNS, "svg");
+  svg.setAttribute("viewBox", `0 0 ${width} ${height}`);
+  svg.setAttribute("preserveAspectRatio", "xMidYMid meet");
+  svg.setAttribute("xmlns", svgNS);
+  svg.setAttribute("font-family", "sans-serif");
+  svg.classList.add("chart-object");
+
+  const appendText = (attrs, text) => {
+    const el = document.createElementNS(svgNS, "text");
+    for (const [k, v] of Object.entries(attrs)) el.setAttribute(k, v);
+    el.textContent = text;
+    svg.appendChild(el);
+  };
+
+  if (title) {
+    appendText({ x: width / 2, y: 20, "font-size": FONT_SIZE, "text-anchor": "middle", fill: TEXT_COLOR }, title);
+  }
+
+  let cell = 0;
+  shares.forEach((share, index) => {
+    const color = options.colorMap?.[share.label] || `hsl(${index * 36}, 70%, 70%)`;
+    for (let i = 0; i < share.cells; i++, cell++) {
+      const rect = document.createElementNS(svgNS, "rect");
+      rect.setAttribute("x", 20 + (cell % 10) * (CELL + GAP));
+      rect.setAttribute("y", 35 + Math.floor(cell / 10) * (CELL + GAP));
+      rect.setAttribute("width", CELL);
+      rect.setAttribute("height", CELL);
+      rect.setAttribute("rx", 3);
+      rect.setAttribute("fill", color);
+      const tip = document.createElementNS(svgNS, "title");
+      tip.textContent = `${share.label}: ${share.value}`;
+      rect.appendChild(tip);
+      svg.appendChild(rect);
+    }
+
+    const y = legendTop + index * (FONT_SIZE + 8);
+    const swatch = document.createElementNS(svgNS, "rect");
+    swatch.setAttribute("x", 20);
+    swatch.setAttribute("y", y - FONT_SIZE + 2);
+    swatch.setAttribute("width", FONT_SIZE);
+    swatch.setAttribute("height", FONT_SIZE);
+    swatch.setAttribute("fill", color);
+    svg.appendChild(swatch);
+    appendText({ x: 20 + FONT_SIZE + 6, y, "font-size": FONT_SIZE, fill: TEXT_COLOR },
+               `${share.label}: ${share.value} (${(share.value / total * 100).toFixed(1)}%)`);
+  });
+
+  container.appendChild(svg);
+}
+
+
+function renderSubnetCards(data) {
+  // The dashboard's "subnets" panel. Host Distribution: the busiest /24s.
+  // Waffle: each /16's share of the live hosts, or each /24's when
+  // everything sits in one /16.
+  const barChart = document.getElementById("host-distribution-chart");
+  const waffle = document.getElementById("waffle-chart-svg");
+  if (!barChart || !waffle) return;
+  if (!data || data.error) {
+    barChart.innerHTML = waffle.innerHTML = "<div>No subnet data available</div>";
+    return;
+  }
+
+  const counts = {};
+  data.by_24.forEach(s => { counts[s.network] = s.hosts; });
+  window.renderSVGBarChart(barChart, counts, {
+    title: "Live Hosts per /24",
+    xLabel: "Live Hosts",
+    yLabel: "Subnet"
+  });
+  attachOverlayZoom("host-distribution-chart", "Live Hosts per /24");
+
+  const shares = {};
+  let shown = 0;
+  (data.networks_16 > 1 ? data.by_16 : data.by_24.slice(0, 9)).forEach(s => {
+    shares[s.network] = s.hosts;
+    shown += s.hosts;
+  });
+  if (data.hosts > shown) shares["Other"] = data.hosts - shown;
+  renderSVGWaffleChart(waffle, shares, { title: "Share of Live Hosts by Subnet" });
+  attachOverlayZoom("waffle-chart-svg", "Share of Live Hosts by Subnet");
+}
+
+
 function attachOverlayZoom(containerId, title) {
   const container = document.getElementById(containerId);
   const overlay = container?.parentElement?.querySelector(".svg-click-overlay");
@@ -493,6 +696,7 @@ function exportTableToCSV(table) {
 
 window.renderSVGBarChart = renderSVGBarChart;
 window.renderSVGPieChart = renderSVGPieChart;
+window.renderSVGWaffleChart = renderSVGWaffleChart;
 
 
 
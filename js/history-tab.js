@@ -0,0 +1,96 @@
+function initHistoryTab() {
+  const container = document.getElementById("history-container");
+  const dateOptions = Array.from(document.querySelectorAll("#scan-date option"))
+    .map(opt => opt.value)
+    .filter(Boolean);
+  if (!container || dateOptions.length === 0) return;
+
+  const fromSelect = document.getElementById("history-from");
+  const toSelect = document.getElementById("history-to");
+
+  if (fromSelect.options.length === 0) {
+    dateOptions.forEach(date => {
+      fromSelect.add(new Option(date, date));
+      toSelect.add(new Option(date, date));
+    });
+    toSelect.value = dateOptions[0];
+    fromSelect.value = dateOptions[1] || dateOptions[0];
+    fromSelect.addEventListener("change", loadHistoryDiff);
+    toSelect.addEventListener("change", loadHistoryDiff);
+  }
+
+  loadHistoryDiff();
+}
+
+function loadHistoryDiff() {
+  const from = document.getElementById("history-from").value;
+  const to = document.getElementById("history-to").value;
+  const results = document.getElementById("history-results");
+  results.innerHTML = "<p>Loading…</p>";
+
+  fetch(`cgi-bin/get-history.py?from=${from}&to=${to}`)
+    .then(res => res.json())
+    .then(diff => {
+      if (diff.error) throw new Error(diff.error);
+      renderHistoryDiff(results, diff);
+    })
+    .catch(err => {
+      console.error("Failed to load history:", err);
+      results.innerHTML = `<p>Failed to load history: ${err.message}</p>`;
+    });
+}
+
+function renderHistoryDiff(results, diff) {
+  const sections = [
+    ["New Hosts", diff.new_hosts.map(ip => [ip])],
+    ["Vanished Hosts", diff.vanished_hosts.map(ip => [ip])],
+    ["Newly Opened Ports", diff.opened.map(p => [p.ip, `${p.port}/${p.protocol}`, p.service, p.version])],
+    ["Closed Ports", diff.closed.map(p => [p.ip, `${p.port}/${p.protocol}`, p.service, p.state])],
+    ["Service / Version Changes", diff.changed.map(p => [
+      p.ip, `${p.port}/${p.protocol}`,
+      `${p.old.service} ${p.old.version}`.trim(),
+      `${p.new.service} ${p.new.version}`.trim()
+    ])],
+  ];
+  const headers = {
+    "New Hosts": ["IP"],
+    "Vanished Hosts": ["IP"],
+    "Newly Opened Ports": ["IP", "Port", "Service", "Version"],
+    "Closed Ports": ["IP", "Port", "Service", "Now"],
+    "Service / Version Changes": ["IP", "Port", "Before", "After"],
+  };
+
+  results.innerHTML = "";
+  const grid = document.createElement("section");
+  grid.classList.add("dashboard-grid");
+
+  sections.forEach(([title, rows]) => {
+    const card = document.createElement("div");
+    card.classList.add("dashboard-card");
+
+    const heading = document.createElement("h3");
+    heading.classList.add("card-title");
+    heading.textContent = `${title} (${rows.length})`;
+    card.appendChild(heading);
+
+    if (rows.length > 0) {
+      const table = document.createElement("table");
+      table.classList.add("data-table");
+      const headRow = table.createTHead().insertRow();
+      headers[title].forEach(text => {
+        const th = document.createElement("th");
+        th.textContent = text;
+        headRow.appendChild(th);
+      });
+      const tbody = table.createTBody();
+      rows.forEach(cells => {
+        const row = tbody.insertRow();
+        cells.forEach(text => { row.insertCell().textContent = text || ""; });
+      });
+      card.appendChild(table);
+    }
+    grid.appendChild(card);
+  });
+
+  results.appendChild(grid);
+}
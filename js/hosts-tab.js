@@ -1,16 +1,79 @@
 console.log("Hosts tab JS loaded");
 
+const HOSTS_PAGE_SIZE = 100;
+
+// Paging, sorting and the OS/port/state/service filters are answered by
+// get-hosts.py; the remaining columns sort and filter within the page. The
+// Port column sorts hosts by their number of open ports.
+const hostsQuery = { date: null, offset: 0, sort: "ip", order: "asc", filters: {} };
+const SERVER_SORT = { 0: "ip", 1: "hostname", 2: "os", 3: "open_ports" };
+const SERVER_FILTER = { 2: "os", 3: "port", 4: "state", 5: "service" };
+
 function loadAndRenderHosts(scanDate) {
   console.log("Scan date selected:", scanDate);
-  fetch(`cgi-bin/get-scan-data.py?date=${scanDate}`)
+  if (hostsQuery.date !== scanDate) {
+    hostsQuery.date = scanDate;
+    hostsQuery.offset = 0;
+  }
+
+  const params = new URLSearchParams({
+    date: scanDate,
+    offset: hostsQuery.offset,
+    limit: HOSTS_PAGE_SIZE,
+    sort: hostsQuery.sort,
+    order: hostsQuery.order,
+  });
+  Object.entries(hostsQuery.filters).forEach(([key, value]) => {
+    if (value) params.set(key, value);
+  });
+
+  fetch(`cgi-bin/get-hosts.py?${params}`)
     .then(res => res.json())
     .then(data => {
-      const hosts = data.hosts || {};
+      if (data.error) throw new Error(data.error);
+      const hosts = {};
+      (data.hosts || []).forEach(host => { hosts[host.ip] = host; });
       renderHostsTable(hosts);
+      renderHostsPager(data.total || 0);
     })
     .catch(err => console.error("Failed to load hosts data:", err));
 }
 
+function reloadHosts() {
+  if (hostsQuery.date) loadAndRenderHosts(hostsQuery.date);
+}
+
+function renderHostsPager(total) {
+  const container = document.getElementById("hosts-table-container");
+  const pager = document.createElement("div");
+  pager.classList.add("hosts-pager");
+
+  const first = total ? hostsQuery.offset + 1 : 0;
+  const last = Math.min(hostsQuery.offset + HOSTS_PAGE_SIZE, total);
+
+  const prev = document.createElement("button");
+  prev.textContent = "‹ Prev";
+  prev.disabled = hostsQuery.offset === 0;
+  prev.addEventListener("click", () => {
+    hostsQuery.offset = Math.max(0, hostsQuery.offset - HOSTS_PAGE_SIZE);
+    reloadHosts();
+  });
+
+  const next = document.createElement("button");
+  next.textContent = "Next ›";
+  next.disabled = last >= total;
+  next.addEventListener("click", () => {
+    hostsQuery.offset += HOSTS_PAGE_SIZE;
+    reloadHosts();
+  });
+
+  const label = document.createElement("span");
+  label.textContent = ` Hosts ${first}–${last} of ${total} `;
+
+  pager.append(prev, label, next);
+  container.appendChild(pager);
+}
+
 function renderHostsTable(hosts) {
   const container = document.getElementById("hosts-table-container");
   container.innerHTML = "";
@@ -30,7 +93,17 @@ function renderHostsTable(hosts) {
     th.style.cursor = "pointer";
     th.dataset.index = index;
     th.dataset.order = "asc";
+    if (SERVER_SORT[index] === hostsQuery.sort) {
+      th.dataset.order = hostsQuery.order === "asc" ? "desc" : "asc";
+    }
     th.addEventListener("click", () => {
+      if (SERVER_SORT[index]) {
+        hostsQuery.order = hostsQuery.sort === SERVER_SORT[index] && hostsQuery.order === "asc" ? "desc" : "asc";
+        hostsQuery.sort = SERVER_SORT[index];
+        hostsQuery.offset = 0;
+        reloadHosts();
+        return;
+      }
       sortTable(tbody, index, th.dataset.order === "asc");
       th.dataset.order = th.dataset.order === "asc" ? "desc" : "asc";
     });
@@ -39,13 +112,17 @@ function renderHostsTable(hosts) {
 
   // Add filter input row
   const filterRow = thead.insertRow();
-  headers.forEach(() => {
+  headers.forEach((_, index) => {
     const td = document.createElement("td");
     const input = document.createElement("input");
     input.type = "text";
     input.placeholder = "Filter...";
     input.style.width = "95%";
     input.dataset.filter = "true";
+    if (SERVER_FILTER[index]) {
+      input.value = hostsQuery.filters[SERVER_FILTER[index]] || "";
+      input.dataset.server = SERVER_FILTER[index];
+    }
     td.appendChild(input);
     filterRow.appendChild(td);
   });
@@ -56,8 +133,10 @@ function renderHostsTable(hosts) {
   let colorIndex = 0;
 
   Object.entries(hosts).forEach(([ip, info]) => {
-    const ports = Object.entries(info.ports || {});
-    if (ports.length === 0) return;
+    // A host without ports still gets its row, so every host on the page
+    // (and in the pager's count) is shown.
+    let ports = Object.entries(info.ports || {});
+    if (ports.length === 0) ports = [["", {}]];
 
     const rowColor = bandColors[colorIndex % bandColors.length];
     colorIndex++;
@@ -104,6 +183,14 @@ function renderHostsTable(hosts) {
   container.appendChild(table);
   // Enable filters
   thead.querySelectorAll("input[data-filter]").forEach((input, colIndex) => {
+    if (input.dataset.server) {
+      input.addEventListener("change", () => {
+        hostsQuery.filters[input.dataset.server] = input.value.trim();
+        hostsQuery.offset = 0;
+        reloadHosts();
+      });
+      return;
+    }
     input.addEventListener("input", () => {
       const query = input.value.toLowerCase();
       Array.from(tbody.querySelectorAll("tr")).forEach(row => {
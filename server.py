@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+
+# Long-running alternative to running cgi-bin/ under a CGI web server:
+#   ./server.py --port 8080             (stdlib threaded WSGI server)
+#   gunicorn --chdir /path/to/repo server:application
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "cgi-bin"))
+
+from nmapdash.server import application, main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import atexit
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# nmapdash reads its directories from the environment at import time, so
+# the whole session shares one scratch SCAN_ROOT and CACHE_DIR; every test
+# generates its own dates in it.
+_ROOT = Path(tempfile.mkdtemp(prefix="nmapdash-tests-"))
+atexit.register(shutil.rmtree, _ROOT, ignore_errors=True)
+os.environ["NMAP_SCAN_ROOT"] = str(_ROOT / "scans")
+os.environ["NMAP_CACHE_DIR"] = str(_ROOT / "cache")
+os.environ["NMAP_METRICS_LOG"] = ""
+os.environ["NMAP_INGEST_WORKERS"] = "1"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "cgi-bin"))
+
+import pytest  # noqa: E402
+
+from nmapdash import synthetic  # noqa: E402
+from nmapdash.config import CACHE_DIR, SCAN_ROOT  # noqa: E402
+
+_dates = itertools.count(20200101)
+
+
+@pytest.fixture
+def make_date():
+    # make_date(**synthetic.generate kwargs) -> (date, scan_dir), a fresh date
+    # no other test has touched.
+    def make(**kwargs):
+        date = str(next(_dates))
+        scan_dir = SCAN_ROOT / date
+        synthetic.generate(scan_dir, **{"hosts": 200, "seed": int(date), **kwargs})
+        return date, scan_dir
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return make
+
+
+def drop_caches(date):
+    # Everything CACHE_DIR holds for one date, so the next build is cold.
+    for path in CACHE_DIR.glob(f"{date}.*"):
+        path.unlink()
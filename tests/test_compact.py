@@ -0,0 +1,44 @@
+import gzip
+
+import pytest
+from conftest import drop_caches
+
+from nmapdash import compact, scan_files
+from nmapdash.endpoints import get_scan_data
+from nmapdash.web import Form
+
+
+def _scan_data(date):
+    body = get_scan_data.handle(Form(f"date={date}")).body
+    return body if isinstance(body, bytes) else b"".join(body)
+
+
+def test_gzipped_files_read_like_plain(make_date):
+    date, scan_dir = make_date(malformed=3)
+    plain = _scan_data(date)
+
+    for path in list(scan_dir.glob("*.xml")):
+        with gzip.open(f"{path}.gz", "wb") as f:
+            f.write(path.read_bytes())
+        path.unlink()
+    drop_caches(date)
+    assert _scan_data(date) == plain
+
+    # And as gzipped members of an archive.
+    compact.compact(date, "tar")
+    drop_caches(date)
+    assert _scan_data(date) == plain
+
+
+@pytest.mark.parametrize("fmt", sorted(compact.FORMATS))
+def test_compacted_date_reads_like_directory(make_date, fmt):
+    if fmt == "zst" and scan_files.zstandard is None:
+        pytest.skip("zstandard is not installed")
+    date, scan_dir = make_date(malformed=3)
+    plain = _scan_data(date)
+
+    compact.compact(date, fmt)
+    assert not scan_dir.exists()
+    assert scan_files.source(scan_dir).name == f"{date}{compact.FORMATS[fmt]}"
+    drop_caches(date)
+    assert _scan_data(date) == plain
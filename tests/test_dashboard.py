@@ -0,0 +1,21 @@
+import json
+
+from nmapdash import scan_index
+from nmapdash.endpoints import get_dashboard, port_bubbles, port_host_sankey
+from nmapdash.web import Form
+
+
+def test_chart_panels_share_the_dashboard_index(make_date, monkeypatch):
+    date, scan_dir = make_date()
+    charts = {name: endpoint.handle(Form(f"date={date}")).body.decode()
+              for name, endpoint in (("bubbles", port_bubbles), ("sankey", port_host_sankey))}
+
+    # A fresh date, so both chart panels miss the render cache.
+    date, scan_dir = make_date(seed=int(date))
+    opened = []
+    open_index = scan_index.open_index
+    monkeypatch.setattr(scan_index, "open_index", lambda *args: opened.append(args) or open_index(*args))
+    body = get_dashboard.handle(Form(f"date={date}&panels=summary,bubbles,sankey")).body
+    panels = json.loads(body)["panels"]
+    assert len(opened) == 1
+    assert {name: panels[name] for name in charts} == charts
@@ -0,0 +1,23 @@
+from contextlib import closing
+
+from nmapdash import history, scan_data, scan_index
+
+
+def _cached_diffs():
+    with closing(history._connect()) as conn:
+        return set(conn.execute("SELECT old, new FROM diffs"))
+
+
+def test_build_does_not_index_neighbours(make_date):
+    old, old_dir = make_date()
+    new, new_dir = make_date()
+
+    b"".join(scan_data.build(new_dir, new))
+    assert not scan_index.index_path(old_dir).exists()
+    assert (old, new) not in _cached_diffs()
+
+    # Once both dates are built, the later build leaves their diff cached.
+    b"".join(scan_data.build(old_dir, old))
+    assert (old, new) in _cached_diffs()
+    with closing(history._connect()) as conn:
+        assert history.diff(old, new) == history._compute(conn, old, new)
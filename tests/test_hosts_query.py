@@ -0,0 +1,35 @@
+from contextlib import closing
+
+import pytest
+
+from nmapdash import scan_index
+from nmapdash.hosts_query import query_hosts
+
+SORT_KEYS = {
+    "ip": lambda host: scan_index.ip_sort_key(host["ip"]),
+    "open_ports": lambda host: (host["open_ports"], scan_index.ip_sort_key(host["ip"])),
+    "os": lambda host: (host["os"].lower(), scan_index.ip_sort_key(host["ip"])),
+    "hostname": lambda host: (host["hostname"].lower(), scan_index.ip_sort_key(host["ip"])),
+}
+
+
+def _pages(conn, sort, descending, filtered):
+    # Every host, a page at a time; filtered forces the non-range query.
+    hosts, offset = [], 0
+    while True:
+        total, page = query_hosts(conn, offset, 37, sort, descending, state="open" if filtered else None)
+        hosts += page
+        offset += 37
+        if offset >= total:
+            return total, hosts
+
+
+@pytest.mark.parametrize("sort", sorted(SORT_KEYS))
+@pytest.mark.parametrize("filtered", [False, True])
+def test_sort_directions(make_date, sort, filtered):
+    date, scan_dir = make_date(hosts=150)
+    with closing(scan_index.open_index(scan_dir)) as conn:
+        total, ascending = _pages(conn, sort, False, filtered)
+        assert len(ascending) == total
+        assert ascending == sorted(ascending, key=SORT_KEYS[sort])
+        assert _pages(conn, sort, True, filtered) == (total, ascending[::-1])
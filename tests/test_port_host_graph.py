@@ -0,0 +1,22 @@
+import html
+import re
+
+from nmapdash.endpoints import port_host_graph
+from nmapdash.web import Form
+
+
+def _links(body):
+    return [html.unescape(href) for href in re.findall(r'xlink:href="([^"]*)"', body)]
+
+
+def test_drill_down_keeps_mode(make_date):
+    date, scan_dir = make_date()
+    body = port_host_graph.handle(Form(f"date={date}&mode=groups")).body.decode()
+    links = _links(body)
+    assert links and all("&mode=groups&" in href for href in links)
+
+    # The expanded network is small enough that auto would draw single hosts;
+    # following the link must still draw groups.
+    query = links[0].split("?", 1)[1]
+    assert "xlink" not in port_host_graph.handle(Form(query.replace("mode=groups", "mode=auto"))).body.decode()
+    assert "xlink" in port_host_graph.handle(Form(query)).body.decode()
@@ -0,0 +1,112 @@
+import fcntl
+import threading
+import time
+
+from conftest import drop_caches
+
+from nmapdash import manifest, metrics, scan_data, scan_index
+
+
+def _build(scan_dir, date):
+    body = b"".join(scan_data.build(scan_dir, date))
+    return body, scan_data.packed_path(date).read_bytes()
+
+
+def test_parallel_build_matches_serial(make_date, monkeypatch):
+    date, scan_dir = make_date(hosts=300, malformed=3)
+    serial = _build(scan_dir, date)
+
+    drop_caches(date)
+    monkeypatch.setattr(scan_index, "INGEST_WORKERS", 2)
+    monkeypatch.setattr(scan_index, "INGEST_PARALLEL_MIN", 1)
+    monkeypatch.setattr(scan_index, "INGEST_CHUNK", 16)
+    assert _build(scan_dir, date) == serial
+
+
+def test_incremental_build_matches_full(make_date):
+    date, scan_dir = make_date(hosts=300)
+    b"".join(scan_data.build(scan_dir, date))
+
+    # One file rewritten, one removed, one added; then the same tree cold.
+    (scan_dir / "host000007.xml").write_text((scan_dir / "host000008.xml").read_text())
+    (scan_dir / "host000009.xml").unlink()
+    (scan_dir / "host000010.xml").rename(scan_dir / "host999999.xml")
+    incremental = _build(scan_dir, date)
+
+    drop_caches(date)
+    assert _build(scan_dir, date) == incremental
+
+
+def _lock_free(date):
+    with open(scan_data.lock_path(date), "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+
+def test_concurrent_builds_parse_once(make_date, monkeypatch):
+    date, scan_dir = make_date()
+    prepare = scan_data._prepare
+
+    def slow_prepare(*args):
+        # Long enough for every other thread to find the build running.
+        time.sleep(0.3)
+        prepare(*args)
+    monkeypatch.setattr(scan_data, "_prepare", slow_prepare)
+
+    counts, bodies = [], []
+    start = threading.Barrier(4)
+
+    def request():
+        metrics.begin("test")
+        start.wait()
+        bodies.append(b"".join(scan_data.build(scan_dir, date)))
+        counts.append(metrics._current().counts)
+        metrics.finish("200 OK", "application/json")
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(c["files_parsed"] for c in counts) == len(scan_index.stat_files(scan_dir))
+    assert sum(c["builds_joined"] for c in counts) == 3
+    assert len(set(bodies)) == 1
+
+
+def test_unread_stream_does_not_hold_the_lock(make_date):
+    date, scan_dir = make_date()
+    stream = scan_data.build(scan_dir, date)
+    assert _lock_free(date)
+    next(stream)
+    assert _lock_free(date)
+    stream.close()
+
+
+def test_waiter_gets_previous_cache_after_build_wait(make_date, monkeypatch):
+    date, scan_dir = make_date()
+    previous = b"".join(scan_data.build(scan_dir, date))
+    monkeypatch.setattr(scan_data, "BUILD_WAIT", 0.1)
+
+    with open(scan_data.lock_path(date), "a") as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        metrics.begin("test")
+        assert b"".join(scan_data.build(scan_dir, date)) == previous
+        assert metrics._current().counts["builds_joined"] == 1
+        metrics.finish("200 OK", "application/json")
+
+
+def test_empty_date_is_current_after_build(make_date):
+    date, scan_dir = make_date(hosts=0)
+    assert not scan_data.is_current(scan_dir, date)
+    b"".join(scan_data.build(scan_dir, date))
+    assert scan_data.is_current(scan_dir, date)
+
+    assert next(d for d in manifest.refresh() if d["date"] == date)["cache"] == "ready"
+
+    # A file appearing makes it stale again.
+    (scan_dir / "host000000.xml").write_text("")
+    assert not scan_data.is_current(scan_dir, date)
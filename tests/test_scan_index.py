@@ -0,0 +1,56 @@
+from contextlib import closing
+
+from nmapdash import adjacency, scan_index, subnets, tls
+
+# Tables refresh() derives from hosts and ports, with a key to order by.
+DERIVED = {"host_order": "host_id", "port_bitmaps": "portid", "bitmap_hosts": "bit",
+           "certs": "fingerprint", "cert_expiry": "bucket", "cert_issuers": "issuer_name",
+           "subnet_addrs": "family", "subnet_counts": "family, prefix, position"}
+
+
+def _derived(conn):
+    return {table: conn.execute(f"SELECT * FROM {table} ORDER BY {key}").fetchall()
+            for table, key in DERIVED.items()}
+
+
+def _full(conn, date):
+    # What the full rebuilds make of the same hosts and ports.
+    conn.execute("BEGIN")
+    try:
+        scan_index._rebuild_order(conn)
+        adjacency.rebuild(conn)
+        tls.rebuild(conn, date)
+        subnets.rebuild(conn)
+        return _derived(conn)
+    finally:
+        conn.execute("ROLLBACK")
+
+
+def _up_file(scan_dir, skip=()):
+    return next(path for path in sorted(scan_dir.glob("host*.xml"))
+                if 'state="up"' in path.read_text() and 'state="open"' in path.read_text()
+                and path.name not in skip)
+
+
+def test_incremental_refresh_matches_full_rebuild(make_date, monkeypatch):
+    date, scan_dir = make_date(hosts=300)
+    scan_index.open_index(scan_dir).close()
+    rebuilds = []
+    monkeypatch.setattr(adjacency, "rebuild", lambda conn, rebuild=adjacency.rebuild: (
+        rebuilds.append(1), rebuild(conn)))
+
+    # Same live IPs, one port closed: adjacency is updated in place.
+    closed = _up_file(scan_dir)
+    closed.write_text(closed.read_text().replace('state="open"', 'state="closed"', 1))
+    with closing(scan_index.open_index(scan_dir)) as conn:
+        assert not rebuilds
+        assert _derived(conn) == _full(conn, date)
+
+    # An IP now in two files, one gone dark, one file removed, one added.
+    copied = _up_file(scan_dir, {closed.name})
+    target = _up_file(scan_dir, {closed.name, copied.name})
+    target.write_text(copied.read_text())
+    _up_file(scan_dir, {closed.name, copied.name, target.name}).unlink()
+    (scan_dir / "host999999.xml").write_text(closed.read_text())
+    with closing(scan_index.open_index(scan_dir)) as conn:
+        assert _derived(conn) == _full(conn, date)
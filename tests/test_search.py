@@ -0,0 +1,14 @@
+from nmapdash import scan_data, scan_index, search
+
+
+def test_search_never_indexes_on_query(make_date):
+    date, scan_dir = make_date()
+
+    assert search.search("http", [date]) == (0, [], [date])
+    assert date in search.search("http")[2]
+    assert not scan_index.index_path(scan_dir).exists()
+
+    b"".join(scan_data.build(scan_dir, date))
+    total, results, unindexed = search.search("http", [date])
+    assert total and unindexed == []
+    assert {entry["date"] for entry in results} == {date}
@@ -0,0 +1,31 @@
+import json
+
+from nmapdash import scan_index
+from nmapdash.lru import IndexPool
+
+
+def _get(application, path, query):
+    status = []
+    body = application({"PATH_INFO": path, "QUERY_STRING": query},
+                       lambda s, headers: status.append(s))
+    return status[0], json.loads(b"".join(body))
+
+
+def test_pooled_index_follows_in_place_rewrites(make_date, monkeypatch):
+    monkeypatch.setattr(scan_index, "_pool", None)
+    from nmapdash import server
+    pool = IndexPool(2 * server.INDEX_CACHE_BYTES, server.INDEX_CACHE_BYTES)
+    monkeypatch.setattr(scan_index, "_pool", pool)
+
+    date, scan_dir = make_date(hosts=50)
+    status, first = _get(server.application, "/cgi-bin/get-scan-summary.py", f"date={date}")
+    assert status == "200 OK"
+    conn = pool.get(scan_index.index_path(scan_dir))
+    assert conn is not None
+    conn.close()
+
+    path = next(p for p in sorted(scan_dir.iterdir()) if '<status state="up"' in p.read_text())
+    path.write_text(path.read_text().replace('<status state="up"', '<status state="down"'))
+    _, again = _get(server.application, "/cgi-bin/get-scan-summary.py", f"date={date}")
+    assert again["live_hosts"] == first["live_hosts"] - 1
+    assert len(pool._idle) == 1
@@ -0,0 +1,58 @@
+import ipaddress
+import random
+from collections import defaultdict
+from contextlib import closing
+
+from nmapdash import scan_index, subnets, synthetic
+
+V6_HOSTS = ["2001:db8::1", "2001:db8::2:1", "2001:db8:0:1::5", "2001:db8:1::9", "fd00::1"]
+
+
+def _write_v6(scan_dir):
+    hosts = "".join(
+        f'<host><status state="up"/><address addr="{ip}" addrtype="ipv6"/><ports>'
+        + "".join(f'<port protocol="tcp" portid="{port}"><state state="open" reason="syn-ack"/></port>'
+                  for port in range(22, 22 + n))
+        + "</ports></host>\n" for n, ip in enumerate(V6_HOSTS, 1))
+    (scan_dir / "v6.xml").write_text(synthetic.HEAD + hosts + synthetic.TAIL)
+
+
+def _live(conn):
+    return [(ipaddress.ip_address(ip), open_ports) for ip, open_ports in conn.execute(
+        "SELECT hosts.ip, host_order.open_ports FROM host_order JOIN hosts ON hosts.id = host_order.host_id")]
+
+
+def _brute_rollup(live, prefix, family, within=None):
+    groups = defaultdict(lambda: [0, 0])
+    for ip, open_ports in live:
+        if ip.version != family or (within is not None and ip not in within):
+            continue
+        group = groups[ipaddress.ip_network((ip, prefix), strict=False)]
+        group[0] += 1
+        group[1] += open_ports
+    return [(str(net), hosts, n) for net, (hosts, n) in sorted(groups.items())]
+
+
+def test_subnets_match_brute_force(make_date):
+    date, scan_dir = make_date(hosts=500, subnets=40)
+    _write_v6(scan_dir)
+    with closing(scan_index.open_index(scan_dir)) as conn:
+        live = _live(conn)
+        assert sum(ip.version == 6 for ip, _ in live) == len(V6_HOSTS)
+        index = subnets.Subnets(conn)
+
+        for family, prefixes in ((4, (8, 12, 16, 20, 24, 28, 32)), (6, (16, 32, 48, 56, 64, 128))):
+            for prefix in prefixes:
+                assert index.rollup(prefix, family) == _brute_rollup(live, prefix, family)
+
+        rnd = random.Random(0)
+        networks = [ipaddress.ip_network("0.0.0.0/0"), ipaddress.ip_network("::/0"),
+                    ipaddress.ip_network("2001:db8::/32"), ipaddress.ip_network("192.168.0.0/16")]
+        for _ in range(50):
+            ip, _ = rnd.choice(live)
+            networks.append(ipaddress.ip_network((ip, rnd.randint(8, ip.max_prefixlen)), strict=False))
+        for network in networks:
+            inside = [(ip, n) for ip, n in live if ip.version == network.version and ip in network]
+            assert index.count(network) == (len(inside), sum(n for _, n in inside))
+            prefix = min(network.prefixlen + 4, network.max_prefixlen)
+            assert index.rollup(prefix, within=network) == _brute_rollup(live, prefix, network.version, network)
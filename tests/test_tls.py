@@ -0,0 +1,68 @@
+import shutil
+from contextlib import closing
+from pathlib import Path
+
+from nmapdash import parser, scan_index, tls
+from nmapdash.config import SCAN_ROOT
+
+FIXTURE = Path(__file__).parent / "fixtures" / "certs.xml"
+# The fixture's certificates are dated relative to this scan day.
+DATE = "20240301"
+
+
+def _certs():
+    return {(host["ip"], port["portid"]): port["cert"]
+            for host in parser.iter_hosts(str(FIXTURE)) for port in host["ports"]}
+
+
+def test_parse_cert():
+    certs = _certs()
+    expired = certs["10.9.0.1", "443"]
+    assert expired["fingerprint"] == "aabbcc01"  # sha256 over sha1, colons dropped
+    assert expired["issuer"] == "commonName=Example CA/organizationName=Example Org"
+    assert expired["issuer_name"] == "Example Org"
+    assert (expired["key_type"], expired["key_bits"]) == ("rsa", 2048)
+    assert expired["not_after"] == "2024-02-01T00:00:00"
+
+    assert certs["10.9.0.2", "443"]["fingerprint"] == "aabbcc02"  # spaces dropped
+    undated = certs["10.9.0.3", "443"]
+    assert (undated["not_after"], undated["key_bits"], undated["issuer_name"]) == ("", None, "Bare CA")
+    assert certs["10.9.0.4", "443"]["subject"] == certs["10.9.0.4", "443"]["issuer"]
+    assert certs["10.9.0.4", "993"] is None
+
+
+def test_bucket():
+    day = tls.scan_day(DATE)
+    assert tls.bucket(tls._days_left("2024-02-01T00:00:00", day)) == "expired"
+    assert tls.bucket(tls._days_left("2024-03-01", day)) == "7d"
+    assert tls.bucket(tls._days_left("2024-03-08", day)) == "30d"
+    assert tls.bucket(tls._days_left("2025-03-01", day)) == "later"
+    assert tls.bucket(tls._days_left("", day)) == "unknown"
+    assert tls.bucket(tls._days_left("not a date", day)) == "unknown"
+    assert tls.scan_day("latest") is None
+
+
+def test_index_aggregates():
+    scan_dir = SCAN_ROOT / DATE
+    scan_dir.mkdir(parents=True)
+    shutil.copy(FIXTURE, scan_dir / "certs.xml")
+    with closing(scan_index.open_index(scan_dir)) as conn:
+        total, certs = tls.certs(conn, limit=10)
+        summary = tls.summary(conn)
+        info = tls.tls_info(conn, DATE)
+
+    assert total == 4
+    assert [(c["fingerprint"], c["expiry"], c["days_left"], c["self_signed"], c["endpoints"]) for c in certs] == [
+        ("aabbcc01", "expired", -29, 0, 1),
+        ("aabbcc02", "7d", 5, 0, 2),
+        ("aabbcc04", "365d", 200, 1, 1),
+        ("aabbcc03", "unknown", None, 0, 1),
+    ]
+    assert {name: n["certs"] for name, n in summary["expiry"].items() if n["certs"]} == {
+        "expired": 1, "7d": 1, "365d": 1, "unknown": 1}
+    assert summary["expiry"]["7d"]["endpoints"] == 2
+    assert (summary["certificates"], summary["endpoints"], summary["self_signed"]) == (4, 5, 1)
+    assert summary["issuers"][0] == {"issuer": "Example Org", "certs": 2, "endpoints": 3, "self_signed": 0}
+    assert summary["key_sizes"] == {"rsa 2048": 1, "ec 256": 1, "rsa 4096": 1, "rsa": 1}
+    # Per endpoint; self-signed wins over expiry, and no notAfter counts as valid.
+    assert info == {"valid": 3, "expired": 1, "self_signed": 1}
@@ -0,0 +1,50 @@
+import json
+
+from nmapdash.endpoints import get_endpoint
+from nmapdash.web import Form, respond
+
+
+def _get(script, query, etag=None):
+    environ = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+    return respond(get_endpoint(script), Form(query), environ)
+
+
+def _rewrite_in_place(scan_dir):
+    # Same name, same directory listing (so the same directory mtime), new
+    # content: the first live host goes down.
+    for path in sorted(scan_dir.iterdir()):
+        text = path.read_text()
+        if '<status state="up"' in text:
+            path.write_text(text.replace('<status state="up"', '<status state="down"'))
+            return
+
+
+def test_etag_changes_when_a_file_is_rewritten_in_place(make_date):
+    date, scan_dir = make_date(hosts=50)
+    query = f"date={date}"
+    first = _get("get-scan-summary.py", query)
+    assert first.status == "200 OK"
+    assert _get("get-scan-summary.py", query, first.etag).status == "304 Not Modified"
+
+    dir_mtime = scan_dir.stat().st_mtime_ns
+    _rewrite_in_place(scan_dir)
+    assert scan_dir.stat().st_mtime_ns == dir_mtime
+
+    again = _get("get-scan-summary.py", query, first.etag)
+    assert again.status == "200 OK"
+    assert again.etag != first.etag
+    live = json.loads(first.body)["live_hosts"]
+    assert json.loads(again.body)["live_hosts"] == live - 1
+    assert _get("get-scan-summary.py", query, again.etag).status == "304 Not Modified"
+
+
+def test_render_cache_misses_after_an_in_place_rewrite(make_date):
+    date, scan_dir = make_date(hosts=50)
+    query = f"date={date}"
+    first = _get("port-distribution-chart.py", query)
+    assert _get("port-distribution-chart.py", query).body == first.body
+
+    _rewrite_in_place(scan_dir)
+    again = _get("port-distribution-chart.py", query)
+    assert again.etag != first.etag
+    assert again.body != first.body